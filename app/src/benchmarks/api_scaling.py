@@ -0,0 +1,154 @@
+"""Admin/auth throughput of the split deployment per API worker count.
+
+Starts `python -m src.main` with DEPLOY_MODE=split once per worker count,
+logs in as the given superuser and then drives a mix of logins (bcrypt
+bound), `/api/auth/me` and admin user listings (session lookup plus a
+paginated query) for a fixed time. Needs the configured PostgreSQL and
+an existing superuser; the bot worker only has to start, so
+TELEGRAM_TOKEN must be valid.
+
+    python -m src.benchmarks.api_scaling --phone +15550000000 \\
+        --password Secret123 --workers 1 2 4 --seconds 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from dotenv import load_dotenv
+
+
+load_dotenv()
+APP_ENV = os.getenv('APP_ENV', "production")
+
+logging.basicConfig(
+    level=(logging.DEBUG if APP_ENV == "development" else logging.ERROR),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DEPLOY_MODE": "split",
+        "API_WORKERS": str(workers),
+        "APP_PORT": str(port),
+    }
+    return subprocess.Popen([sys.executable, "-m", "src.main"], env=env)
+
+
+async def wait_ready(client, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not come up")
+
+
+async def drive(client, credentials: dict, seconds: float, concurrency: int,
+                login_ratio: float) -> dict:
+    response = await client.post("/api/auth/login", json=credentials)
+    response.raise_for_status()
+    token = response.cookies["token"]
+    cookies = {"token": token}
+
+    latencies = {"login": [], "me": [], "admin": []}
+    errors = 0
+    deadline = time.monotonic() + seconds
+
+    async def user(index: int):
+        nonlocal errors
+        step = 0
+        while time.monotonic() < deadline:
+            step += 1
+            if (index + step) % round(1 / login_ratio) == 0:
+                kind, call = "login", client.post(
+                    "/api/auth/login", json=credentials
+                )
+            elif step % 2:
+                kind, call = "me", client.get(
+                    "/api/auth/me", cookies=cookies
+                )
+            else:
+                kind, call = "admin", client.get(
+                    "/api/v1/admin/user", params={"page_size": 20},
+                    cookies=cookies,
+                )
+            started = time.perf_counter()
+            response = await call
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                latencies[kind].append(time.perf_counter() - started)
+
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+async def run(phone: str, password: str, workers: list, seconds: float,
+              concurrency: int, login_ratio: float, port: int):
+    import httpx
+
+    credentials = {"phone_number": phone, "password": password}
+    print(
+        f"{'workers':<9}{'req/s':>9}{'login/s':>9}"
+        f"{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}"
+    )
+    for count in workers:
+        server = start_server(count, port)
+        try:
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}",
+                limits=httpx.Limits(max_connections=concurrency),
+                timeout=30,
+            ) as client:
+                await wait_ready(client, 90)
+                result = await drive(
+                    client, credentials, seconds, concurrency, login_ratio
+                )
+        finally:
+            server.terminate()
+            server.wait()
+        latencies = result["latencies"]
+        everything = [s for samples in latencies.values() for s in samples]
+        print(
+            f"{count:<9}"
+            f"{len(everything) / seconds:>9.0f}"
+            f"{len(latencies['login']) / seconds:>9.1f}"
+            f"{percentile(everything, 0.50) * 1000:>9.2f}"
+            f"{percentile(everything, 0.99) * 1000:>9.2f}"
+            f"{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--phone", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--login-ratio", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+    asyncio.run(run(
+        args.phone,
+        args.password,
+        args.workers,
+        args.seconds,
+        args.concurrency,
+        args.login_ratio,
+        args.port,
+    ))
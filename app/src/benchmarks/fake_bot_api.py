@@ -0,0 +1,114 @@
+"""A local stand-in for the Telegram Bot API that enforces flood limits.
+
+Serves `POST /bot<token>/<method>` for `getMe` and `sendMessage` and
+answers 429 with `retry_after` once a chat or the bot as a whole
+exceeds its limit, like Telegram does, and 403 for `blocked_chats`. Point a `Bot` at it without any
+network through httpx's ASGI transport:
+
+    api = FakeBotApi()
+    bot = Bot(
+        "123:fake",
+        base_url="http://fake-bot-api/bot",
+        request=HTTPXRequest(
+            httpx_kwargs={"transport": httpx.ASGITransport(app=api.app)}
+        ),
+    )
+"""
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Set, Tuple
+from urllib.parse import parse_qs
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import asyncio
+import itertools
+import json
+import time
+
+
+@dataclass
+class FakeBotApi:
+    global_per_second: int = 30
+    chat_per_second: int = 1
+    group_per_minute: int = 20
+    retry_after: int = 1
+    latency: float = 0.0
+    # Chats answering 403, as when a user has blocked the bot
+    blocked_chats: Set[int] = field(default_factory=set)
+    sent: List[Tuple[float, int, str]] = field(default_factory=list)
+    flood_rejections: int = 0
+
+    def __post_init__(self):
+        self._global: Deque[float] = deque()
+        self._chats: Dict[int, Deque[float]] = defaultdict(deque)
+        self._message_ids = itertools.count(1)
+        self.app = FastAPI()
+        self.app.post("/bot{token}/{method}")(self.handle)
+
+    def _limited(self, chat_id: int, now: float) -> bool:
+        window, limit = (60.0, self.group_per_minute) if chat_id < 0 else (
+            1.0, self.chat_per_second
+        )
+        chat = self._chats[chat_id]
+        for timestamps, span in ((self._global, 1.0), (chat, window)):
+            while timestamps and timestamps[0] <= now - span:
+                timestamps.popleft()
+        if len(self._global) >= self.global_per_second or len(chat) >= limit:
+            return True
+        self._global.append(now)
+        chat.append(now)
+        return False
+
+    async def handle(self, token: str, method: str, request: Request):
+        params = {
+            key: values[0]
+            for key, values in parse_qs((await request.body()).decode()).items()
+        }
+        if method == "getMe":
+            return {"ok": True, "result": {
+                "id": int(token.split(":")[0]), "is_bot": True,
+                "first_name": "Fake", "username": "fake_bot",
+            }}
+        if method != "sendMessage":
+            return JSONResponse(
+                {"ok": False, "error_code": 404, "description": "Not Found"},
+                status_code=404,
+            )
+
+        chat_id = int(json.loads(params["chat_id"]))
+        if chat_id in self.blocked_chats:
+            return JSONResponse(
+                {
+                    "ok": False,
+                    "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user",
+                },
+                status_code=403,
+            )
+        now = time.monotonic()
+        if self._limited(chat_id, now):
+            self.flood_rejections += 1
+            return JSONResponse(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": (
+                        f"Too Many Requests: retry after {self.retry_after}"
+                    ),
+                    "parameters": {"retry_after": self.retry_after},
+                },
+                status_code=429,
+            )
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        self.sent.append((now, chat_id, params.get("text", "")))
+        return {"ok": True, "result": {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {
+                "id": chat_id,
+                "type": "group" if chat_id < 0 else "private",
+            },
+            "text": params.get("text", ""),
+        }}
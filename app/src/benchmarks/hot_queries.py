@@ -0,0 +1,79 @@
+"""Per-lookup Python overhead of the hot repository queries.
+
+Runs each lookup against an in-memory SQLite database so the numbers
+are dominated by SQLAlchemy statement building, cache-key generation
+and result processing rather than by the database round trip.
+
+    python -m src.benchmarks.hot_queries --iterations 20000
+"""
+import argparse
+import time
+
+
+def per_call_us(fn, iterations: int) -> float:
+    fn()  # warm the compiled cache
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def run(iterations: int):
+    from sqlalchemy import and_, create_engine, select
+    from sqlalchemy.orm import Session, joinedload
+    from src.database.models import AuthSession, BaseModel, User
+    from src.database import statements
+
+    engine = create_engine("sqlite://")
+    BaseModel.metadata.create_all(
+        engine, tables=[User.__table__, AuthSession.__table__]
+    )
+
+    missing = bytes(32)
+
+    with Session(engine) as session:
+        def rebuilt_by_token():
+            session.execute(
+                select(AuthSession)
+                .options(joinedload(AuthSession.user))
+                .where(
+                    and_(
+                        AuthSession.token_digest == missing,
+                        AuthSession.is_active.is_(True)
+                    )
+                )
+            ).scalar_one_or_none()
+
+        def prebuilt_by_token():
+            session.execute(
+                statements.SESSION_BY_DIGEST, {"token_digest": missing}
+            ).scalar_one_or_none()
+
+        def rebuilt_by_phone():
+            session.execute(
+                select(User).where(User.phone_number == "+10000000000")
+            ).scalar()
+
+        def prebuilt_by_phone():
+            session.execute(
+                statements.USER_BY_PHONE, {"phone_number": "+10000000000"}
+            ).scalar()
+
+        print(f"iterations={iterations} (microseconds per lookup)")
+        print(f"{'query':<24}{'rebuilt':>12}{'prebuilt':>12}")
+        for name, rebuilt, cached in (
+            ("session_by_token", rebuilt_by_token, prebuilt_by_token),
+            ("user_by_phone", rebuilt_by_phone, prebuilt_by_phone),
+        ):
+            print(
+                f"{name:<24}"
+                f"{per_call_us(rebuilt, iterations):>12.1f}"
+                f"{per_call_us(cached, iterations):>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.iterations)
@@ -0,0 +1,134 @@
+"""Outbound sends: direct `bot.send_message` versus `OutboundScheduler`.
+
+Replays a burst of handler replies, spread over many chats plus a few
+hot chats that receive repeated messages, against `fake_bot_api` with
+Telegram's flood limits. Direct sends retry after every 429 inside the
+handler, which is what stalls handlers today; scheduled sends are
+queued and the handler returns at once.
+
+    python -m src.benchmarks.outbound --messages 600
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+from dotenv import load_dotenv
+
+
+load_dotenv()
+APP_ENV = os.getenv('APP_ENV', "production")
+
+logging.basicConfig(
+    level=(logging.DEBUG if APP_ENV == "development" else logging.ERROR),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def make_burst(messages: int, hot_chats: int) -> list:
+    rng = random.Random(0)
+    burst = []
+    for i in range(messages):
+        if rng.random() < 0.3:
+            chat_id = rng.randrange(1, hot_chats + 1)
+            text = f"status update {rng.randrange(3)}"
+        else:
+            chat_id = 1000 + i
+            text = "bot is on."
+        burst.append((chat_id, text))
+    return burst
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def direct(bot, burst: list) -> list:
+    from telegram.error import RetryAfter
+    from src.telegram_bot.outbound import retry_after_seconds
+
+    async def handler(chat_id: int, text: str) -> float:
+        started = time.perf_counter()
+        while True:
+            try:
+                await bot.send_message(chat_id=chat_id, text=text)
+                break
+            except RetryAfter as exc:
+                await asyncio.sleep(retry_after_seconds(exc))
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(handler(c, t) for c, t in burst))
+
+
+async def scheduled(bot, burst: list) -> list:
+    from src.telegram_bot.outbound import OutboundScheduler
+
+    scheduler = OutboundScheduler(
+        bot,
+        global_rate=30,
+        chat_rate=1,
+        group_rate=20 / 60,
+        max_in_flight=8,
+        max_pending=len(burst),
+        max_retries=3,
+        max_flood_waits=5,
+    )
+    await scheduler.start()
+    handler_seconds, futures = [], []
+    for chat_id, text in burst:
+        started = time.perf_counter()
+        futures.append(scheduler.send_message(chat_id, text=text))
+        handler_seconds.append(time.perf_counter() - started)
+    await asyncio.gather(*futures)
+    stats = scheduler.snapshot()
+    await scheduler.stop()
+    print(
+        f"  scheduler: coalesced={stats['coalesced']} "
+        f"retried={stats['retried']} failed={stats['failed']}"
+    )
+    return handler_seconds
+
+
+async def run(messages: int, hot_chats: int):
+    import httpx
+    from telegram import Bot
+    from telegram.request import HTTPXRequest
+    from src.benchmarks.fake_bot_api import FakeBotApi
+
+    burst = make_burst(messages, hot_chats)
+    print(f"messages={messages} hot_chats={hot_chats}")
+    print(
+        f"{'mode':<11}{'delivered':>10}{'429s':>7}{'seconds':>9}"
+        f"{'handler p50 ms':>16}{'handler p99 ms':>16}"
+    )
+    for mode, strategy in (("direct", direct), ("scheduled", scheduled)):
+        api = FakeBotApi()
+        bot = Bot(
+            "123:fake",
+            base_url="http://fake-bot-api/bot",
+            request=HTTPXRequest(
+                connection_pool_size=64,
+                httpx_kwargs={"transport": httpx.ASGITransport(app=api.app)},
+            ),
+        )
+        async with bot:
+            started = time.perf_counter()
+            handler_seconds = await strategy(bot, burst)
+            elapsed = time.perf_counter() - started
+        print(
+            f"{mode:<11}{len(api.sent):>10}{api.flood_rejections:>7}"
+            f"{elapsed:>9.1f}"
+            f"{percentile(handler_seconds, 0.50) * 1000:>16.2f}"
+            f"{percentile(handler_seconds, 0.99) * 1000:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=600)
+    parser.add_argument("--hot-chats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.hot_chats))
@@ -0,0 +1,208 @@
+"""Query plans of the session and user lookups.
+
+Seeds users and sessions inside a transaction that is rolled back,
+runs `ANALYZE`, and checks that every query below reads its table
+through the index meant for it instead of a sequential scan. Exits
+with status 1 when one does not; tests/test_query_plans.py runs the
+same checks under pytest when a database is configured.
+
+    python -m src.benchmarks.query_plans --users 50000 --sessions 4
+"""
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any, List, Set, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from dotenv import load_dotenv
+
+
+load_dotenv()
+APP_ENV = os.getenv('APP_ENV', "production")
+
+logging.basicConfig(
+    level=(logging.DEBUG if APP_ENV == "development" else logging.ERROR),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Far above real ids, so seeding never collides with existing rows
+ID_OFFSET = 9_000_000_000_000
+
+SEED_USERS_SQL = """
+INSERT INTO users (id, role, created_at, updated_at)
+SELECT
+    :offset + n,
+    (CASE WHEN n % 1000 = 0 THEN 'SUPERUSER' ELSE 'USER' END)::userrole,
+    now(),
+    now()
+FROM generate_series(1, :users) AS n
+"""
+
+SEED_SESSIONS_SQL = """
+INSERT INTO auth_sessions (id, user_id, token_digest, is_active, created_at, expires_at)
+SELECT
+    :offset + n,
+    :offset + 1 + (n % :users),
+    sha256(n::text::bytea),
+    n % 4 <> 0,
+    now(),
+    now() + interval '1 day'
+FROM generate_series(1, :users * :sessions) AS n
+"""
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+
+# Index names of an index on a partitioned table and its partitions
+INDEX_FAMILY_SQL = """
+SELECT :index
+UNION ALL
+SELECT child.relname FROM pg_inherits
+JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+WHERE parent.relname = :index
+"""
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    table: str
+    statement: Any
+    # The index expected to serve the query (its partitions' copies too)
+    index: str
+
+
+def plan_checks() -> List[PlanCheck]:
+    """The repository statements whose plans must use an index."""
+    from sqlalchemy import func, select
+    from src.database.models import AuthSession, User, UserRole
+    from src.database.repositories import UserRepository
+    from src.database.statements import SESSION_BY_ID, SESSION_BY_DIGEST
+
+    role_filter = UserRepository(None)._filtered_query(
+        exact_filter={"role": UserRole.SUPERUSER}
+    )
+    return [
+        PlanCheck(
+            "session by token", "auth_sessions",
+            SESSION_BY_DIGEST.params(token_digest=sha256(b"1").digest()),
+            "ix_auth_sessions_token_digest_active",
+        ),
+        PlanCheck(
+            "session by id", "auth_sessions",
+            SESSION_BY_ID.params(session_id=ID_OFFSET + 1),
+            "auth_sessions_pkey",
+        ),
+        # What the ON DELETE CASCADE from users looks up
+        PlanCheck(
+            "sessions of user", "auth_sessions",
+            select(AuthSession.id).where(AuthSession.user_id == ID_OFFSET + 1),
+            "ix_auth_sessions_user_id",
+        ),
+        PlanCheck(
+            "users by role", "users",
+            role_filter.order_by(User.id).limit(20),
+            "ix_users_role_id",
+        ),
+        PlanCheck(
+            "count by role", "users",
+            select(func.count()).select_from(role_filter.subquery()),
+            "ix_users_role_id",
+        ),
+    ]
+
+
+def table_scans(plan: dict, table: str):
+    """(node type, index) of every scan on `table` or its partitions.
+
+    A bitmap heap scan reports the index of the bitmap scan below it.
+    """
+    relation = plan.get("Relation Name", "")
+    if relation == table or relation.startswith(f"{table}_"):
+        index = plan.get("Index Name")
+        if index is None and plan["Node Type"] == "Bitmap Heap Scan":
+            index = next(bitmap_indexes(plan), None)
+        yield plan["Node Type"], index
+    for child in plan.get("Plans", []):
+        yield from table_scans(child, table)
+
+
+def bitmap_indexes(plan: dict):
+    for child in plan.get("Plans", []):
+        if child["Node Type"] == "Bitmap Index Scan":
+            yield child["Index Name"]
+        yield from bitmap_indexes(child)
+
+
+async def explain(connection, statement) -> dict:
+    from src.database.counting import Explain
+
+    result = await connection.execute(Explain(statement))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def seed(connection, users: int, sessions: int) -> None:
+    """Insert test rows and refresh statistics; the caller rolls back."""
+    from sqlalchemy import text
+
+    params = {"offset": ID_OFFSET, "users": users, "sessions": sessions}
+    await connection.execute(text(SEED_USERS_SQL), params)
+    await connection.execute(text(SEED_SESSIONS_SQL), params)
+    await connection.execute(text("ANALYZE users"))
+    await connection.execute(text("ANALYZE auth_sessions"))
+
+
+async def check_plans(connection) -> List[Tuple[PlanCheck, list, Set[str]]]:
+    """Each check with its scans and the index names that satisfy it."""
+    from sqlalchemy import text
+
+    results = []
+    for check in plan_checks():
+        scans = list(table_scans(await explain(connection, check.statement), check.table))
+        family = set((await connection.execute(
+            text(INDEX_FAMILY_SQL), {"index": check.index}
+        )).scalars())
+        results.append((check, scans, family))
+    return results
+
+
+def uses_index(scans: list, family: Set[str]) -> bool:
+    return bool(scans) and all(
+        node in INDEX_SCANS and index in family for node, index in scans
+    )
+
+
+async def run(users: int, sessions: int) -> bool:
+    from src.database.config import engine
+
+    passed = True
+    async with engine.connect() as connection:
+        await seed(connection, users, sessions)
+
+        print(f"users={users} sessions/user={sessions}")
+        print(f"{'query':<20}{'result':<8}scans")
+        for check, scans, family in await check_plans(connection):
+            ok = uses_index(scans, family)
+            passed = passed and ok
+            described = ", ".join(
+                f"{node} ({index})" if index else node for node, index in scans
+            )
+            print(f"{check.name:<20}{'ok' if ok else 'FAIL':<8}{described}")
+
+        await connection.rollback()
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.users, args.sessions)) else 1)
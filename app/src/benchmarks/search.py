@@ -0,0 +1,99 @@
+"""Admin search: legacy `cast(col, String).ilike` versus indexed search.
+
+Seeds a temporary copy of `users` (indexes included) and compares the
+execution time reported by `EXPLAIN ANALYZE` for both query shapes.
+
+    python -m src.benchmarks.search --rows 1000000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+from dotenv import load_dotenv
+
+
+load_dotenv()
+APP_ENV = os.getenv('APP_ENV', "production")
+
+logging.basicConfig(
+    level=(logging.DEBUG if APP_ENV == "development" else logging.ERROR),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+SEED_SQL = """
+INSERT INTO bench_users (
+    id, telegram_id, telegram_username, phone_number, role,
+    first_name, last_name, created_at, updated_at
+)
+SELECT
+    n,
+    100000000 + n,
+    'user_' || md5(n::text),
+    '+98912' || lpad(n::text, 7, '0'),
+    'USER',
+    'first_' || substr(md5((n * 7)::text), 1, 10),
+    'last_' || substr(md5((n * 13)::text), 1, 10),
+    now(),
+    now()
+FROM generate_series(1, :rows) AS n
+"""
+
+TERMS = ["+989120001", "user_ab", "100000042", "nomatch_zz"]
+
+
+async def explain_ms(connection, statement, repeats: int) -> float:
+    from src.database.counting import Explain
+
+    timings = []
+    for _ in range(repeats):
+        result = await connection.execute(Explain(statement, analyze=True))
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        timings.append(plan[0]["Execution Time"])
+    return statistics.median(timings)
+
+
+async def run(rows: int, repeats: int):
+    from sqlalchemy import MetaData, String, cast, or_, select, text
+    from src.database.config import engine
+    from src.database.models import User
+    from src.database.search import build_search
+    from src.core.routers.admin import MODELS
+
+    search_fields = MODELS["user"]["search_fields"]
+    bench = User.__table__.to_metadata(MetaData(), name="bench_users")
+
+    async with engine.connect() as connection:
+        await connection.execute(text(
+            "CREATE TEMP TABLE bench_users (LIKE users INCLUDING ALL)"
+        ))
+        await connection.execute(text(SEED_SQL), {"rows": rows})
+        await connection.execute(text("ANALYZE bench_users"))
+
+        print(f"rows={rows} repeats={repeats} (median EXPLAIN ANALYZE ms)")
+        print(f"{'term':<14}{'before':>12}{'after':>12}")
+        for term in TERMS:
+            before = select(bench).where(or_(*(
+                cast(bench.c[field], String).ilike(f"%{term}%")
+                for field in search_fields
+            ))).limit(20)
+            after = select(bench).where(
+                build_search(bench.c, search_fields, term)
+            ).limit(20)
+            before_ms = await explain_ms(connection, before, repeats)
+            after_ms = await explain_ms(connection, after, repeats)
+            print(f"{term:<14}{before_ms:>12.2f}{after_ms:>12.2f}")
+
+        await connection.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeats))
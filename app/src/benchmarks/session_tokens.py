@@ -0,0 +1,102 @@
+"""Session token index: UUID text versus 32 byte digests.
+
+Seeds two temporary tables shaped like `auth_sessions`, one keyed by
+`String(36)` UUID text and one by `bytea` HMAC digests, each with the
+partial `WHERE is_active IS true` index, and reports the index size and
+the median `EXPLAIN ANALYZE` time of token lookups.
+
+    python -m src.benchmarks.session_tokens --rows 1000000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+from dotenv import load_dotenv
+
+
+load_dotenv()
+APP_ENV = os.getenv('APP_ENV', "production")
+
+logging.basicConfig(
+    level=(logging.DEBUG if APP_ENV == "development" else logging.ERROR),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    # before: str(uuid.uuid4())
+    "uuid text": (
+        "varchar(36)",
+        "md5(n::text)::uuid::text",
+        "md5(:n)::uuid::text",
+    ),
+    # after: HMAC-SHA256 of the cookie token; plain sha256 has the
+    # same width and spread without needing pgcrypto
+    "digest bytea": (
+        "bytea",
+        "sha256(n::text::bytea)",
+        "sha256(convert_to(:n, 'UTF8'))",
+    ),
+}
+
+SEED_SQL = """
+INSERT INTO {table} (id, token, is_active)
+SELECT n, {token}, n % 4 <> 0
+FROM generate_series(1, :rows) AS n
+"""
+
+
+async def run(rows: int, lookups: int):
+    import random
+    from sqlalchemy import text
+    from src.database.config import engine
+
+    async with engine.connect() as connection:
+        print(f"rows={rows} lookups={lookups}")
+        print(f"{'token':<16}{'index MB':>12}{'lookup ms':>12}")
+        for number, (name, (column, seed, lookup)) in enumerate(VARIANTS.items()):
+            table = f"bench_tokens_{number}"
+            await connection.execute(text(
+                f"CREATE TEMP TABLE {table} "
+                f"(id bigint PRIMARY KEY, token {column} NOT NULL, is_active boolean NOT NULL)"
+            ))
+            await connection.execute(
+                text(SEED_SQL.format(table=table, token=seed)), {"rows": rows}
+            )
+            await connection.execute(text(
+                f"CREATE INDEX {table}_token ON {table} (token) WHERE is_active IS true"
+            ))
+            await connection.execute(text(f"ANALYZE {table}"))
+
+            size = (await connection.execute(
+                text(f"SELECT pg_relation_size('{table}_token')")
+            )).scalar()
+            timings = []
+            for _ in range(lookups):
+                result = await connection.execute(
+                    text(
+                        f"EXPLAIN (ANALYZE, FORMAT JSON) SELECT id FROM {table} "
+                        f"WHERE token = {lookup} AND is_active IS true"
+                    ),
+                    {"n": str(random.randint(1, rows))},
+                )
+                plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                timings.append(plan[0]["Execution Time"])
+            print(
+                f"{name:<16}{size / 2**20:>12.1f}"
+                f"{statistics.median(timings):>12.3f}"
+            )
+
+        await connection.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.lookups))
@@ -0,0 +1,181 @@
+"""Webhook ingestion: inline `Update.de_json` versus the raw fast path.
+
+Drives `/webhook` in-process through httpx's ASGI transport with a mix of
+command and plain-text updates and reports requests per second and
+acknowledgement latency percentiles for both ingestion modes, for
+redeliveries of updates already taken (dropped by update_id) and for
+junk posts without the secret token. Workers still build the `Update`
+objects but skip the handlers, so no Bot API calls are made.
+
+    python -m src.benchmarks.webhook --requests 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dotenv import load_dotenv
+
+
+load_dotenv()
+APP_ENV = os.getenv('APP_ENV', "production")
+
+logging.basicConfig(
+    level=(logging.DEBUG if APP_ENV == "development" else logging.ERROR),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> bytes:
+    sender = {
+        "id": chat_id,
+        "is_bot": False,
+        "first_name": "Bench",
+        "last_name": "User",
+        "username": f"bench_{chat_id}",
+        "language_code": "en",
+    }
+    message = {
+        "message_id": update_id,
+        "from": sender,
+        "chat": {
+            "id": chat_id,
+            "first_name": "Bench",
+            "last_name": "User",
+            "username": f"bench_{chat_id}",
+            "type": "private",
+        },
+        "date": 1700000000,
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [
+            {"offset": 0, "length": len(text.split()[0]), "type": "bot_command"}
+        ]
+    return json.dumps({"update_id": update_id, "message": message}).encode()
+
+
+class DrainApplication:
+    """Stands in for `Application` in the workers: consumes, never replies."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def process_update(self, update) -> None:
+        return None
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def drive(client, bodies: list, concurrency: int, secret: str,
+                expected: int = 200) -> list:
+    from src.telegram_bot.webhook import SECRET_HEADER
+
+    latencies = []
+    cursor = iter(bodies)
+
+    async def client_loop():
+        for body in cursor:
+            started = time.perf_counter()
+            response = await client.post(
+                "/webhook",
+                content=body,
+                headers={
+                    "content-type": "application/json",
+                    SECRET_HEADER: secret,
+                },
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != expected:
+                logger.error("Webhook answered %s", response.status_code)
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies
+
+
+async def run(requests: int, concurrency: int, command_ratio: float):
+    # The junk row needs the secret check, which is off without a secret
+    if not os.getenv("WEBHOOK_SECRET"):
+        os.environ["WEBHOOK_SECRET"] = "benchmark-secret"
+    import httpx
+    import src.telegram_bot as bot
+    from src.core import api
+    from src.telegram_bot import WEBHOOK_SECRET, application, dispatcher
+    from src.telegram_bot import webhook_guard
+
+    def make_bodies(first_id: int, count: int) -> list:
+        rng = random.Random(0)
+        return [
+            make_update(
+                update_id,
+                chat_id=rng.randrange(1, 5000),
+                text="/start" if rng.random() < command_ratio else "hello there",
+            )
+            for update_id in range(first_id, first_id + count)
+        ]
+
+    dispatcher.application = DrainApplication(application.bot)
+    # Never shed load here: any single shard may take every request
+    dispatcher.max_queue = requests * dispatcher.workers
+    await dispatcher.start()
+    # Every request comes from one address here
+    webhook_guard.ip_rate = 0
+
+    transport = httpx.ASGITransport(app=api.api_app)
+    print(
+        f"requests={requests} concurrency={concurrency} "
+        f"command_ratio={command_ratio}"
+    )
+    print(f"{'mode':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://localhost"
+        ) as client:
+            warmup = concurrency * 10
+            modes = (
+                ("inline", False, WEBHOOK_SECRET, 200),
+                ("fast", True, WEBHOOK_SECRET, 200),
+                # Telegram redelivering updates that were already taken
+                ("retries", True, WEBHOOK_SECRET, 200),
+                # Junk without the secret token, refused before parsing
+                ("junk", True, "wrong", 403),
+            )
+            for index, (mode, fast, secret, expected) in enumerate(modes):
+                if mode != "retries":
+                    first_id = index * (requests + warmup)
+                    bodies = make_bodies(first_id, requests + warmup)
+                bot.WEBHOOK_FAST_INGEST = fast
+                await drive(
+                    client, bodies[:warmup], concurrency, secret, expected
+                )
+                await dispatcher.join()
+                started = time.perf_counter()
+                latencies = await drive(
+                    client, bodies[warmup:], concurrency, secret, expected
+                )
+                # Include the deferred work the fast path handed to workers
+                await dispatcher.join()
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{mode:<8}"
+                    f"{requests / elapsed:>10.0f}"
+                    f"{percentile(latencies, 0.50) * 1000:>10.2f}"
+                    f"{percentile(latencies, 0.99) * 1000:>10.2f}"
+                )
+    finally:
+        await dispatcher.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--command-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.command_ratio))
@@ -1,19 +1,75 @@
 from uvicorn import Config, Server
-from src.core.api import api_app
+from uvicorn.supervisors import Multiprocess
+from src.core.api import api_app, begin_drain
+import asyncio
 import os
 
 APP_ENV = os.getenv('APP_ENV', "production")
+APP_HOST = os.getenv('APP_HOST', "0.0.0.0")
+APP_PORT = int(os.getenv('APP_PORT', 8000))
+# Seconds /health/ready fails before shutdown starts, so load balancers
+# stop routing here while updates are still accepted
+SHUTDOWN_GRACE_SECONDS = float(os.getenv('SHUTDOWN_GRACE_SECONDS', 0))
 
 UVICORN_LOG_LEVEL = "debug" if APP_ENV == "development" else "error"
 
 server_config = Config(
     app=api_app,
-    host="0.0.0.0",
-    port=8000,
+    host=APP_HOST,
+    port=APP_PORT,
     log_level=UVICORN_LOG_LEVEL
 )
 
 
+class GracefulServer(Server):
+    """`Server` that fails readiness for SHUTDOWN_GRACE_SECONDS first.
+
+    A second signal during the grace period shuts down at once.
+    """
+
+    def __init__(self, config: Config):
+        super().__init__(config)
+        self.draining = False
+
+    def handle_exit(self, sig, frame) -> None:
+        if self.draining or not SHUTDOWN_GRACE_SECONDS:
+            return super().handle_exit(sig, frame)
+        self.draining = True
+        begin_drain()
+        # Runs inside a signal handler: hand over to the loop safely
+        loop = asyncio.get_running_loop()
+        loop.call_soon_threadsafe(
+            loop.call_later,
+            SHUTDOWN_GRACE_SECONDS,
+            super().handle_exit,
+            sig,
+            frame,
+        )
+
+
 async def runserver():
-    webserver = Server(server_config)
+    webserver = GracefulServer(server_config)
     await webserver.serve()
+
+
+def serve_workers(workers: int):
+    """Run `workers` API processes sharing the listening socket.
+
+    Blocks until every worker has shut down. Each worker is a
+    `GracefulServer`: on SIGTERM the supervisor signals the workers,
+    which fail readiness for SHUTDOWN_GRACE_SECONDS before stopping,
+    like the single-process server does.
+    """
+    config = Config(
+        app="src.core.api:api_app",
+        host=APP_HOST,
+        port=APP_PORT,
+        workers=workers,
+        log_level=UVICORN_LOG_LEVEL,
+    )
+    server = GracefulServer(config)
+    if workers <= 1:
+        server.run()
+        return
+    # What uvicorn.run does for workers > 1, with our server class
+    Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
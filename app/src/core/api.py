@@ -1,19 +1,56 @@
 import logging
-from fastapi import FastAPI, Response, Request
+from typing import Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from src.core.routers import auth, admin
-from src.telegram_bot import application
-from telegram import Update
+from src.core.routers import auth, admin, broadcast, metrics
+from src.core.dependencies import AuthTimingMiddleware
+from src.telegram_bot import bot_lifecycle, forwarder, ingest_body
+from src.telegram_bot import webhook_guard
+from src.telegram_bot import APP_ROLE, parse_update_body, raw_shard_key
+from src.telegram_bot import peek_shard_key
+from src.telegram_bot.ipc import ForwardingUnavailableException
+from src.telegram_bot.ipc import STATUS_ACCEPTED, STATUS_BUSY
+from src.telegram_bot.webhook import SECRET_HEADER
+from src.sessions import session_store, session_revocations
+from src.sessions import SESSION_ACCEPT_SIGNED
+from src.database.config import engine
 import os
 
 logger = logging.getLogger(__name__)
-api_app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await session_store.start()
+    if SESSION_ACCEPT_SIGNED:
+        await session_revocations.start()
+    if APP_ROLE == "all":
+        await bot_lifecycle.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    if APP_ROLE == "all":
+        await bot_lifecycle.stop()
+    else:
+        await forwarder.close()
+    await session_revocations.stop()
+    await session_store.stop()
+    await engine.dispose()
+
+
+api_app = FastAPI(lifespan=lifespan)
 
 
 # region add the routes in this region #
 api_app.include_router(auth.auth_router)
 api_app.include_router(admin.admin_router)
+api_app.include_router(metrics.metrics_router)
+api_app.include_router(broadcast.broadcast_router)
 
 APP_DOMAIN = os.getenv('APP_DOMAIN', 'localhost')
 FRONTEND_ORIGINS = [
@@ -47,18 +84,147 @@ api_app.add_middleware(
     TrustedHostMiddleware,
     allowed_hosts=ALLOWED_HOSTS
 )
+api_app.add_middleware(AuthTimingMiddleware)
 # endregion -------------------------- #
 
 
+@api_app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # Fail fast when no pooled connection frees up within DB_POOL_TIMEOUT
+    logger.warning("Database pool checkout deadline exceeded")
+    return JSONResponse(
+        {"detail": "Server is busy, try again later."},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
 @api_app.get("/")
 def index():
     return Response("OK")
 
 
+def begin_drain() -> None:
+    """Fail readiness ahead of shutdown; see `GracefulServer`."""
+    api_app.state.ready = False
+    bot_lifecycle.begin_drain()
+
+
+@api_app.get("/health/live")
+def liveness():
+    # Only the update workers dying warrants a restart
+    if not bot_lifecycle.alive:
+        return JSONResponse(
+            {"status": "update workers stopped"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return {"status": "alive"}
+
+
+@api_app.get("/health/ready")
+def readiness():
+    body = {"role": APP_ROLE}
+    ready = getattr(api_app.state, "ready", False)
+    if APP_ROLE == "all":
+        body["bot"] = bot_lifecycle.snapshot()
+        ready = ready and bot_lifecycle.ready
+    if not ready:
+        return JSONResponse(
+            {"status": "not ready", **body},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return {"status": "ready", **body}
+
+
+@api_app.get("/health/db")
+async def database_health():
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except Exception:
+        logger.exception("Database health check failed")
+        return JSONResponse(
+            {"database": "unavailable"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return {"database": "ok"}
+
+
+def busy() -> Response:
+    # Any non-2xx makes Telegram redeliver the update later
+    return Response(
+        "Busy",
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def read_capped_body(request: Request) -> Optional[bytes]:
+    """The request body, or None once it grows past the webhook limit."""
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if webhook_guard.too_large(size):
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def bad_update() -> Response:
+    return Response("Bad update", status_code=status.HTTP_400_BAD_REQUEST)
+
+
 @api_app.post("/webhook")
 async def get_webhook(request: Request):
-    update = Update.de_json(data=await request.json(), bot=application.bot)
+    # Everything up to here is header-only; junk never gets parsed
+    rejected = webhook_guard.admit(
+        request.client.host if request.client else None,
+        request.headers.get(SECRET_HEADER),
+        request.headers.get("content-length"),
+    )
+    if rejected is not None:
+        return Response(
+            rejected.phrase,
+            status_code=rejected.value,
+            headers={"Retry-After": "1"} if rejected == 429 else None,
+        )
+    body = await read_capped_body(request)
+    if body is None:
+        return Response(
+            "Too large",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
 
-    await application.update_queue.put(update)
+    if APP_ROLE == "api":
+        return await forward_webhook(body)
+    return ingest_response(await ingest_body(body))
 
-    return Response("OK")
+
+def ingest_response(result: int) -> Response:
+    if result == STATUS_ACCEPTED:
+        return Response("OK")
+    if result == STATUS_BUSY:
+        return busy()
+    return bad_update()
+
+
+async def forward_webhook(body: bytes) -> Response:
+    """Hand the raw body to the bot worker that owns the update's chat.
+
+    The chat is read off the raw bytes; the bot worker does the one
+    full parse. Only bodies that do not start like an update are parsed
+    here.
+    """
+    key = peek_shard_key(body)
+    if key is None:
+        try:
+            key = raw_shard_key(parse_update_body(body))
+        except ValueError:
+            return bad_update()
+    try:
+        result = await forwarder.forward(body, key)
+    except ForwardingUnavailableException:
+        logger.warning("Bot worker unavailable, update left for redelivery")
+        return busy()
+    return ingest_response(result)
@@ -1,42 +1,196 @@
-from typing import Annotated, List
+from typing import Annotated, Callable, Iterable
+from dataclasses import dataclass
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import Cookie, Depends, HTTPException, status
-from src.database.models import AuthSession, UserRole
-from src.core.services import AuthSesssionService
+from sqlalchemy.orm import Session
+from fastapi import Cookie, Depends, HTTPException, Request, status
+from src.database.models import UserRole
+from src.core.custom_exceptions import InvalidCredentialsException
+from src.core.services import AuthService
 from src.database.config import SessionFactory
+from src.sessions import SessionIdentity
+import logging
+import time
 
+logger = logging.getLogger(__name__)
 
-async def db_session_dep():
-    async with SessionFactory() as session:
+# Set by /api/auth/login, read by every authorized route
+AUTH_COOKIE = "token"
+
+
+@dataclass
+class RequestSessionMetrics:
+    opened: int = 0
+    # Sessions closed without ever checking out a pooled connection
+    unused: int = 0
+
+    def snapshot(self) -> dict:
+        return {"opened": self.opened, "unused": self.unused}
+
+
+request_session_metrics = RequestSessionMetrics()
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_used_connection(session: Session, transaction, connection):
+    # Fires when the session first binds a connection in a transaction
+    session.info["used_connection"] = True
+
+
+async def db_session_dep(request: Request):
+    """One `AsyncSession` per request, shared by every dependency.
+
+    The session is stored on `request.state` so code outside the
+    dependency graph reuses it too. `AsyncSession` only checks out a
+    pooled connection on its first query, so requests answered from the
+    session cache never touch the pool.
+    """
+    session: AsyncSession | None = getattr(request.state, "db_session", None)
+    if session is not None:
         yield session
+        return
+
+    session = SessionFactory()
+    request.state.db_session = session
+    request_session_metrics.opened += 1
+    try:
+        yield session
+    finally:
+        if not session.info.get("used_connection"):
+            request_session_metrics.unused += 1
+        request.state.db_session = None
+        await session.close()
 
 
 async def auth_dep(session: AsyncSession = Depends(db_session_dep)):
-    service: AuthSesssionService = AuthSesssionService(session)
+    service: AuthService = AuthService(session)
     yield service
 
 
-def session_authorize_dep(acceptable_roles: List[UserRole]):
-    async def _authorize(
-            token: Annotated[str | None, Cookie()] = None,
-            auth_service: AuthSesssionService = Depends(auth_dep),
-    ) -> AuthSession:
-        if not token:
-            raise HTTPException(
-                status_code=401, detail="Authorization cookie is missing."
-            )
+@dataclass
+class AuthMetrics:
+    lookups: int = 0
+    # Identities reused within a request instead of resolved again
+    memo_hits: int = 0
+    unauthorized: int = 0
+    forbidden: int = 0
+    errors: int = 0
+    auth_seconds_total: float = 0.0
+    auth_seconds_max: float = 0.0
+    # Rest of the request for requests that went through authorization
+    handler_requests: int = 0
+    handler_seconds_total: float = 0.0
 
-        try:
-            identity: AuthSession = await auth_service.get_session(
-                token=token
-            )
+    def snapshot(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "memo_hits": self.memo_hits,
+            "unauthorized": self.unauthorized,
+            "forbidden": self.forbidden,
+            "errors": self.errors,
+            "auth_ms_avg": (
+                self.auth_seconds_total / self.lookups * 1000
+                if self.lookups else 0.0
+            ),
+            "auth_ms_max": self.auth_seconds_max * 1000,
+            "handler_ms_avg": (
+                self.handler_seconds_total / self.handler_requests * 1000
+                if self.handler_requests else 0.0
+            ),
+        }
 
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="You must be authorized"
-            )
-        if identity.user.role not in acceptable_roles:
+
+auth_metrics = AuthMetrics()
+
+
+async def _resolve_identity(
+    request: Request,
+    token: str | None,
+    auth_service: AuthService,
+    stateless: bool,
+) -> SessionIdentity:
+    """The request's identity, looked up at most once per request.
+
+    Memoized on `request.state.identities`, keyed by whether a
+    stateless (signed token) identity is acceptable; a full identity
+    serves both. The time spent is kept in `request.state.auth_seconds`.
+    """
+    identities: dict = getattr(request.state, "identities", None) or {}
+    identity = identities.get(False) or (identities.get(True) if stateless else None)
+    if identity is not None:
+        auth_metrics.memo_hits += 1
+        return identity
+
+    if not token:
+        auth_metrics.unauthorized += 1
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization cookie is missing."
+        )
+
+    started = time.perf_counter()
+    try:
+        identity = await auth_service.get_session(token, stateless=stateless)
+    except InvalidCredentialsException:
+        auth_metrics.unauthorized += 1
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token."
+        )
+    except PoolTimeoutError:
+        # Answered with 503 by the application's handler
+        raise
+    except Exception:
+        auth_metrics.errors += 1
+        logger.exception("Authorization error")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal authorization error."
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        auth_metrics.lookups += 1
+        auth_metrics.auth_seconds_total += elapsed
+        auth_metrics.auth_seconds_max = max(auth_metrics.auth_seconds_max, elapsed)
+        request.state.auth_seconds = (
+            getattr(request.state, "auth_seconds", 0.0) + elapsed
+        )
+
+    request.state.identities = {**identities, stateless: identity}
+    return identity
+
+
+async def current_identity(
+    request: Request,
+    token: Annotated[str | None, Cookie(alias=AUTH_COOKIE)] = None,
+    auth_service: AuthService = Depends(auth_dep),
+) -> SessionIdentity:
+    """Identity of the session cookie; for signed tokens it only holds
+    the user's id and role."""
+    return await _resolve_identity(request, token, auth_service, stateless=True)
+
+
+async def current_full_identity(
+    request: Request,
+    token: Annotated[str | None, Cookie(alias=AUTH_COOKIE)] = None,
+    auth_service: AuthService = Depends(auth_dep),
+) -> SessionIdentity:
+    """Identity of the session cookie with the whole user profile."""
+    return await _resolve_identity(request, token, auth_service, stateless=False)
+
+
+def session_authorize_dep(
+    acceptable_roles: Iterable[UserRole] = tuple(UserRole),
+) -> Callable:
+    """Dependency admitting sessions whose user has one of the roles."""
+    roles = frozenset(acceptable_roles)
+
+    async def _authorize(
+        identity: SessionIdentity = Depends(current_identity),
+    ) -> SessionIdentity:
+        if identity.user.role not in roles:
+            auth_metrics.forbidden += 1
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this route."
@@ -44,3 +198,35 @@ def session_authorize_dep(acceptable_roles: List[UserRole]):
         return identity
 
     return _authorize
+
+
+class AuthTimingMiddleware:
+    """Splits the time of authorized requests into authorization and
+    the rest, in `auth_metrics` and a `Server-Timing` header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                auth_seconds = scope.get("state", {}).get("auth_seconds")
+                if auth_seconds is not None:
+                    handler_seconds = (
+                        time.perf_counter() - started - auth_seconds
+                    )
+                    auth_metrics.handler_requests += 1
+                    auth_metrics.handler_seconds_total += handler_seconds
+                    message["headers"] = [*message.get("headers", ()), (
+                        b"server-timing",
+                        f"auth;dur={auth_seconds * 1000:.2f}, "
+                        f"handler;dur={handler_seconds * 1000:.2f}".encode(),
+                    )]
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
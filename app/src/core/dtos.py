@@ -1,7 +1,8 @@
-from typing import Optional, Any
+from typing import Optional, Any, List
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic import model_validator, field_validator
-from src.database.models import UserRole
+from datetime import datetime
+from src.database.models import BroadcastStatus, UserRole
 import re
 
 # region Auth
@@ -50,6 +51,46 @@ class UserCreateDto(BaseModel):
         return self
 
 
+class UserUpdateDto(BaseModel):
+    """DTO for a partial user update.
+
+    `password` is always plaintext; it is the only way to change a
+    password, since read DTOs never return the stored hash.
+    """
+    telegram_id: Optional[int] = None
+    telegram_username: Optional[str] = Field(None, max_length=32)
+    phone_number: Optional[str] = Field(None, max_length=15, pattern=r'^\+?[1-9]\d{1,14}$')
+    role: Optional[UserRole] = None
+    first_name: Optional[str] = Field(None, max_length=64)
+    last_name: Optional[str] = Field(None, max_length=64)
+    password: Optional[str] = Field(None, min_length=8, max_length=128)
+
+    @field_validator('phone_number')
+    @classmethod
+    def validate_phone_number(cls, v: Optional[str]) -> Optional[str]:
+        """Validate phone number format (E.164)."""
+        if v is None:
+            return v
+        cleaned = re.sub(r'[\s\-]', '', v)
+        if not re.match(r'^\+?[1-9]\d{1,14}$', cleaned):
+            raise ValueError('Invalid phone number format')
+        return cleaned
+
+    @field_validator('password')
+    @classmethod
+    def validate_password_strength(cls, v: Optional[str]) -> Optional[str]:
+        """Validate password strength."""
+        if v is None:
+            return v
+        if not re.search(r'[A-Z]', v):
+            raise ValueError('Password must contain at least one uppercase letter')
+        if not re.search(r'[a-z]', v):
+            raise ValueError('Password must contain at least one lowercase letter')
+        if not re.search(r'\d', v):
+            raise ValueError('Password must contain at least one digit')
+        return v
+
+
 class UserDto(BaseModel):
     """DTO for user response."""
     model_config = ConfigDict(from_attributes=True)
@@ -61,8 +102,8 @@ class UserDto(BaseModel):
     role: Optional[UserRole] = None
     first_name: Optional[str] = Field(None, max_length=64)
     last_name: Optional[str] = Field(None, max_length=64)
-    created_at: Optional[str] = None
-    updated_at: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
 
 class ResetPasswordDto(BaseModel):
@@ -108,6 +149,56 @@ class LoginDto(BaseModel):
         return cleaned
 
 
+# endregion
+
+# region Admin
+
+
+class PaginationDto(BaseModel):
+    """DTO for paginated admin listings.
+
+    Page mode fills `page`; cursor mode fills `next_cursor` and
+    `prev_cursor` instead. `count_strategy` tells how `total` and
+    `total_pages` were produced (exact, estimated or cached).
+    """
+    items: List[Any]
+    total: int
+    page: Optional[int] = None
+    page_size: int
+    total_pages: int
+    count_strategy: str = "exact"
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class BroadcastCreateDto(BaseModel):
+    """DTO for starting a broadcast to every Telegram user."""
+    text: str = Field(..., min_length=1, max_length=4096)
+
+
+class BroadcastDto(BaseModel):
+    """DTO for broadcast status.
+
+    `progress` holds live throughput figures while this worker is
+    sending the broadcast, and is empty otherwise.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    text: str
+    status: BroadcastStatus
+    created_by: Optional[int] = None
+    last_user_id: int
+    total: int
+    sent: int
+    failed: int
+    blocked: int
+    created_at: datetime
+    heartbeat_at: datetime
+    finished_at: Optional[datetime] = None
+    progress: Optional[dict] = None
+
+
 # endregion
 
 
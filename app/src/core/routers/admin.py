@@ -1,55 +1,37 @@
 from enum import Enum
 from fastapi import Query
-from typing import Dict, Type, List, Annotated
+from typing import Awaitable, Dict, Type, List, Tuple, TypeVar
 from typing import TypedDict, NotRequired
 from pydantic import BaseModel
 from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.responses import Response, JSONResponse
-from fastapi import Cookie
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.repositories import BaseRepository, UserRepository
-from src.database.models import User, UserRole, AuthSession, AbstractBase
+from src.database.models import User, UserRole, AbstractBase
+from src.database.counting import CountStrategy, CountResult
+from src.database.search import SearchMode
+from src.database.config import SessionFactory
 from src.core import dtos
 from src.core.services import AuthService
-from src.core.dependencies import auth_dep, db_session_dep
+from src.core.dependencies import db_session_dep, session_authorize_dep
+from src.passwords import HasherSaturatedException
+from src.sessions import session_store
+import asyncio
 import math
 import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+R = TypeVar('R')
 
-async def authorize(
-    token: Annotated[str | None, Cookie(alias="auth_token")] = None,
-    auth_service: AuthService = Depends(auth_dep),
-) -> AuthSession:
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization cookie is missing."
-        )
+ADMIN_COUNT_CONCURRENTLY = os.getenv("ADMIN_COUNT_CONCURRENTLY", "false") == "true"
 
-    try:
-        identity: AuthSession = await auth_service.get_session(token=token)
-    except (ValueError, KeyError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token."
-        )
-    except Exception as e:
-        logger.error(f"Authorization error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal authorization error."
-        )
 
-    if identity.user.role != UserRole.SUPERUSER:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have access to this route."
-        )
-    return identity
+authorize = session_authorize_dep({UserRole.SUPERUSER})
 
 
 async def db_repository(
@@ -82,24 +64,46 @@ admin_router = APIRouter(
 
 class ModelsConfig(TypedDict):
     dto: Type[BaseModel]
+    # Response shape; defaults to `dto`. Must tolerate every stored row
+    read_dto: NotRequired[Type[BaseModel]]
+    # PATCH body; defaults to `dto`
+    update_dto: NotRequired[Type[BaseModel]]
     model: Type[AbstractBase]
     repository: NotRequired[Type[BaseRepository]]
     protected_fields: NotRequired[List[str]]
+    # Only these fields are searchable; each mode needs a matching index
+    search_fields: NotRequired[Dict[str, SearchMode]]
+    # Only these scalar columns (and `id`) can be sorted on; each needs
+    # an index leading with it so keyset pages stay range scans
+    sort_fields: NotRequired[List[str]]
 
 
 MODELS: Dict[str, ModelsConfig] = {
     "user": {
         "dto": dtos.UserCreateDto,
+        "read_dto": dtos.UserDto,
+        "update_dto": dtos.UserUpdateDto,
         "model": User,
         "repository": UserRepository,
         "protected_fields": ["password_hash", "is_superuser"],
+        "search_fields": {
+            "telegram_id": SearchMode.exact,
+            "phone_number": SearchMode.prefix,
+            "telegram_username": SearchMode.trigram,
+            "first_name": SearchMode.trigram,
+            "last_name": SearchMode.trigram,
+        },
+        "sort_fields": [
+            "telegram_id", "telegram_username", "phone_number", "role",
+        ],
     },
 }
 
 
 async def get_dto_instance(
     request: Request,
-    model_name: str
+    model_name: str,
+    kind: str = "dto"
 ) -> BaseModel:
     model_config = MODELS.get(model_name)
     if not model_config:
@@ -108,11 +112,16 @@ async def get_dto_instance(
             detail="Model not found"
         )
 
-    dto_class = model_config["dto"]
+    dto_class = model_config.get(kind, model_config["dto"])
     data = await request.json()
     return dto_class(**data)
 
 
+def get_read_dto(model_name: str) -> Type[BaseModel]:
+    model_config = MODELS[model_name]
+    return model_config.get("read_dto", model_config["dto"])
+
+
 @admin_router.get("/", response_model=Dict[str, List[str]])
 async def get_models_name():
     return JSONResponse({"models": list(MODELS.keys())})
@@ -123,11 +132,45 @@ class SortOrder(str, Enum):
     descending = "desc"
 
 
+class PaginationMode(str, Enum):
+    page = "page"
+    cursor = "cursor"
+
+
+async def fetch_with_count(
+    db_repository: BaseRepository,
+    page_query: Awaitable[R],
+    **count_kwargs
+) -> Tuple[R, CountResult]:
+    """Run a page query and its total count.
+
+    With ADMIN_COUNT_CONCURRENTLY the count runs on its own session (and
+    pooled connection) so both round trips overlap.
+    """
+    if not ADMIN_COUNT_CONCURRENTLY:
+        page_result = await page_query
+        return page_result, await db_repository.count(**count_kwargs)
+
+    async def separate_count() -> CountResult:
+        async with SessionFactory() as count_session:
+            return await db_repository.with_session(count_session).count(
+                **count_kwargs
+            )
+
+    page_result, total = await asyncio.gather(page_query, separate_count())
+    return page_result, total
+
+
 @admin_router.get("/{model_name}", response_model=dtos.PaginationDto)
 async def get_all(
     model_name: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=1000),
+    pagination: PaginationMode = PaginationMode.page,
+    count: CountStrategy = CountStrategy.exact,
+    cursor: str | None = Query(
+        None, description="Opaque next/prev cursor; implies cursor mode"
+    ),
     sort_by: str | None = None,
     direction: SortOrder | None = None,
     search: str | None = None,
@@ -148,8 +191,7 @@ async def get_all(
     if exact_filter:
         try:
             raw_filters = json.loads(exact_filter)
-            dto_class = model_config.get("dto")
-            allowed_fields = dto_class.model_fields.keys()
+            allowed_fields = get_read_dto(model_name).model_fields.keys()
             protected_fields = set(model_config.get("protected_fields", []))
             
             filters_dict = {
@@ -164,26 +206,92 @@ async def get_all(
                 detail="The filter JSON is malformed."
             )
 
-    objects, total_count = await db_repository.get_paginated(
-        page=page,
-        page_size=page_size,
-        sortby=sort_by,
-        direction=direction,
-        search=search,
-        search_fields=search_fields,
-        exact_filter=filters_dict
-    )
-
-    dto: Type[BaseModel] = MODELS[model_name]["dto"]
-    data_items = [dto.model_validate(model) for model in objects]
+    declared_search: Dict[str, SearchMode] = model_config.get("search_fields", {})
+    undeclared = set(search_fields or []) - declared_search.keys()
+    if undeclared:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The fields are not searchable: {', '.join(sorted(undeclared))}."
+        )
+    if search and not declared_search:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The model is not searchable."
+        )
+    if sort_by and sort_by != "id" and sort_by not in model_config.get("sort_fields", []):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The field is not sortable: {sort_by}."
+        )
+    search_spec = {
+        field: mode for field, mode in declared_search.items()
+        if not search_fields or field in search_fields
+    }
+
+    dto = get_read_dto(model_name)
+    cursor_mode = cursor is not None or pagination == PaginationMode.cursor
+
+    async def fetch_page():
+        if cursor_mode:
+            return await db_repository.get_keyset_page(
+                page_size=page_size,
+                cursor=cursor,
+                sortby=sort_by,
+                direction=direction,
+                search=search,
+                search_fields=search_spec,
+                exact_filter=filters_dict
+            )
+        objects, _ = await db_repository.get_paginated(
+            page=page,
+            page_size=page_size,
+            sortby=sort_by,
+            direction=direction,
+            search=search,
+            search_fields=search_spec,
+            exact_filter=filters_dict,
+            count_strategy=None
+        )
+        return objects
+
+    try:
+        result, total = await fetch_with_count(
+            db_repository,
+            fetch_page(),
+            search=search,
+            search_fields=search_spec,
+            exact_filter=filters_dict,
+            strategy=count
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    total_count = total.total
     total_pages = math.ceil(total_count / page_size) if total_count > 0 else 0
+
+    if cursor_mode:
+        return {
+            "items": [dto.model_validate(model) for model in result.items],
+            "total": total_count,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "count_strategy": total.strategy,
+            "next_cursor": result.next_cursor,
+            "prev_cursor": result.prev_cursor,
+        }
+
+    data_items = [dto.model_validate(model) for model in result]
     
     return {
         "items": data_items,
         "total": total_count,
         "page": page,
         "page_size": page_size,
-        "total_pages": total_pages
+        "total_pages": total_pages,
+        "count_strategy": total.strategy,
     }
 
 
@@ -199,13 +307,22 @@ async def create_new(
         new_record = await db_repository.create(
             dto_instance.model_dump()
         )
-        return MODELS[model_name]["dto"].model_validate(new_record)
+        return get_read_dto(model_name).model_validate(new_record)
     except IntegrityError as e:
         logger.error(f"Integrity error during create: {e}")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Record already exists or constraint violated."
         )
+    except HasherSaturatedException:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later.",
+            headers={"Retry-After": "1"}
+        )
+    except PoolTimeoutError:
+        # Answered with 503 by the app's pool timeout handler
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Database error during create: {e}")
         raise HTTPException(
@@ -227,8 +344,7 @@ async def get_model(
             detail="Not found"
         )
 
-    dto = MODELS[model_name]["dto"]
-    return dto.model_validate(db_object)
+    return get_read_dto(model_name).model_validate(db_object)
 
 
 @admin_router.patch("/{model_name}/{id}")
@@ -238,19 +354,26 @@ async def update_model(
     request: Request,
     db_repository: BaseRepository = Depends(db_repository)
 ):
-    dto = await get_dto_instance(request, model_name)
+    dto = await get_dto_instance(request, model_name, "update_dto")
+    changes = dto.model_dump(exclude_unset=True)
     
     try:
+        if MODELS[model_name]["model"] is User and "role" in changes:
+            # Signed tokens carry the role until they expire
+            await AuthService(db_repository.session).revoke_user_sessions(id)
         result = await db_repository.update(
             id,
-            dto.model_dump(exclude_unset=True)
+            changes
         )
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Record not found"
             )
-        return MODELS[model_name]["dto"].model_validate(result)
+        if MODELS[model_name]["model"] is User:
+            # Cached identities carry the role; drop them on any change
+            await session_store.invalidate_user(id)
+        return get_read_dto(model_name).model_validate(result)
 
     except IntegrityError as e:
         logger.error(f"Integrity error during update: {e}")
@@ -258,6 +381,15 @@ async def update_model(
             status_code=status.HTTP_409_CONFLICT,
             detail="Record already exists or constraint violated."
         )
+    except HasherSaturatedException:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later.",
+            headers={"Retry-After": "1"}
+        )
+    except PoolTimeoutError:
+        # Answered with 503 by the app's pool timeout handler
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Database error during update: {e}")
         raise HTTPException(
@@ -273,13 +405,21 @@ async def delete_model(
     db_repository: BaseRepository = Depends(db_repository)
 ):
     try:
+        if MODELS[model_name]["model"] is User:
+            # Before the sessions go with the user
+            await AuthService(db_repository.session).revoke_user_sessions(id)
         deleted = await db_repository.delete(id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Record not found"
             )
+        if MODELS[model_name]["model"] is User:
+            await session_store.invalidate_user(id)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except PoolTimeoutError:
+        # Answered with 503 by the app's pool timeout handler
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Database error during delete: {e}")
         raise HTTPException(
@@ -2,11 +2,14 @@ from datetime import datetime, timezone
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status, Cookie, Header
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.database.models import AuthSession
 from src.core.custom_exceptions import InvalidCredentialsException
+from src.passwords import HasherSaturatedException
 from src.core.services import AuthService, UserService
-from src.core.dependencies import auth_dep, db_session_dep
+from src.core.dependencies import AUTH_COOKIE, auth_dep, db_session_dep
+from src.core.dependencies import current_full_identity
+from src.sessions import SessionIdentity
 from src.core import dtos
 import logging
 import os
@@ -33,7 +36,7 @@ async def login(
 ) -> JSONResponse:
     """Authenticate user and create session."""
     try:
-        auth_session: AuthSession = await auth_service.authenticate(
+        auth_session, token = await auth_service.authenticate(
             user_manager,
             user_agent=user_agent or "unknown",
             **login_data.model_dump()
@@ -48,8 +51,8 @@ async def login(
         app_domain = os.getenv("APP_DOMAIN", "localhost")
         
         response.set_cookie(
-            key="token",
-            value=auth_session.token,
+            key=AUTH_COOKIE,
+            value=token,
             max_age=max_age,
             domain=f".{app_domain}" if app_domain != "localhost" else None,
             httponly=True,
@@ -63,6 +66,12 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
+    except (HasherSaturatedException, PoolTimeoutError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"}
+        )
     except Exception:
         logger.exception("Unexpected error during login")
         raise HTTPException(
@@ -75,30 +84,15 @@ async def login(
 
 @auth_router.get("/me")
 async def get_me(
-    token: Annotated[str | None, Cookie()] = None,
-    auth_manager: AuthService = Depends(auth_dep)
+    session: SessionIdentity = Depends(current_full_identity)
 ) -> dtos.UserDto:
     """Get current authenticated user."""
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication token is missing"
-        )
-    
-    try:
-        session = await auth_manager.get_session(token)
-    except InvalidCredentialsException:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
     return dtos.UserDto.model_validate(session.user)
 
 
 @auth_router.post("/logout")
 async def logout(
-    token: Annotated[str | None, Cookie()] = None,
+    token: Annotated[str | None, Cookie(alias=AUTH_COOKIE)] = None,
     auth_manager: AuthService = Depends(auth_dep)
 ) -> JSONResponse:
     """Revoke user session and clear authentication cookie."""
@@ -115,6 +109,8 @@ async def logout(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Session doesn't exist"
         )
+    except PoolTimeoutError:
+        raise
     except Exception:
         logger.exception("Unexpected error during logout")
         raise HTTPException(
@@ -127,7 +123,7 @@ async def logout(
     # Delete cookie with matching parameters
     app_domain = os.getenv("APP_DOMAIN", "localhost")
     response.delete_cookie(
-        key="token",
+        key=AUTH_COOKIE,
         domain=f".{app_domain}" if app_domain != "localhost" else None,
         path="/"
     )
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core import dtos
+from src.core.dependencies import db_session_dep
+from src.core.routers.admin import authorize
+from src.database.models import BroadcastStatus, get_utc_now
+from src.database.repositories import BroadcastRepository, UserRepository
+from src.sessions import SessionIdentity
+from src.telegram_bot import broadcasts
+import logging
+
+logger = logging.getLogger(__name__)
+
+broadcast_router = APIRouter(
+    prefix="/api/v1/broadcasts",
+    tags=["broadcasts v1"],
+    dependencies=[Depends(authorize)],
+)
+
+
+def to_dto(broadcast) -> dtos.BroadcastDto:
+    dto = dtos.BroadcastDto.model_validate(broadcast)
+    dto.progress = broadcasts.progress(broadcast.id)
+    return dto
+
+
+@broadcast_router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def start_broadcast(
+    broadcast_data: dtos.BroadcastCreateDto,
+    identity: SessionIdentity = Depends(authorize),
+    session: AsyncSession = Depends(db_session_dep),
+) -> dtos.BroadcastDto:
+    """Queue `text` for every user with a Telegram id and start sending."""
+    values = {
+        "text": broadcast_data.text,
+        "created_by": identity.user.id,
+    }
+    if not broadcasts.running:
+        # Split deployment: left unclaimed for the bot worker's next poll
+        values["heartbeat_at"] = get_utc_now() - broadcasts.lease
+    try:
+        values["total"] = await UserRepository(session).count_recipients()
+        broadcast = await BroadcastRepository(session).create(values)
+    except PoolTimeoutError:
+        raise
+    except SQLAlchemyError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred."
+        )
+
+    if broadcasts.running:
+        broadcasts.launch(broadcast.id)
+    return to_dto(broadcast)
+
+
+@broadcast_router.get("/{id}")
+async def get_broadcast(
+    id: int,
+    session: AsyncSession = Depends(db_session_dep),
+) -> dtos.BroadcastDto:
+    broadcast = await BroadcastRepository(session).get_by_id(id)
+    if not broadcast:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not found"
+        )
+    return to_dto(broadcast)
+
+
+@broadcast_router.post("/{id}/cancel")
+async def cancel_broadcast(
+    id: int,
+    session: AsyncSession = Depends(db_session_dep),
+) -> dtos.BroadcastDto:
+    """Stop a running broadcast; other workers notice at their next
+    checkpoint."""
+    repository = BroadcastRepository(session)
+    broadcast = await repository.get_by_id(id)
+    if not broadcast:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not found"
+        )
+    if not await repository.finish(id, BroadcastStatus.CANCELLED):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Broadcast is not running."
+        )
+    broadcasts.cancel(id)
+    await session.refresh(broadcast)
+    return to_dto(broadcast)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+from src.core.routers.admin import authorize
+from src.passwords import password_hasher
+from src.sessions import session_reaper, session_store, session_revocations
+from src.database.config import engine
+from src.core.dependencies import auth_metrics, request_session_metrics
+from src.telegram_bot import broadcasts, dispatcher, outbox, registrar
+from src.telegram_bot import bot_lifecycle, bot_persistence, webhook_guard
+from src.telegram_bot import deduplicator
+import logging
+
+logger = logging.getLogger(__name__)
+
+metrics_router = APIRouter(
+    prefix="/api/v1/metrics",
+    tags=["metrics v1"],
+    dependencies=[Depends(authorize)],
+)
+
+
+@metrics_router.get("/")
+async def get_metrics() -> dict:
+    """Runtime metrics used to size pools and caches."""
+    return {
+        "password_hasher": password_hasher.metrics.snapshot(),
+        "session_store": session_store.snapshot(),
+        "db_pool": engine.pool.snapshot(),
+        "request_sessions": request_session_metrics.snapshot(),
+        "auth": auth_metrics.snapshot(),
+        "update_dispatcher": dispatcher.snapshot(),
+        "outbox": outbox.snapshot(),
+        "broadcasts": broadcasts.snapshot(),
+        "user_registration": registrar.snapshot(),
+        "bot_persistence": bot_persistence.snapshot(),
+        "bot_lifecycle": bot_lifecycle.snapshot(),
+        "webhook_guard": webhook_guard.snapshot(),
+        "update_dedup": deduplicator.snapshot(),
+        "session_reaper": session_reaper.snapshot(),
+        "session_revocations": session_revocations.snapshot(),
+    }
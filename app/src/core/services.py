@@ -1,10 +1,18 @@
 from src.database.repositories import UserRepository, AuthSessionRepository
-from src.database.models import User, AuthSession
+from src.database.models import User, UserRole, AuthSession
 from datetime import timedelta, timezone, datetime
+from typing import Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
 from .custom_exceptions import InvalidCredentialsException
+from src.passwords import password_hasher, HashedPassword
+from src.passwords import HasherSaturatedException
+from src.sessions import session_store, session_tokens, SessionIdentity, MISS
+from src.sessions import UserIdentity, SignedClaims, SESSION_TOKEN_MODE
+from src.sessions import SESSION_ACCEPT_SIGNED
+from src.sessions import signed_tokens, session_revocations
+from src.sessions import SESSION_EXPIRE_DELTA
 from . import dtos
-import bcrypt
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,35 +25,37 @@ class UserService:
         self.db_repository = UserRepository(session)
 
     @staticmethod
-    def hash_password(password: str | bytes) -> bytes:
-        """Hash password using bcrypt."""
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        return bcrypt.hashpw(password, bcrypt.gensalt())
-
-    def check_password(self, user: User, password: str | bytes) -> bool:
-        """Verify password against stored hash."""
+    async def hash_password(password: str | bytes) -> HashedPassword:
+        """Hash password using bcrypt in the hashing pool."""
+        return await password_hasher.hash(password)
+
+    async def check_password(self, user: User, password: str | bytes) -> bool:
+        """Verify password against stored hash in the hashing pool."""
         if not user.password:
             return False
 
-        # Encode password if it's a string
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-            
-        # Handle stored password (could be str or bytes)
-        db_password = user.password
-        if isinstance(db_password, str):
-            db_password = db_password.encode('utf-8')
+        return await password_hasher.verify(password, user.password)
 
-        return bcrypt.checkpw(password, db_password)
+    async def rehash_if_needed(self, user: User, password: str | bytes):
+        """Re-hash a verified password when the configured cost changed."""
+        if not user.password or not password_hasher.needs_rehash(user.password):
+            return
+
+        try:
+            await self.db_repository.update(
+                user.id, {"password": await self.hash_password(password)}
+            )
+        except (HasherSaturatedException, SQLAlchemyError):
+            # Best effort: the login itself already succeeded.
+            logger.warning(f"Could not rehash password of user {user.id}")
 
     async def create_user(self, new_user: dtos.UserCreateDto) -> dtos.UserDto:
         """Create new user with hashed password."""
         user_data = new_user.model_dump()
         
-        # Hash password before storing
+        # Hash once here; the repository stores `HashedPassword` as-is
         if "password" in user_data and user_data["password"]:
-            user_data["password"] = self.hash_password(user_data["password"])
+            user_data["password"] = await self.hash_password(user_data["password"])
             
         created_user = await self.db_repository.create(user_data)
         return dtos.UserDto.model_validate(created_user)
@@ -58,7 +68,7 @@ class UserService:
 class AuthService:
     """Service for authentication and session management."""
     
-    SESSION_EXPIRE_DELTA = timedelta(days=7)
+    SESSION_EXPIRE_DELTA = SESSION_EXPIRE_DELTA
 
     def __init__(self, session: AsyncSession):
         self.db_repository = AuthSessionRepository(session)
@@ -67,29 +77,94 @@ class AuthService:
         self,
         user_id: int,
         user_agent: str | None,
+        role: UserRole = UserRole.USER,
         expires_delta: timedelta = SESSION_EXPIRE_DELTA
-    ) -> AuthSession:
-        """Create new authentication session."""
+    ) -> Tuple[AuthSession, str]:
+        """Create new authentication session.
+
+        Returns the session and its cookie token; only the token's
+        digest is stored, so this is the one chance to read it.
+        """
+        token = session_tokens.new()
         new_session = await self.db_repository.create({
             "user_id": user_id,
+            "token_digest": session_tokens.digest(token),
             "user_agent": user_agent,
             "expires_at": datetime.now(timezone.utc) + expires_delta
         })
-        return new_session
+        if SESSION_TOKEN_MODE == "signed":
+            # Signed sessions are found by id; the opaque token above
+            # is never handed out
+            token = signed_tokens.encode(SignedClaims(
+                session_id=new_session.id,
+                user_id=user_id,
+                role=role,
+                expires_at=new_session.expires_at,
+            ))
+        return new_session, token
+
+    async def _find_session(self, token: str) -> Optional[AuthSession]:
+        claims = signed_tokens.decode(token) if SESSION_ACCEPT_SIGNED else None
+        if claims is not None:
+            return await self.db_repository.get_session(claims.session_id)
+        return await self.db_repository.get_session_by_digest(
+            session_tokens.digest(token)
+        )
 
     async def revoke_session(self, token: str):
         """Revoke authentication session by token."""
-        session = await self.db_repository.get_session_by_token(token)
+        session = await self._find_session(token)
         
         # Raise exception if session doesn't exist
         if not session:
             raise InvalidCredentialsException("Session doesn't exist")
             
-        await self.db_repository.update(session.id, {"is_active": False})
+        await self.db_repository.revoke(session)
+        session_revocations.add(session.id)
+        await session_store.invalidate_token(session_tokens.digest(token).hex())
 
-    async def get_session(self, token: str) -> AuthSession:
-        """Retrieve and validate authentication session."""
-        session = await self.db_repository.get_session_by_token(token)
+    async def revoke_user_sessions(self, user_id: int):
+        """Reject the signed tokens of a user whose role changed or who is
+        about to be deleted; opaque tokens are checked against the row."""
+        await self.db_repository.revoke_user_sessions(user_id)
+
+    async def _verify_signed(self, claims: SignedClaims) -> SessionIdentity:
+        if claims.expires_at < datetime.now(timezone.utc):
+            raise InvalidCredentialsException("Session expired")
+        if await session_revocations.is_revoked(claims.session_id):
+            raise InvalidCredentialsException("Invalid or inactive session")
+        return SessionIdentity(
+            id=claims.session_id,
+            user_id=claims.user_id,
+            is_active=True,
+            user=UserIdentity(id=claims.user_id, role=claims.role),
+            expires_at=claims.expires_at,
+        )
+
+    async def get_session(
+        self, token: str, stateless: bool = True
+    ) -> SessionIdentity:
+        """Retrieve and validate authentication session.
+
+        A signed token is verified without a lookup while the revocation
+        set is fresh; its identity then only carries the user's id and
+        role. Pass `stateless=False` when the full user is needed.
+        """
+        if stateless and SESSION_ACCEPT_SIGNED and session_revocations.fresh:
+            claims = signed_tokens.decode(token)
+            if claims is not None:
+                return await self._verify_signed(claims)
+
+        # Cached under the digest as well, never the cookie value
+        cache_key = session_tokens.digest(token).hex()
+        session = await session_store.get(cache_key)
+        if session is MISS:
+            generation = session_store.generation()
+            db_session = await self._find_session(token)
+            session = (
+                SessionIdentity.from_model(db_session) if db_session else None
+            )
+            await session_store.put(cache_key, session, generation)
         
         if not session or not session.is_active:
             raise InvalidCredentialsException("Invalid or inactive session")
@@ -105,15 +180,16 @@ class AuthService:
         user_agent: str,
         phone_number: str,
         password: str | bytes
-    ) -> AuthSession:
-        """Authenticate user with phone number and password."""
+    ) -> Tuple[AuthSession, str]:
+        """Authenticate user; returns the new session and its token."""
         user = await user_service.get_user(phone_number)
         
         if not user:
             raise InvalidCredentialsException("Username or password is incorrect")
 
-        if not user_service.check_password(user, password):
+        if not await user_service.check_password(user, password):
             raise InvalidCredentialsException("Username or password is incorrect")
 
-        session = await self.create_session(user.id, user_agent)
-        return session
\ No newline at end of file
+        await user_service.rehash_if_needed(user, password)
+
+        return await self.create_session(user.id, user_agent, role=user.role)
\ No newline at end of file
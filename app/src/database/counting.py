@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Tuple
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+import json
+import os
+import time
+
+ADMIN_COUNT_CACHE_TTL = float(os.getenv("ADMIN_COUNT_CACHE_TTL", 30))
+ADMIN_COUNT_CACHE_SIZE = int(os.getenv("ADMIN_COUNT_CACHE_SIZE", 1024))
+
+
+class CountStrategy(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+    cached = "cached"
+
+
+@dataclass
+class CountResult:
+    total: int
+    # The strategy that actually produced `total`, which may differ from
+    # the requested one after a fallback.
+    strategy: CountStrategy
+
+
+class CountCache:
+    """Exact counts keyed by table and normalized filter, with a short TTL."""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._tables: Dict[str, Dict[str, Tuple[float, int]]] = {}
+
+    @staticmethod
+    def make_key(
+        search: str | None,
+        search_fields: Dict[str, Any] | None,
+        exact_filter: Dict[str, Any] | None
+    ) -> str:
+        return json.dumps(
+            [
+                search or None,
+                sorted(search_fields or []) if search else [],
+                exact_filter or {},
+            ],
+            sort_keys=True,
+            default=str,
+        )
+
+    def get(self, table: str, key: str) -> int | None:
+        entry = self._tables.get(table, {}).get(key)
+        if entry is None:
+            return None
+        expires_at, total = entry
+        if expires_at <= time.monotonic():
+            del self._tables[table][key]
+            return None
+        return total
+
+    def put(self, table: str, key: str, total: int) -> None:
+        entries = self._tables.setdefault(table, {})
+        if len(entries) >= self.max_size:
+            entries.pop(next(iter(entries)))
+        entries[key] = (time.monotonic() + self.ttl, total)
+
+    def invalidate_table(self, table: str) -> None:
+        self._tables.pop(table, None)
+
+
+count_cache = CountCache(ttl=ADMIN_COUNT_CACHE_TTL, max_size=ADMIN_COUNT_CACHE_SIZE)
+
+
+async def exact_count(session: AsyncSession, query: Select) -> int:
+    count_query = select(func.count()).select_from(query.subquery())
+    total_count_result = await session.execute(count_query)
+    return total_count_result.scalar() or 0
+
+
+async def table_estimate(session: AsyncSession, table: str) -> int | None:
+    """Planner row estimate for a whole table from `pg_class.reltuples`.
+
+    Returns None when the table has never been analyzed.
+    """
+    result = await session.execute(
+        text(
+            "SELECT reltuples::bigint FROM pg_class "
+            "WHERE oid = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    )
+    estimate = result.scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a statement that keeps its bound
+    parameters. Rendering them with `literal_binds` instead fails for
+    bytea and lets `text()` mistake `:word` inside a string literal for
+    a parameter."""
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain)
+def compile_explain(element, compiler, **kw):
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+async def plan_estimate(session: AsyncSession, query: Select) -> int | None:
+    """Planner row estimate for a filtered query via `EXPLAIN`."""
+    result = await session.execute(Explain(query))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,59 @@
+"""session and role indexes
+
+Revision ID: a5d8e2f47c19
+Revises: e7a2c5f19b38
+Create Date: 2026-10-18 20:31:07.418356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d8e2f47c19'
+down_revision: Union[str, None] = 'e7a2c5f19b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Partitioned tables cannot be indexed concurrently; auth_sessions
+    # only holds live sessions since the previous revision
+    op.create_index(
+        'ix_auth_sessions_token_active',
+        'auth_sessions',
+        ['token'],
+        postgresql_where=sa.text('is_active IS true'),
+    )
+    op.drop_index('ix_auth_sessions_token', table_name='auth_sessions')
+    # Scanned by the ON DELETE CASCADE from users
+    op.create_index(
+        op.f('ix_auth_sessions_user_id'), 'auth_sessions', ['user_id']
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_role_id',
+            'users',
+            ['role', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_users_role_id',
+            table_name='users',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    op.drop_index(op.f('ix_auth_sessions_user_id'), table_name='auth_sessions')
+    op.create_index(
+        op.f('ix_auth_sessions_token'), 'auth_sessions', ['token']
+    )
+    op.drop_index('ix_auth_sessions_token_active', table_name='auth_sessions')
@@ -0,0 +1,79 @@
+"""session token digests
+
+Revision ID: b3e9d1c7a604
+Revises: a5d8e2f47c19
+Create Date: 2026-10-18 21:47:15.093821
+
+Replaces the UUID text tokens of auth_sessions with a 32 byte keyed
+digest (see src/sessions/tokens.py). Existing rows are converted with
+the same SESSION_TOKEN_KEY the API uses, so issued cookies keep
+working. Digests cannot be turned back into tokens: the downgrade
+deletes every session, logging everyone out.
+"""
+from typing import Sequence, Union
+import hashlib
+import hmac
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9d1c7a604'
+down_revision: Union[str, None] = 'a5d8e2f47c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    # Same key as src/sessions/__init__.py, which refuses these as well
+    key = os.getenv('SESSION_TOKEN_KEY', '')
+    if key in ('', 'change-me', 'insecure-session-token-key'):
+        raise RuntimeError('SESSION_TOKEN_KEY must be set to a random secret')
+    key = key.encode()
+    bind = op.get_bind()
+
+    op.add_column('auth_sessions', sa.Column('token_digest', sa.LargeBinary(length=32), nullable=True))
+
+    rows = bind.execute(sa.text(
+        'SELECT id, created_at, token FROM auth_sessions'
+    )).all()
+    update = sa.text(
+        'UPDATE auth_sessions SET token_digest = :digest '
+        'WHERE id = :id AND created_at = :created_at'
+    )
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(update, [
+            {
+                'id': row.id,
+                'created_at': row.created_at,
+                'digest': hmac.new(key, row.token.encode(), hashlib.sha256).digest(),
+            }
+            for row in rows[start:start + BATCH_SIZE]
+        ])
+
+    op.alter_column('auth_sessions', 'token_digest', nullable=False)
+    op.create_index(
+        'ix_auth_sessions_token_digest_active',
+        'auth_sessions',
+        ['token_digest'],
+        postgresql_where=sa.text('is_active IS true'),
+    )
+    op.drop_index('ix_auth_sessions_token_active', table_name='auth_sessions')
+    op.drop_column('auth_sessions', 'token')
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM auth_sessions')
+    op.add_column('auth_sessions', sa.Column('token', sa.String(length=36), nullable=False))
+    op.create_index(
+        'ix_auth_sessions_token_active',
+        'auth_sessions',
+        ['token'],
+        postgresql_where=sa.text('is_active IS true'),
+    )
+    op.drop_index('ix_auth_sessions_token_digest_active', table_name='auth_sessions')
+    op.drop_column('auth_sessions', 'token_digest')
@@ -0,0 +1,62 @@
+"""admin search indexes
+
+Revision ID: b7d3e9a1c4f2
+Revises: f25287e45f43
+Create Date: 2026-10-18 10:12:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9a1c4f2'
+down_revision: Union[str, None] = 'f25287e45f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ['telegram_username', 'first_name', 'last_name']
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Built concurrently so a large users table stays writable
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_phone_number_prefix',
+            'users',
+            ['phone_number'],
+            postgresql_ops={'phone_number': 'varchar_pattern_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(
+                f'ix_users_{column}_trgm',
+                'users',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in reversed(TRIGRAM_COLUMNS):
+            op.drop_index(
+                f'ix_users_{column}_trgm',
+                table_name='users',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+        op.drop_index(
+            'ix_users_phone_number_prefix',
+            table_name='users',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,50 @@
+"""broadcasts
+
+Revision ID: c4a8f2d6e913
+Revises: b7d3e9a1c4f2
+Create Date: 2026-10-18 16:02:17.530948
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8f2d6e913'
+down_revision: Union[str, None] = 'b7d3e9a1c4f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcasts',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('text', sa.String(length=4096), nullable=False),
+    sa.Column('status', sa.Enum('RUNNING', 'COMPLETED', 'CANCELLED', 'FAILED', name='broadcaststatus'), nullable=False),
+    sa.Column('created_by', sa.BigInteger(), nullable=True),
+    sa.Column('last_user_id', sa.BigInteger(), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False),
+    sa.Column('sent', sa.BigInteger(), nullable=False),
+    sa.Column('failed', sa.BigInteger(), nullable=False),
+    sa.Column('blocked', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Resuming looks up running broadcasts only
+    op.create_index(
+        'ix_broadcasts_running',
+        'broadcasts',
+        ['heartbeat_at'],
+        postgresql_where=sa.text("status = 'RUNNING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_broadcasts_running', table_name='broadcasts')
+    op.drop_table('broadcasts')
+    sa.Enum(name='broadcaststatus').drop(op.get_bind(), checkfirst=True)
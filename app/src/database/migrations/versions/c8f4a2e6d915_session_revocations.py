@@ -0,0 +1,35 @@
+"""session revocations
+
+Revision ID: c8f4a2e6d915
+Revises: b3e9d1c7a604
+Create Date: 2026-10-18 23:05:52.671340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f4a2e6d915'
+down_revision: Union[str, None] = 'b3e9d1c7a604'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('session_revocations',
+    sa.Column('session_id', sa.BigInteger(), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index(op.f('ix_session_revocations_revoked_at'), 'session_revocations', ['revoked_at'], unique=False)
+    op.create_index(op.f('ix_session_revocations_expires_at'), 'session_revocations', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_session_revocations_expires_at'), table_name='session_revocations')
+    op.drop_index(op.f('ix_session_revocations_revoked_at'), table_name='session_revocations')
+    op.drop_table('session_revocations')
@@ -0,0 +1,34 @@
+"""bot state
+
+Revision ID: d91b5e7f3a20
+Revises: c4a8f2d6e913
+Create Date: 2026-10-18 16:48:05.118364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91b5e7f3a20'
+down_revision: Union[str, None] = 'c4a8f2d6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('bot_state',
+    sa.Column('kind', sa.Enum('USER', 'CHAT', 'BOT', 'CONVERSATION', name='botstatekind'), nullable=False),
+    sa.Column('key', sa.String(length=128), nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('bot_state')
+    sa.Enum(name='botstatekind').drop(op.get_bind(), checkfirst=True)
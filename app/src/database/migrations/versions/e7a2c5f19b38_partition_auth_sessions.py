@@ -0,0 +1,117 @@
+"""partition auth_sessions
+
+Revision ID: e7a2c5f19b38
+Revises: d91b5e7f3a20
+Create Date: 2026-10-18 19:12:40.551207
+
+Rebuilds auth_sessions as a table range partitioned by month of
+created_at, so whole months of dead sessions can be dropped at once
+(see SessionReaper). The primary key becomes (id, created_at), since
+every unique constraint has to contain the partition key, and the ids
+keep coming from the old sequence. The table also gets the token
+column, which the ORM model has always had. Only live sessions are
+carried over, and only when the old table already had a token column.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c5f19b38'
+down_revision: Union[str, None] = 'd91b5e7f3a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start: datetime) -> datetime:
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {c['name'] for c in sa.inspect(bind).get_columns('auth_sessions')}
+
+    op.rename_table('auth_sessions', 'auth_sessions_old')
+    op.execute('ALTER INDEX auth_sessions_pkey RENAME TO auth_sessions_old_pkey')
+    op.execute('ALTER SEQUENCE auth_sessions_id_seq OWNED BY NONE')
+
+    op.create_table('auth_sessions',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('auth_sessions_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('token', sa.String(length=36), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('user_agent', sa.String(length=256), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'created_at', name='auth_sessions_pkey'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index(op.f('ix_auth_sessions_token'), 'auth_sessions', ['token'], unique=False)
+    op.create_index(op.f('ix_auth_sessions_expires_at'), 'auth_sessions', ['expires_at'], unique=False)
+
+    oldest = bind.execute(sa.text(
+        'SELECT min(created_at) FROM auth_sessions_old '
+        'WHERE is_active AND (expires_at IS NULL OR expires_at > now())'
+    )).scalar()
+    now = datetime.now(timezone.utc)
+    start = month_start(min(oldest, now) if oldest else now)
+    last = month_start(now)
+    for _ in range(MONTHS_AHEAD):
+        last = next_month(last)
+    while start <= last:
+        end = next_month(start)
+        op.execute(
+            f"CREATE TABLE auth_sessions_p{start:%Y%m} PARTITION OF auth_sessions "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    # Catches rows outside the monthly partitions if the reaper falls behind
+    op.execute('CREATE TABLE auth_sessions_default PARTITION OF auth_sessions DEFAULT')
+
+    if 'token' in columns:
+        op.execute(
+            'INSERT INTO auth_sessions '
+            '(id, user_id, token, is_active, user_agent, created_at, expires_at) '
+            'SELECT id, user_id, token, is_active, user_agent, created_at, expires_at '
+            'FROM auth_sessions_old '
+            'WHERE is_active AND token IS NOT NULL '
+            'AND (expires_at IS NULL OR expires_at > now())'
+        )
+    op.drop_table('auth_sessions_old')
+    op.execute('ALTER SEQUENCE auth_sessions_id_seq OWNED BY auth_sessions.id')
+
+
+def downgrade() -> None:
+    op.rename_table('auth_sessions', 'auth_sessions_partitioned')
+    op.execute('ALTER INDEX auth_sessions_pkey RENAME TO auth_sessions_partitioned_pkey')
+    op.execute('ALTER SEQUENCE auth_sessions_id_seq OWNED BY NONE')
+
+    op.create_table('auth_sessions',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('auth_sessions_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('user_agent', sa.String(length=256), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name='auth_sessions_pkey')
+    )
+    op.execute(
+        'INSERT INTO auth_sessions '
+        '(id, user_id, is_active, user_agent, created_at, expires_at) '
+        'SELECT id, user_id, is_active, user_agent, created_at, expires_at '
+        'FROM auth_sessions_partitioned'
+    )
+    # Drops every partition with it
+    op.drop_table('auth_sessions_partitioned')
+    op.execute('ALTER SEQUENCE auth_sessions_id_seq OWNED BY auth_sessions.id')
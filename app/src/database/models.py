@@ -1,13 +1,13 @@
-from typing import List, TypeVar, Generic
+from typing import Any, List, TypeVar, Generic
 from sqlalchemy.orm import DeclarativeBase
 from enum import Enum
 from sqlalchemy import Enum as AlchemyEnum
-from sqlalchemy import String, BigInteger, DateTime, LargeBinary, Boolean
-from sqlalchemy import ForeignKey
+from sqlalchemy import String, BigInteger, DateTime, LargeBinary, Boolean, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import ForeignKey, Index, func, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, timezone
-import uuid
 
 MappedIdType = TypeVar('MappedIdType')
 
@@ -36,6 +36,35 @@ class AbstractBase(BaseModel, Generic[MappedIdType]):
 
 class User(AbstractBase[int]):
     __tablename__ = "users"
+    __table_args__ = (
+        # Indexes behind the admin search fields, see `MODELS` in
+        # src/core/routers/admin.py
+        Index(
+            "ix_users_phone_number_prefix",
+            "phone_number",
+            postgresql_ops={"phone_number": "varchar_pattern_ops"},
+        ),
+        Index(
+            "ix_users_telegram_username_trgm",
+            "telegram_username",
+            postgresql_using="gin",
+            postgresql_ops={"telegram_username": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_first_name_trgm",
+            "first_name",
+            postgresql_using="gin",
+            postgresql_ops={"first_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_last_name_trgm",
+            "last_name",
+            postgresql_using="gin",
+            postgresql_ops={"last_name": "gin_trgm_ops"},
+        ),
+        # Role filters and counts in the admin listing, keyset ordered by id
+        Index("ix_users_role_id", "role", "id"),
+    )
 
     id: Mapped[int] = mapped_column(
         BigInteger,
@@ -95,23 +124,36 @@ class User(AbstractBase[int]):
 
 
 class AuthSession(AbstractBase[int]):
+    """Login session; the table is range partitioned by month of
+    `created_at` (primary key `(id, created_at)` in the database)."""
     __tablename__ = "auth_sessions"
+    __table_args__ = (
+        # Only active sessions are ever looked up by token; the predicate
+        # is spelled like the lookups' so the planner can prove it. Unique
+        # indexes must include the partition key, so this one is not.
+        Index(
+            "ix_auth_sessions_token_digest_active",
+            "token_digest",
+            postgresql_where=text("is_active IS true"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[int] = mapped_column(
         BigInteger,
         primary_key=True
     )
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE")
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True
     )
     user: Mapped["User"] = relationship(
         back_populates="sessions",
         passive_deletes=True
     )
-    token: Mapped[str] = mapped_column(
-        String(36),
-        unique=True,
-        default=lambda: str(uuid.uuid4())
+    # Keyed digest of the cookie token, see src/sessions/tokens.py
+    token_digest: Mapped[bytes] = mapped_column(
+        LargeBinary(32)
     )
     is_active: Mapped[bool] = mapped_column(
         Boolean,
@@ -123,12 +165,160 @@ class AuthSession(AbstractBase[int]):
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=get_utc_now
+        default=get_utc_now,
+        server_default=func.now()
     )
     expires_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        nullable=True
+        nullable=True,
+        index=True
     )
 
     def __repr__(self) -> str:
         return f"AuthSession(id={self.id}, user_id={self.user_id})"
+
+
+class BroadcastStatus(str, Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class Broadcast(AbstractBase[int]):
+    __tablename__ = "broadcasts"
+    __table_args__ = (
+        # Resuming looks up running broadcasts only
+        Index(
+            "ix_broadcasts_running",
+            "heartbeat_at",
+            postgresql_where=text("status = 'RUNNING'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True
+    )
+    text: Mapped[str] = mapped_column(
+        String(4096),
+        nullable=False
+    )
+    status: Mapped[BroadcastStatus] = mapped_column(
+        AlchemyEnum(BroadcastStatus),
+        default=BroadcastStatus.RUNNING,
+        nullable=False
+    )
+    created_by: Mapped[int | None] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True
+    )
+    # Checkpoint: every recipient with users.id <= last_user_id is done
+    last_user_id: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False
+    )
+    total: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False
+    )
+    sent: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False
+    )
+    failed: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False
+    )
+    blocked: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=get_utc_now,
+        nullable=False
+    )
+    # Renewed on every checkpoint; a stale one means the worker is gone
+    heartbeat_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=get_utc_now,
+        nullable=False
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
+    def __repr__(self) -> str:
+        return f"Broadcast(id={self.id}, status={self.status})"
+
+
+class BotStateKind(str, Enum):
+    USER = "user"
+    CHAT = "chat"
+    BOT = "bot"
+    CONVERSATION = "conversation"
+
+
+class BotState(BaseModel):
+    """One `user_data`/`chat_data`/`bot_data` entry or conversation table
+    of the bot, see `src/telegram_bot/persistence.py`."""
+    __tablename__ = "bot_state"
+
+    kind: Mapped[BotStateKind] = mapped_column(
+        AlchemyEnum(BotStateKind),
+        primary_key=True
+    )
+    # User or chat id, conversation name, or "" for bot_data
+    key: Mapped[str] = mapped_column(
+        String(128),
+        primary_key=True
+    )
+    data: Mapped[Any] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"),
+        nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=get_utc_now,
+        onupdate=get_utc_now,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"BotState(kind={self.kind}, key={self.key})"
+
+
+class SessionRevocation(BaseModel):
+    """Revoked session id, kept until the session would have expired.
+
+    Outlives its `auth_sessions` row (reaped, or deleted with the user)
+    so signed tokens of the session stay rejected, see
+    `src/sessions/revocation.py`.
+    """
+    __tablename__ = "session_revocations"
+
+    session_id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True
+    )
+    revoked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=get_utc_now,
+        nullable=False,
+        index=True
+    )
+    expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"SessionRevocation(session_id={self.session_id})"
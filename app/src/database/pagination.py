@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Generic, List, Optional, TypeVar
+from sqlalchemy import JSON, Column, LargeBinary, and_, literal, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+import base64
+import binascii
+import json
+
+T = TypeVar('T')
+
+# A cursor cannot carry values of these types, and they have no useful order
+UNSORTABLE_TYPES = (LargeBinary, JSON)
+
+
+@dataclass
+class KeysetPage(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+@dataclass
+class KeysetCursor:
+    """Position of a row in a `(sort_key, id)` ordering.
+
+    Encoded as URL-safe base64 JSON; clients should treat it as opaque.
+    """
+    sort_key: str
+    descending: bool
+    value: Any
+    id: int
+    backwards: bool = False
+
+    def encode(self) -> str:
+        value = self.value
+        if isinstance(value, Enum):
+            # By name, which is what SQLAlchemy's Enum type stores
+            value = value.name
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps(
+            [self.sort_key, self.descending, value, self.id, self.backwards],
+            separators=(",", ":")
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "KeysetCursor":
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            sort_key, descending, value, id, backwards = json.loads(
+                base64.urlsafe_b64decode(padded)
+            )
+        except (binascii.Error, ValueError, TypeError):
+            raise ValueError("Malformed pagination cursor.")
+        if not isinstance(sort_key, str) or not isinstance(id, int):
+            raise ValueError("Malformed pagination cursor.")
+        return cls(sort_key, bool(descending), value, id, bool(backwards))
+
+
+def restore_sort_value(column: Column, value: Any) -> Any:
+    """Turn a JSON-decoded cursor value back into the column's type."""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if issubclass(python_type, datetime):
+            return datetime.fromisoformat(value)
+        if issubclass(python_type, Enum):
+            return python_type[value]
+    except (TypeError, ValueError, KeyError):
+        raise ValueError("Malformed pagination cursor.")
+    return value
+
+
+def keyset_condition(
+    sort_col: Any,
+    id_col: Any,
+    value: Any,
+    last_id: int,
+    descending: bool,
+    nullable: bool,
+) -> ColumnElement[bool]:
+    """Rows strictly after `(value, last_id)` in the given order.
+
+    Matches PostgreSQL's default NULL placement: last when ascending,
+    first when descending.
+    """
+    if sort_col is id_col:
+        return id_col < last_id if descending else id_col > last_id
+
+    if not nullable:
+        # Row-value comparison lets Postgres seek a (col, id) index. The
+        # tuple does not type its elements, so bind the value with the
+        # column's type (an Enum member must become its stored name)
+        bound = literal(value, sort_col.type)
+        if descending:
+            return tuple_(sort_col, id_col) < tuple_(bound, last_id)
+        return tuple_(sort_col, id_col) > tuple_(bound, last_id)
+
+    if descending:
+        if value is None:
+            return or_(
+                and_(sort_col.is_(None), id_col < last_id),
+                sort_col.is_not(None),
+            )
+        return or_(
+            sort_col < value,
+            and_(sort_col == value, id_col < last_id),
+        )
+
+    if value is None:
+        return and_(sort_col.is_(None), id_col > last_id)
+    return or_(
+        sort_col > value,
+        and_(sort_col == value, id_col > last_id),
+        sort_col.is_(None),
+    )
@@ -0,0 +1,101 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import time
+
+# Upper bounds, in seconds, of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    checkins: int = 0
+    connects: int = 0
+    invalidations: int = 0
+    connect_errors: int = 0
+    checkout_timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    # One counter per WAIT_BUCKETS entry plus a final +Inf bucket
+    wait_histogram: List[int] = field(
+        default_factory=lambda: [0] * (len(WAIT_BUCKETS) + 1)
+    )
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self.wait_histogram[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool` that times how long checkouts wait."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        # `recreate()` passes the old dispatcher along with its listeners
+        if "_dispatch" not in kwargs:
+            event.listen(self, "invalidate", self._on_invalidate)
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.checkout_timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - started)
+        self.metrics.checkouts += 1
+        return record
+
+    def _do_return_conn(self, record) -> None:
+        self.metrics.checkins += 1
+        super()._do_return_conn(record)
+
+    def _create_connection(self):
+        try:
+            record = super()._create_connection()
+        except Exception:
+            self.metrics.connect_errors += 1
+            raise
+        self.metrics.connects += 1
+        return record
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.metrics.invalidations += 1
+
+    def snapshot(self) -> dict:
+        metrics = self.metrics
+        observed = sum(metrics.wait_histogram) or 1
+        buckets = {str(bound): 0 for bound in WAIT_BUCKETS}
+        buckets["+Inf"] = 0
+        running = 0
+        # Cumulative buckets, Prometheus style
+        for key, count in zip(buckets, metrics.wait_histogram):
+            running += count
+            buckets[key] = running
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "checkouts": metrics.checkouts,
+            "checkins": metrics.checkins,
+            "connects": metrics.connects,
+            "invalidations": metrics.invalidations,
+            "connect_errors": metrics.connect_errors,
+            "checkout_timeouts": metrics.checkout_timeouts,
+            "wait_seconds_avg": metrics.wait_seconds_total / observed,
+            "wait_seconds_max": metrics.wait_seconds_max,
+            "wait_seconds_buckets": buckets,
+        }
@@ -1,11 +1,24 @@
 from typing import Tuple, TypeVar, Generic, Type, Optional, List, Dict, Any
-from .models import AbstractBase, User, AuthSession, get_utc_now
-from sqlalchemy import select, delete, and_, cast, String, func, insert, or_
-from sqlalchemy.orm import joinedload
+from .models import AbstractBase, User, UserRole, AuthSession, get_utc_now
+from .models import Broadcast, BroadcastStatus, BotState, BotStateKind
+from .models import SessionRevocation
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select, delete, insert, update, tuple_
+from sqlalchemy import or_, text
+from sqlalchemy import Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.passwords import password_hasher, looks_hashed
+from .pagination import KeysetCursor, KeysetPage, UNSORTABLE_TYPES
+from .pagination import keyset_condition, restore_sort_value
+from .counting import CountStrategy, CountResult, count_cache
+from .counting import exact_count, plan_estimate, table_estimate
+from .search import SearchMode, build_search
+from .statements import USER_BY_PHONE, SESSION_BY_ID, SESSION_BY_DIGEST
+from .statements import RECIPIENTS_AFTER
 import logging
-import bcrypt
+import copy
 
 T = TypeVar('T', bound=AbstractBase)
 
@@ -27,6 +40,63 @@ class BaseRepository(Generic[T]):
         result = all_data.scalars().all()
         return list(result)
 
+    def _filtered_query(
+        self,
+        search: Optional[str] = None,
+        search_fields: Optional[Dict[str, SearchMode]] = None,
+        exact_filter: Optional[Dict[str, Any]] = None
+    ) -> Select:
+        query = select(self.model)
+
+        if exact_filter:
+            for field, value in exact_filter.items():
+                col = getattr(self.model, field, None)
+                if col is not None:
+                    query = query.where(col == value)
+
+        # Without searchable fields a term matches nothing, not everything
+        if search:
+            query = query.where(
+                build_search(self.model, search_fields or {}, search)
+            )
+
+        return query
+
+    def with_session(self, session: AsyncSession) -> "BaseRepository[T]":
+        """Same repository bound to another session (and connection)."""
+        clone = copy.copy(self)
+        clone.session = session
+        return clone
+
+    async def count(
+        self,
+        search: Optional[str] = None,
+        search_fields: Optional[Dict[str, SearchMode]] = None,
+        exact_filter: Optional[Dict[str, Any]] = None,
+        strategy: CountStrategy = CountStrategy.exact
+    ) -> CountResult:
+        query = self._filtered_query(search, search_fields, exact_filter)
+        table = self.model.__tablename__
+
+        if strategy == CountStrategy.estimated:
+            if search or exact_filter:
+                estimate = await plan_estimate(self.session, query)
+            else:
+                estimate = await table_estimate(self.session, table)
+            if estimate is not None:
+                return CountResult(estimate, CountStrategy.estimated)
+
+        elif strategy == CountStrategy.cached:
+            key = count_cache.make_key(search, search_fields, exact_filter)
+            total = count_cache.get(table, key)
+            if total is None:
+                total = await exact_count(self.session, query)
+                count_cache.put(table, key, total)
+            return CountResult(total, CountStrategy.cached)
+
+        total = await exact_count(self.session, query)
+        return CountResult(total, CountStrategy.exact)
+
     async def get_paginated(
         self,
         page: int,
@@ -34,33 +104,20 @@ class BaseRepository(Generic[T]):
         sortby: Optional[str] = None,
         direction: Optional[str] = None,
         search: Optional[str] = None,
-        search_fields: list[str] | None = None,
-        exact_filter: Optional[Dict[str, Any]] = None
-    ) -> Tuple[List[T], int]:
+        search_fields: Optional[Dict[str, SearchMode]] = None,
+        exact_filter: Optional[Dict[str, Any]] = None,
+        count_strategy: Optional[CountStrategy] = CountStrategy.exact
+    ) -> Tuple[List[T], Optional[CountResult]]:
+        """Offset pagination; pass `count_strategy=None` to skip counting."""
         offset = (page - 1) * page_size
         try:
-            query = select(self.model)
-
-            if exact_filter:
-                for field, value in exact_filter.items():
-                    col = getattr(self.model, field, None)
-                    if col is not None:
-                        query = query.where(col == value)
-
-            if search and search_fields:
-                conditions = []
-                for field in search_fields:
-                    col = getattr(self.model, field, None)
-                    if col is not None:
-                        conditions.append(
-                            cast(col, String).ilike(f"%{search}%")
-                        )
-                if conditions:
-                    query = query.where(or_(*conditions))
-
-            count_query = select(func.count()).select_from(query.subquery())
-            total_count_result = await self.session.execute(count_query)
-            total_count = total_count_result.scalar() or 0
+            query = self._filtered_query(search, search_fields, exact_filter)
+
+            total_count = None
+            if count_strategy is not None:
+                total_count = await self.count(
+                    search, search_fields, exact_filter, count_strategy
+                )
 
             if sortby:
                 col = getattr(self.model, sortby, None)
@@ -82,11 +139,94 @@ class BaseRepository(Generic[T]):
             )
             raise e
 
+    async def get_keyset_page(
+        self,
+        page_size: int,
+        cursor: Optional[str] = None,
+        sortby: Optional[str] = None,
+        direction: Optional[str] = None,
+        search: Optional[str] = None,
+        search_fields: Optional[Dict[str, SearchMode]] = None,
+        exact_filter: Optional[Dict[str, Any]] = None
+    ) -> KeysetPage[T]:
+        """Cursor pagination on `(sortby, id)`.
+
+        Each page seeks from the last row of the previous one, so page N
+        costs the same index range scan as page 1. Raises `ValueError`
+        for a cursor that is malformed or was issued for another sort.
+        """
+        table_columns = self.model.__table__.c
+        sort_key = sortby if sortby in table_columns else "id"
+        if isinstance(table_columns[sort_key].type, UNSORTABLE_TYPES):
+            raise ValueError(f"The field is not sortable: {sort_key}.")
+        descending = bool(direction and direction.lower() == "desc")
+        sort_col = getattr(self.model, sort_key)
+        id_col = self.model.id
+
+        query = self._filtered_query(search, search_fields, exact_filter)
+
+        backwards = False
+        if cursor:
+            position = KeysetCursor.decode(cursor)
+            if position.sort_key != sort_key or position.descending != descending:
+                raise ValueError("Cursor does not match the requested sort.")
+            backwards = position.backwards
+            value = restore_sort_value(table_columns[sort_key], position.value)
+            query = query.where(keyset_condition(
+                sort_col,
+                id_col,
+                value,
+                position.id,
+                descending=descending != backwards,
+                nullable=table_columns[sort_key].nullable,
+            ))
+
+        # Walking backwards reads the previous page in reverse order
+        seek_desc = descending != backwards
+        order = (sort_col.desc(), id_col.desc()) if seek_desc \
+            else (sort_col.asc(), id_col.asc())
+        if sort_key == "id":
+            order = order[1:]
+        query = query.order_by(*order).limit(page_size + 1)
+
+        try:
+            result = await self.session.execute(query)
+        except SQLAlchemyError as e:
+            self.logger.exception(
+                "Database error occurred during object retrieval"
+            )
+            raise e
+
+        rows = list(result.scalars().all())
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+            has_next, has_prev = bool(cursor), has_more
+        else:
+            has_next, has_prev = has_more, bool(cursor)
+
+        def _cursor_for(obj: T, towards_start: bool) -> str:
+            return KeysetCursor(
+                sort_key=sort_key,
+                descending=descending,
+                value=getattr(obj, sort_key),
+                id=obj.id,
+                backwards=towards_start,
+            ).encode()
+
+        return KeysetPage(
+            items=rows,
+            next_cursor=_cursor_for(rows[-1], False) if rows and has_next else None,
+            prev_cursor=_cursor_for(rows[0], True) if rows and has_prev else None,
+        )
+
     async def create(self, obj_in: dict) -> T:
         obj = self.model(**obj_in)
         self.session.add(obj)
         try:
             await self.session.commit()
+            count_cache.invalidate_table(self.model.__tablename__)
         except SQLAlchemyError as e:
             self.logger.exception(
                 "Database error occurred during object creation."
@@ -111,6 +251,7 @@ class BaseRepository(Generic[T]):
 
         try:
             await self.session.commit()
+            count_cache.invalidate_table(self.model.__tablename__)
         except SQLAlchemyError as e:
             self.logger.exception(
                 "Database error occurred during updating object."
@@ -130,6 +271,7 @@ class BaseRepository(Generic[T]):
         try:
             await self.session.delete(obj)
             await self.session.commit()
+            count_cache.invalidate_table(self.model.__tablename__)
         except SQLAlchemyError as e:
             self.logger.exception(
                 "Database error occurred during object deletion."
@@ -146,6 +288,7 @@ class BaseRepository(Generic[T]):
                 delete(self.model).where(self.model.id.in_(list_ids))
             )
             await self.session.commit()
+            count_cache.invalidate_table(self.model.__tablename__)
         except SQLAlchemyError as e:
             self.logger.exception(
                 "Database error occurred during bulk object deletion."
@@ -158,6 +301,7 @@ class BaseRepository(Generic[T]):
             stmt = insert(self.model).values(objects)
             await self.session.execute(stmt)
             await self.session.commit()
+            count_cache.invalidate_table(self.model.__tablename__)
         except SQLAlchemyError as e:
             self.logger.exception(
                 "Database error occurred during bulk object creation."
@@ -172,40 +316,176 @@ class UserRepository(BaseRepository[User]):
 
     async def get_by_phone(self, phone_number: str) -> Optional[User]:
         user = await self.session.execute(
-            select(User).filter(User.phone_number == phone_number)
+            USER_BY_PHONE, {"phone_number": phone_number}
         )
         return user.scalar()
 
-    async def create(self, obj_in: dict) -> User:
-        # Hash password if present
+    @staticmethod
+    async def _hash_password_field(obj_in: dict) -> dict:
+        # Plaintext is hashed here exactly once; `HashedPassword` values
+        # were hashed upstream and are stored as-is.
         if obj_in.get("password"):
-            password = obj_in["password"]
-            # Encode to bytes if it's a string
-            if isinstance(password, str):
-                password = password.encode('utf-8')
-            obj_in["password"] = bcrypt.hashpw(password, bcrypt.gensalt())
-        return await super().create(obj_in)
+            obj_in = {
+                **obj_in,
+                "password": bytes(
+                    await password_hasher.ensure_hashed(obj_in["password"])
+                )
+            }
+        return obj_in
+
+    async def create(self, obj_in: dict) -> User:
+        return await super().create(await self._hash_password_field(obj_in))
 
     async def update(self, id: int, obj_in: dict) -> Optional[User]:
-        # Hash password if present and different from current
-        if obj_in.get("password"):
-            user = await self.get_by_id(id)
-            if user:
-                new_password = obj_in["password"]
-                # Encode new password to bytes if it's a string
-                if isinstance(new_password, str):
-                    new_password = new_password.encode('utf-8')
-                
-                # Get current password as bytes
-                current_password = user.password
-                if isinstance(current_password, str):
-                    current_password = current_password.encode('utf-8')
-                
-                # Only hash if password is different
-                if current_password != new_password:
-                    obj_in["password"] = bcrypt.hashpw(new_password, bcrypt.gensalt())
-        
-        return await super().update(id, obj_in)
+        if looks_hashed(obj_in.get("password")):
+            # A stored hash sent back unchanged; hashing it again would
+            # lock the user out
+            obj_in = {k: v for k, v in obj_in.items() if k != "password"}
+        return await super().update(
+            id, await self._hash_password_field(obj_in)
+        )
+
+    async def bulk_add(self, objects: List[dict]) -> None:
+        passwords = await password_hasher.hash_many(
+            obj.get("password") for obj in objects
+        )
+        objects = [
+            {**obj, "password": bytes(password)} if password else obj
+            for obj, password in zip(objects, passwords)
+        ]
+        await super().bulk_add(objects)
+
+    async def get_recipients_after(
+        self, after_id: int, batch_size: int
+    ) -> List[Tuple[int, int]]:
+        """`(id, telegram_id)` of the next users that can be messaged."""
+        result = await self.session.execute(
+            RECIPIENTS_AFTER, {"after_id": after_id, "batch_size": batch_size}
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def upsert_telegram_profiles(self, profiles: List[dict]) -> None:
+        """Insert or refresh users by `telegram_id` in one statement.
+
+        Each profile holds `telegram_id`, `telegram_username`,
+        `first_name` and `last_name`; rows whose stored profile already
+        matches are left untouched.
+        """
+        if not profiles:
+            return
+        now = get_utc_now()
+        stmt = pg_insert(User).values([
+            {**profile, "role": UserRole.USER, "created_at": now, "updated_at": now}
+            for profile in profiles
+        ])
+        profile_columns = (User.telegram_username, User.first_name, User.last_name)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={
+                "telegram_username": stmt.excluded.telegram_username,
+                "first_name": stmt.excluded.first_name,
+                "last_name": stmt.excluded.last_name,
+                "updated_at": now,
+            },
+            where=tuple_(*profile_columns).is_distinct_from(tuple_(
+                stmt.excluded.telegram_username,
+                stmt.excluded.first_name,
+                stmt.excluded.last_name,
+            )),
+        )
+        try:
+            await self.session.execute(stmt)
+            await self.session.commit()
+        except SQLAlchemyError as e:
+            self.logger.exception(
+                "Database error occurred during profile upsert."
+            )
+            await self.session.rollback()
+            raise e
+        count_cache.invalidate_table(User.__tablename__)
+
+    async def count_recipients(self) -> int:
+        result = await self.session.execute(
+            select(func.count()).where(User.telegram_id.is_not(None))
+        )
+        return result.scalar_one()
+
+
+class BroadcastRepository(BaseRepository[Broadcast]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, model=Broadcast)
+
+    async def get_resumable(self, lease: timedelta) -> List[int]:
+        """Running broadcasts whose worker stopped renewing its lease."""
+        result = await self.session.execute(
+            select(Broadcast.id).where(
+                Broadcast.status == BroadcastStatus.RUNNING,
+                Broadcast.heartbeat_at < get_utc_now() - lease,
+            )
+        )
+        return list(result.scalars().all())
+
+    async def claim(self, id: int, lease: timedelta) -> bool:
+        """Take over a running broadcast unless another worker holds it."""
+        now = get_utc_now()
+        result = await self.session.execute(
+            update(Broadcast)
+            .where(
+                Broadcast.id == id,
+                Broadcast.status == BroadcastStatus.RUNNING,
+                Broadcast.heartbeat_at < now - lease,
+            )
+            .values(heartbeat_at=now)
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def checkpoint(
+        self,
+        id: int,
+        last_user_id: int,
+        sent: int,
+        failed: int,
+        blocked: int,
+    ) -> bool:
+        """Record a finished batch; False once the broadcast is no longer
+        running (e.g. it was cancelled)."""
+        result = await self.session.execute(
+            update(Broadcast)
+            .where(
+                Broadcast.id == id,
+                Broadcast.status == BroadcastStatus.RUNNING,
+            )
+            .values(
+                last_user_id=last_user_id,
+                sent=Broadcast.sent + sent,
+                failed=Broadcast.failed + failed,
+                blocked=Broadcast.blocked + blocked,
+                heartbeat_at=get_utc_now(),
+            )
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def finish(self, id: int, status: BroadcastStatus) -> bool:
+        result = await self.session.execute(
+            update(Broadcast)
+            .where(
+                Broadcast.id == id,
+                Broadcast.status == BroadcastStatus.RUNNING,
+            )
+            .values(status=status, finished_at=get_utc_now())
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start: datetime) -> datetime:
+    return (start + timedelta(days=32)).replace(day=1)
 
 
 class AuthSessionRepository(BaseRepository[AuthSession]):
@@ -214,26 +494,275 @@ class AuthSessionRepository(BaseRepository[AuthSession]):
 
     async def get_session(self, session_id: int) -> Optional[AuthSession]:
         result = await self.session.execute(
-            select(AuthSession)
-            .options(joinedload(AuthSession.user))
-            .where(
-                and_(
-                    AuthSession.id == session_id,
-                    AuthSession.is_active.is_(True)
-                )
-            )
+            SESSION_BY_ID, {"session_id": session_id}
         )
         return result.scalar_one_or_none()
 
-    async def get_session_by_token(self, token: str) -> Optional[AuthSession]:
+    async def get_session_by_digest(self, digest: bytes) -> Optional[AuthSession]:
         result = await self.session.execute(
-            select(AuthSession)
-            .options(joinedload(AuthSession.user))
-            .where(
-                and_(
-                    AuthSession.token == token,
-                    AuthSession.is_active.is_(True)
+            SESSION_BY_DIGEST, {"token_digest": digest}
+        )
+        return result.scalar_one_or_none()
+
+    async def delete_dead(self, batch_size: int) -> int:
+        """Delete up to `batch_size` expired or revoked sessions."""
+        dead = (
+            select(AuthSession.id)
+            .where(or_(
+                AuthSession.expires_at < get_utc_now(),
+                AuthSession.is_active.is_(False),
+            ))
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            delete(AuthSession).where(AuthSession.id.in_(dead))
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    # region revocations
+
+    async def revoke(self, auth_session: AuthSession) -> None:
+        """Deactivate `auth_session` and record the revocation for
+        signed tokens, which never read `is_active`."""
+        auth_session.is_active = False
+        await self.session.execute(
+            pg_insert(SessionRevocation)
+            .values(
+                session_id=auth_session.id,
+                revoked_at=get_utc_now(),
+                expires_at=auth_session.expires_at,
+            )
+            .on_conflict_do_nothing()
+        )
+        await self.session.commit()
+
+    async def revoke_user_sessions(self, user_id: int) -> int:
+        """Record every active session of a user as revoked, before a
+        role change or deletion; the sessions themselves stay as they are."""
+        result = await self.session.execute(
+            pg_insert(SessionRevocation)
+            .from_select(
+                ["session_id", "revoked_at", "expires_at"],
+                select(AuthSession.id, func.now(), AuthSession.expires_at)
+                .where(
+                    AuthSession.user_id == user_id,
+                    AuthSession.is_active.is_(True),
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def revocations_since(
+        self, since: Optional[datetime]
+    ) -> List[Tuple[int, datetime]]:
+        """(session id, revoked at) of unexpired revocations, all of them
+        or those recorded after `since`."""
+        query = select(
+            SessionRevocation.session_id, SessionRevocation.revoked_at
+        ).where(or_(
+            SessionRevocation.expires_at.is_(None),
+            SessionRevocation.expires_at > get_utc_now(),
+        ))
+        if since is not None:
+            query = query.where(SessionRevocation.revoked_at > since)
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def is_revoked(self, session_id: int) -> bool:
+        result = await self.session.execute(
+            select(SessionRevocation.session_id)
+            .where(SessionRevocation.session_id == session_id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def delete_expired_revocations(self, batch_size: int) -> int:
+        """Delete up to `batch_size` revocations of expired sessions."""
+        expired = (
+            select(SessionRevocation.session_id)
+            .where(SessionRevocation.expires_at < get_utc_now())
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            delete(SessionRevocation)
+            .where(SessionRevocation.session_id.in_(expired))
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    # endregion
+
+    # region partitions
+
+    PARTITION_PREFIX = "auth_sessions_p"
+    # Created by the partitioning migration for rows outside every month
+    DEFAULT_PARTITION = "auth_sessions_default"
+
+    async def _partitions(self) -> Optional[List[str]]:
+        """Monthly partitions of `auth_sessions`; None if not partitioned."""
+        if self.session.bind.dialect.name != "postgresql":
+            return None
+        result = await self.session.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'auth_sessions'"
+        ))
+        names = list(result.scalars().all())
+        return names or None
+
+    async def ensure_partitions(
+        self, months_ahead: int
+    ) -> Tuple[List[str], List[str]]:
+        """Create the monthly partitions up to `months_ahead` from now.
+
+        Each month is its own transaction, so one that fails does not
+        keep the others from being created. Returns the partitions
+        created and those that could not be.
+        """
+        existing = await self._partitions()
+        if existing is None:
+            return [], []
+        created, failed = [], []
+        start = month_start(get_utc_now())
+        for _ in range(months_ahead + 1):
+            end = next_month(start)
+            name = f"{self.PARTITION_PREFIX}{start:%Y%m}"
+            if name not in existing:
+                try:
+                    await self._create_partition(
+                        name, start, end,
+                        self.DEFAULT_PARTITION in existing,
+                    )
+                    await self.session.commit()
+                    created.append(name)
+                except SQLAlchemyError:
+                    self.logger.exception(f"Could not create partition {name}")
+                    await self.session.rollback()
+                    failed.append(name)
+            start = end
+        return created, failed
+
+    async def _create_partition(
+        self, name: str, start: datetime, end: datetime, has_default: bool
+    ) -> None:
+        """Create one monthly partition inside the current transaction.
+
+        Postgres refuses a partition whose range already has rows in the
+        DEFAULT partition (sessions inserted while the reaper was behind).
+        Those are moved: DEFAULT is detached, the partition created, the
+        rows copied over and DEFAULT attached again. Detaching locks
+        `auth_sessions` until the commit, so this only runs when needed.
+        """
+        bounds = (
+            f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        in_range = {"start": start, "end": end}
+        if has_default:
+            stranded = await self.session.execute(text(
+                f"SELECT 1 FROM {self.DEFAULT_PARTITION} "
+                f"WHERE created_at >= :start AND created_at < :end LIMIT 1"
+            ), in_range)
+            if stranded.first() is not None:
+                await self.session.execute(text(
+                    f"ALTER TABLE auth_sessions "
+                    f"DETACH PARTITION {self.DEFAULT_PARTITION}"
+                ))
+                await self.session.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF auth_sessions "
+                    f"FOR VALUES {bounds}"
+                ))
+                columns = ", ".join(c.name for c in AuthSession.__table__.c)
+                moved = await self.session.execute(text(
+                    f"WITH moved AS (DELETE FROM {self.DEFAULT_PARTITION} "
+                    f"WHERE created_at >= :start AND created_at < :end "
+                    f"RETURNING {columns}) "
+                    f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+                ), in_range)
+                await self.session.execute(text(
+                    f"ALTER TABLE auth_sessions ATTACH PARTITION "
+                    f"{self.DEFAULT_PARTITION} DEFAULT"
+                ))
+                self.logger.warning(
+                    f"Moved {moved.rowcount} sessions from "
+                    f"{self.DEFAULT_PARTITION} into {name}"
                 )
+                return
+
+        await self.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            f"PARTITION OF auth_sessions FOR VALUES {bounds}"
+        ))
+
+    async def drop_partitions_before(self, cutoff: datetime) -> List[str]:
+        """Drop monthly partitions holding only sessions created before
+        `cutoff`; one cheap DDL statement each instead of row deletes."""
+        existing = await self._partitions()
+        if existing is None:
+            return []
+        dropped = []
+        for name in sorted(existing):
+            suffix = name[len(self.PARTITION_PREFIX):]
+            if not name.startswith(self.PARTITION_PREFIX) or not suffix.isdigit():
+                continue  # e.g. the default partition
+            start = datetime.strptime(suffix, "%Y%m").replace(tzinfo=timezone.utc)
+            if next_month(start) <= cutoff:
+                await self.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+        await self.session.commit()
+        return dropped
+
+    # endregion
+
+
+class BotStateRepository:
+    """Storage for the bot's persistence; keyed by `(kind, key)`."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.logger = logging.getLogger(__name__)
+
+    async def get(self, kind: BotStateKind, key: str) -> Optional[Any]:
+        result = await self.session.execute(
+            select(BotState.data).where(
+                BotState.kind == kind,
+                BotState.key == key,
             )
         )
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+    async def write(
+        self,
+        upserts: List[Tuple[BotStateKind, str, Any]],
+        deletes: List[Tuple[BotStateKind, str]],
+    ) -> None:
+        """Apply a batch of changes in one transaction: at most one
+        upsert statement and one delete statement."""
+        try:
+            if upserts:
+                now = get_utc_now()
+                stmt = pg_insert(BotState).values([
+                    {"kind": kind, "key": key, "data": data, "updated_at": now}
+                    for kind, key, data in upserts
+                ])
+                await self.session.execute(stmt.on_conflict_do_update(
+                    index_elements=[BotState.kind, BotState.key],
+                    set_={"data": stmt.excluded.data, "updated_at": now},
+                ))
+            if deletes:
+                await self.session.execute(
+                    delete(BotState).where(
+                        tuple_(BotState.kind, BotState.key).in_(deletes)
+                    )
+                )
+            await self.session.commit()
+        except SQLAlchemyError as e:
+            self.logger.exception(
+                "Database error occurred during bot state write."
+            )
+            await self.session.rollback()
+            raise e
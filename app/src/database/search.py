@@ -0,0 +1,104 @@
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict
+from sqlalchemy import BigInteger, Integer, SmallInteger, false, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class SearchMode(str, Enum):
+    """How a declared search field is matched; each has a matching index.
+
+    exact   -- typed equality, served by a btree (or unique) index
+    prefix  -- `LIKE 'term%'`, served by a `*_pattern_ops` btree index
+    trigram -- `ILIKE '%term%'`, served by a pg_trgm GIN index
+    """
+    exact = "exact"
+    prefix = "prefix"
+    trigram = "trigram"
+
+
+NUMERIC_TYPES = (int, float, Decimal)
+
+# Widest first: BigInteger and SmallInteger both subclass Integer
+INTEGER_BITS = ((BigInteger, 64), (SmallInteger, 16), (Integer, 32))
+
+
+def _escape_like(term: str) -> str:
+    return (
+        term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+
+
+def _coerce(column: Any, term: str) -> Any:
+    """Convert the search term to the column's Python type.
+
+    Raises ValueError when the term cannot be a value of that column, in
+    which case the column cannot match and is skipped.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return term
+    if issubclass(python_type, Enum):
+        try:
+            return python_type(term)
+        except ValueError:
+            pass
+        try:
+            return python_type[term.upper()]
+        except KeyError:
+            raise ValueError(term)
+    if issubclass(python_type, NUMERIC_TYPES):
+        value = python_type(term)
+        for type_, bits in INTEGER_BITS:
+            if isinstance(column.type, type_):
+                # The database would reject the parameter instead
+                if not -(1 << (bits - 1)) <= value < 1 << (bits - 1):
+                    raise ValueError(term)
+                break
+        return value
+    return term
+
+
+def search_condition(
+    column: Any, mode: SearchMode, term: str
+) -> ColumnElement[bool] | None:
+    """Index-friendly predicate for one field, or None if it cannot match.
+
+    Non-text columns are always compared by value; they are never cast
+    to text, which would rule out every index on them.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = str
+
+    if mode == SearchMode.exact or not issubclass(python_type, str):
+        try:
+            value = _coerce(column, term)
+        except (KeyError, ValueError, ArithmeticError):
+            return None
+        return column == value
+
+    pattern = _escape_like(term)
+    if mode == SearchMode.prefix:
+        return column.like(f"{pattern}%", escape="\\")
+    return column.ilike(f"%{pattern}%", escape="\\")
+
+
+def build_search(
+    model: Any, fields: Dict[str, SearchMode], term: str
+) -> ColumnElement[bool]:
+    conditions = []
+    for field, mode in fields.items():
+        column = getattr(model, field, None)
+        if column is None:
+            continue
+        condition = search_condition(column, mode, term)
+        if condition is not None:
+            conditions.append(condition)
+
+    # No field can hold this term (e.g. letters against numeric ids)
+    if not conditions:
+        return false()
+    return or_(*conditions)
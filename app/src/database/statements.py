@@ -0,0 +1,49 @@
+"""Hot-path statements, built once at import time.
+
+Each statement uses named bind parameters and is executed with a params
+dict. The statement object memoizes its cache key, so a lookup goes
+straight to the engine's compiled-SQL cache instead of rebuilding the
+`select()` and regenerating its key on every call.
+"""
+from sqlalchemy import and_, bindparam, select
+from sqlalchemy.orm import joinedload
+from .models import AuthSession, User
+
+USER_BY_PHONE = select(User).where(
+    User.phone_number == bindparam("phone_number")
+)
+
+SESSION_BY_ID = (
+    select(AuthSession)
+    .options(joinedload(AuthSession.user))
+    .where(
+        and_(
+            AuthSession.id == bindparam("session_id"),
+            AuthSession.is_active.is_(True)
+        )
+    )
+)
+
+SESSION_BY_DIGEST = (
+    select(AuthSession)
+    .options(joinedload(AuthSession.user))
+    .where(
+        and_(
+            AuthSession.token_digest == bindparam("token_digest"),
+            AuthSession.is_active.is_(True)
+        )
+    )
+)
+
+# Broadcast recipients, streamed in primary key order
+RECIPIENTS_AFTER = (
+    select(User.id, User.telegram_id)
+    .where(
+        and_(
+            User.telegram_id.is_not(None),
+            User.id > bindparam("after_id")
+        )
+    )
+    .order_by(User.id)
+    .limit(bindparam("batch_size"))
+)
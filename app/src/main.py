@@ -6,6 +6,12 @@ from dotenv import load_dotenv
 
 load_dotenv()
 APP_ENV = os.getenv('APP_ENV', "production")
+# single: one process serves API and bot; split: API_WORKERS API processes
+# forwarding webhook updates to BOT_WORKERS bot processes
+DEPLOY_MODE = os.getenv('DEPLOY_MODE', "single")
+API_WORKERS = int(os.getenv('API_WORKERS', os.cpu_count() or 1))
+BOT_STARTUP_TIMEOUT = float(os.getenv('BOT_STARTUP_TIMEOUT', 60))
+BOT_SHUTDOWN_TIMEOUT = float(os.getenv('BOT_SHUTDOWN_TIMEOUT', 60))
 
 logging.basicConfig(
     level=(logging.DEBUG if APP_ENV == "development" else logging.ERROR),
@@ -15,13 +21,59 @@ logger = logging.getLogger(__name__)
 
 
 async def main():
+    # The bot application runs inside the API's lifespan
     from src.core import runserver
-    from telegram_bot import application
 
-    async with application:
-        await application.start()
     await runserver()
 
 
+def split():
+    """Start bot workers, then API workers; stop in reverse order."""
+    # Read at import time: this process serves the API when API_WORKERS=1
+    os.environ["APP_ROLE"] = "api"
+    from multiprocessing import get_context
+    from src.core import serve_workers
+    from src.telegram_bot import BOT_PERSISTENCE, BOT_WORKERS, IPC_SOCKET_DIR
+    from src.telegram_bot import worker
+    from src.telegram_bot.ipc import socket_path, wait_for_sockets
+
+    if BOT_WORKERS > 1 and BOT_PERSISTENCE:
+        # Updates are sharded by chat, but user_data follows the user
+        # into every chat and bot_data is shared: each worker would
+        # read its own stale copy and overwrite the others' writes
+        raise ValueError(
+            "BOT_WORKERS > 1 requires BOT_PERSISTENCE=false"
+        )
+
+    # Workers are spawned, so they re-read the role from the environment
+    context = get_context("spawn")
+    bots = [
+        context.Process(target=worker.run, args=(shard,), name=f"bot-{shard}")
+        for shard in range(BOT_WORKERS)
+    ]
+    os.environ["APP_ROLE"] = "bot"
+    for process in bots:
+        process.start()
+    os.environ["APP_ROLE"] = "api"
+    try:
+        paths = [socket_path(IPC_SOCKET_DIR, s) for s in range(BOT_WORKERS)]
+        if not asyncio.run(wait_for_sockets(paths, BOT_STARTUP_TIMEOUT)):
+            logger.error("Bot workers did not come up, not starting the API")
+            return
+        serve_workers(API_WORKERS)
+    finally:
+        # API workers are gone, nothing forwards anymore: drain the bots
+        for process in bots:
+            process.terminate()
+        for process in bots:
+            process.join(BOT_SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                logger.error(f"{process.name} did not stop, killing it")
+                process.kill()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if DEPLOY_MODE == "split":
+        split()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,33 @@
+from .hasher import (
+    PasswordHasher,
+    BcryptAlgorithm,
+    HashingAlgorithm,
+    HasherSaturatedException,
+)
+from .values import HashedPassword, is_hashed, looks_hashed
+import os
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASHER_EXECUTOR = os.getenv("PASSWORD_HASHER_EXECUTOR", "thread")
+PASSWORD_HASHER_WORKERS = int(
+    os.getenv("PASSWORD_HASHER_WORKERS", os.cpu_count() or 1)
+)
+PASSWORD_HASHER_MAX_QUEUE = int(os.getenv("PASSWORD_HASHER_MAX_QUEUE", 32))
+
+password_hasher = PasswordHasher(
+    algorithm=BcryptAlgorithm(rounds=BCRYPT_ROUNDS),
+    workers=PASSWORD_HASHER_WORKERS,
+    max_queue=PASSWORD_HASHER_MAX_QUEUE,
+    executor=PASSWORD_HASHER_EXECUTOR,
+)
+
+__all__ = [
+    "PasswordHasher",
+    "BcryptAlgorithm",
+    "HashingAlgorithm",
+    "HasherSaturatedException",
+    "HashedPassword",
+    "is_hashed",
+    "looks_hashed",
+    "password_hasher",
+]
@@ -0,0 +1,234 @@
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Protocol, TypeVar
+import asyncio
+import logging
+import time
+import bcrypt
+from .values import HashedPassword
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar('R')
+
+
+class HasherSaturatedException(Exception):
+    """Raised when the hashing pool has no room for another job"""
+    pass
+
+
+class HashingAlgorithm(Protocol):
+    """A CPU-bound hashing backend that can run inside a worker pool.
+
+    Implementations must be picklable so they can be shipped to a
+    process pool.
+    """
+
+    def hash(self, password: bytes) -> bytes: ...
+
+    def verify(self, password: bytes, hashed: bytes) -> bool: ...
+
+    def needs_rehash(self, hashed: bytes) -> bool: ...
+
+
+@dataclass
+class BcryptAlgorithm:
+    """bcrypt backend with a configurable cost factor."""
+    rounds: int = 12
+
+    def hash(self, password: bytes) -> bytes:
+        return bcrypt.hashpw(password, bcrypt.gensalt(rounds=self.rounds))
+
+    def verify(self, password: bytes, hashed: bytes) -> bool:
+        return bcrypt.checkpw(password, hashed)
+
+    def needs_rehash(self, hashed: bytes) -> bool:
+        # bcrypt hashes look like b"$2b$12$<salt+digest>"
+        try:
+            return int(hashed.split(b"$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+def _timed_call(fn: Callable[..., R], *args) -> tuple[float, float, R]:
+    """Run `fn` in the worker and report when it started and how long it ran.
+
+    `time.monotonic` is system-wide on Linux, so the start stamp is
+    comparable with the enqueue stamp taken in the event loop even when
+    the job ran in another process.
+    """
+    started = time.monotonic()
+    result = fn(*args)
+    return started, time.monotonic() - started, result
+
+
+@dataclass
+class HasherMetrics:
+    """Counters for queue wait time versus time spent hashing."""
+    completed: int = 0
+    rejected: int = 0
+    failed: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    hash_seconds_total: float = 0.0
+    hash_seconds_max: float = 0.0
+    in_flight: int = 0
+    capacity: int = 0
+    workers: int = 0
+    executor: str = ""
+
+    def observe(self, wait: float, run: float) -> None:
+        self.completed += 1
+        self.wait_seconds_total += wait
+        self.hash_seconds_total += run
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.hash_seconds_max = max(self.hash_seconds_max, run)
+
+    def snapshot(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "executor": self.executor,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "wait_seconds_avg": self.wait_seconds_total / completed,
+            "wait_seconds_max": self.wait_seconds_max,
+            "hash_seconds_avg": self.hash_seconds_total / completed,
+            "hash_seconds_max": self.hash_seconds_max,
+        }
+
+
+class PasswordHasher:
+    """Runs password hashing in a bounded worker pool.
+
+    At most `workers + max_queue` jobs may be in flight; anything above
+    that is shed immediately with `HasherSaturatedException` instead of
+    queueing behind slow bcrypt work and blocking the event loop.
+    """
+
+    EXECUTORS = ("thread", "process")
+
+    def __init__(
+        self,
+        algorithm: HashingAlgorithm,
+        workers: int,
+        max_queue: int,
+        executor: str = "thread"
+    ):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown hashing executor: {executor}")
+        self.algorithm = algorithm
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.executor_kind = executor
+        self._executor: Executor | None = None
+        self.metrics = HasherMetrics(
+            capacity=self.workers + self.max_queue,
+            workers=self.workers,
+            executor=executor,
+        )
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing the module never forks or spawns.
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Runs in the pool's thread; the counter belongs to the loop
+        try:
+            loop.call_soon_threadsafe(self._finished)
+        except RuntimeError:
+            # The loop is already closed
+            pass
+
+    def _finished(self) -> None:
+        self.metrics.in_flight -= 1
+
+    async def _submit(self, fn: Callable[..., R], *args) -> R:
+        if self.metrics.in_flight >= self.metrics.capacity:
+            self.metrics.rejected += 1
+            raise HasherSaturatedException("Password hashing pool is saturated")
+
+        self.metrics.in_flight += 1
+        enqueued = time.monotonic()
+        loop = asyncio.get_running_loop()
+        try:
+            job = self._get_executor().submit(_timed_call, fn, *args)
+        except RuntimeError:
+            # The pool was shut down
+            self.metrics.in_flight -= 1
+            raise
+        # Released when the job itself ends: a cancelled caller (e.g. a
+        # client that disconnected) leaves the job running in the pool
+        job.add_done_callback(lambda _: self._release(loop))
+        try:
+            started, elapsed, result = await asyncio.wrap_future(job)
+        except Exception:
+            self.metrics.failed += 1
+            raise
+
+        self.metrics.observe(wait=max(0.0, started - enqueued), run=elapsed)
+        return result
+
+    async def hash(self, password: str | bytes) -> HashedPassword:
+        """Hash a plaintext password off the event loop."""
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        return HashedPassword(
+            await self._submit(self.algorithm.hash, password)
+        )
+
+    async def ensure_hashed(self, password: Any) -> Any:
+        """Hash `password` unless it is already a `HashedPassword`.
+
+        Empty values are returned untouched so optional passwords stay
+        NULL.
+        """
+        if not password or isinstance(password, HashedPassword):
+            return password
+        return await self.hash(password)
+
+    async def hash_many(self, passwords: Iterable[Any]) -> List[Any]:
+        """`ensure_hashed` for a batch, never exceeding the worker count.
+
+        Bulk imports use this so they saturate the workers without
+        tripping load-shedding for concurrent logins.
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def _one(password: Any) -> Any:
+            async with semaphore:
+                return await self.ensure_hashed(password)
+
+        return list(await asyncio.gather(*(_one(p) for p in passwords)))
+
+    async def verify(self, password: str | bytes, hashed: str | bytes) -> bool:
+        """Check a plaintext password against a stored hash off the loop."""
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return await self._submit(self.algorithm.verify, password, hashed)
+
+    def needs_rehash(self, hashed: str | bytes) -> bool:
+        """Whether a stored hash was made with different parameters."""
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return self.algorithm.needs_rehash(hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,31 @@
+import re
+
+
+class HashedPassword(bytes):
+    """Marks a password value that has already been hashed.
+
+    Anything that is not a `HashedPassword` (plain `str` or `bytes`) is
+    treated as plaintext and will be hashed exactly once on its way to
+    the database.
+    """
+
+    def __repr__(self) -> str:
+        return "HashedPassword(***)"
+
+
+def is_hashed(value: object) -> bool:
+    return isinstance(value, HashedPassword)
+
+
+# Modular crypt format of a bcrypt hash: $2b$<cost>$<22 salt + 31 digest>
+BCRYPT_SHAPE = re.compile(rb"\$2[abxy]\$\d{2}\$[./A-Za-z0-9]{53}")
+
+
+def looks_hashed(value: object) -> bool:
+    """Whether a value that is not a `HashedPassword` is shaped like a
+    stored bcrypt hash, e.g. one read back from the database."""
+    if is_hashed(value):
+        return False
+    if isinstance(value, str):
+        value = value.encode()
+    return isinstance(value, bytes) and BCRYPT_SHAPE.fullmatch(value) is not None
@@ -0,0 +1,126 @@
+from .identity import SessionIdentity, UserIdentity
+from .cache import SessionCache, MISS
+from .kv import KeyValueClient, InMemoryKeyValue
+from .store import SessionStore, LocalSessionStore, KeyValueSessionStore
+from .reaper import SessionReaper
+from .tokens import SessionTokens
+from .signed import SignedClaims, SignedTokenCodec
+from .revocation import RevocationSet
+from datetime import timedelta
+from src.database.config import SessionFactory
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_MAX_SIZE = int(os.getenv("SESSION_CACHE_MAX_SIZE", 10000))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", 60))
+SESSION_CACHE_NEGATIVE_TTL = float(os.getenv("SESSION_CACHE_NEGATIVE_TTL", 5))
+# "memory" (single worker) or "redis" (shared between workers)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "redis://localhost:6379/0")
+# Expired/revoked session cleanup, run by the bot's job queue
+SESSION_REAP_INTERVAL = float(os.getenv("SESSION_REAP_INTERVAL", 600))
+SESSION_REAP_BATCH_SIZE = int(os.getenv("SESSION_REAP_BATCH_SIZE", 1000))
+SESSION_REAP_MAX_BATCHES = int(os.getenv("SESSION_REAP_MAX_BATCHES", 100))
+# Monthly auth_sessions partitions older than this are dropped whole
+SESSION_PARTITION_RETENTION_DAYS = int(os.getenv("SESSION_PARTITION_RETENTION_DAYS", 30))
+SESSION_PARTITION_MONTHS_AHEAD = int(os.getenv("SESSION_PARTITION_MONTHS_AHEAD", 2))
+# Lifetime of a login session
+SESSION_EXPIRE_DELTA = timedelta(days=7)
+
+if timedelta(days=SESSION_PARTITION_RETENTION_DAYS) < SESSION_EXPIRE_DELTA:
+    # A dropped partition would take sessions that are still valid
+    raise ValueError(
+        "SESSION_PARTITION_RETENTION_DAYS must be at least the session "
+        f"lifetime of {SESSION_EXPIRE_DELTA.days} days"
+    )
+# Key of the token digests and signed tokens; changing it logs everyone out
+SESSION_TOKEN_KEY = os.getenv("SESSION_TOKEN_KEY", "")
+# Published defaults; anyone could sign tokens with them
+PLACEHOLDER_TOKEN_KEYS = {"", "change-me", "insecure-session-token-key"}
+
+if SESSION_TOKEN_KEY in PLACEHOLDER_TOKEN_KEYS:
+    raise ValueError(
+        "SESSION_TOKEN_KEY must be set to a random secret, e.g. the output "
+        "of: python -c 'import secrets; print(secrets.token_urlsafe(32))'"
+    )
+
+session_tokens = SessionTokens(SESSION_TOKEN_KEY.encode())
+
+# "opaque" (looked up on every cache miss) or "signed" (verified
+# in-process, see signed.py); opaque tokens are accepted in both modes
+SESSION_TOKEN_MODE = os.getenv("SESSION_TOKEN_MODE", "opaque")
+if SESSION_TOKEN_MODE not in ("opaque", "signed"):
+    raise ValueError(f"Unknown session token mode: {SESSION_TOKEN_MODE}")
+# Signed tokens are only trusted in signed mode, or with this set while
+# moving back to opaque mode until the signed ones have expired
+SESSION_ACCEPT_SIGNED = (
+    SESSION_TOKEN_MODE == "signed"
+    or os.getenv("SESSION_ACCEPT_SIGNED", "false") == "true"
+)
+SESSION_REVOCATION_REFRESH = float(os.getenv("SESSION_REVOCATION_REFRESH", 5))
+SESSION_REVOCATION_CAPACITY = int(os.getenv("SESSION_REVOCATION_CAPACITY", 100000))
+SESSION_REVOCATION_ERROR_RATE = float(os.getenv("SESSION_REVOCATION_ERROR_RATE", 0.001))
+
+signed_tokens = SignedTokenCodec(session_tokens.key)
+session_revocations = RevocationSet(
+    SessionFactory,
+    refresh_interval=SESSION_REVOCATION_REFRESH,
+    capacity=SESSION_REVOCATION_CAPACITY,
+    error_rate=SESSION_REVOCATION_ERROR_RATE,
+)
+
+session_cache = SessionCache(
+    max_size=SESSION_CACHE_MAX_SIZE,
+    ttl=SESSION_CACHE_TTL,
+    negative_ttl=SESSION_CACHE_NEGATIVE_TTL,
+)
+
+
+def build_session_store(backend: str = SESSION_STORE) -> SessionStore:
+    if backend == "memory":
+        return LocalSessionStore(session_cache)
+    if backend == "redis":
+        # Optional dependency, only needed for multi-worker deployments
+        from redis.asyncio import from_url
+        return KeyValueSessionStore(from_url(SESSION_STORE_URL), session_cache)
+    raise ValueError(f"Unknown session store backend: {backend}")
+
+
+session_store = build_session_store()
+session_reaper = SessionReaper(
+    SessionFactory,
+    interval=SESSION_REAP_INTERVAL,
+    batch_size=SESSION_REAP_BATCH_SIZE,
+    max_batches=SESSION_REAP_MAX_BATCHES,
+    retention=timedelta(days=SESSION_PARTITION_RETENTION_DAYS),
+    months_ahead=SESSION_PARTITION_MONTHS_AHEAD,
+)
+
+__all__ = [
+    "SessionIdentity",
+    "UserIdentity",
+    "SessionCache",
+    "MISS",
+    "KeyValueClient",
+    "InMemoryKeyValue",
+    "SessionStore",
+    "LocalSessionStore",
+    "KeyValueSessionStore",
+    "SessionReaper",
+    "SessionTokens",
+    "SignedClaims",
+    "SignedTokenCodec",
+    "RevocationSet",
+    "build_session_store",
+    "session_cache",
+    "session_store",
+    "session_reaper",
+    "session_tokens",
+    "signed_tokens",
+    "session_revocations",
+    "SESSION_EXPIRE_DELTA",
+    "SESSION_TOKEN_MODE",
+    "SESSION_ACCEPT_SIGNED",
+]
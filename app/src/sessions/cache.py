@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Hashable, Set
+import time
+from .identity import SessionIdentity
+
+# Returned by `SessionCache.get` when the token is not cached at all, as
+# opposed to `None`, which is a cached "this token does not exist".
+MISS = object()
+
+
+@dataclass
+class SessionCacheMetrics:
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    stale_puts: int = 0
+
+    def snapshot(self, size: int, max_size: int) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": size,
+            "max_size": max_size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": (
+                (self.hits + self.negative_hits) / lookups if lookups else 0.0
+            ),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "stale_puts": self.stale_puts,
+        }
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: SessionIdentity | None
+    expires_at: float
+
+
+class SessionCache:
+    """Bounded LRU cache of token -> `SessionIdentity` with per-entry TTL.
+
+    Positive entries live for `ttl` seconds but never past the session's
+    own `expires_at`; unknown tokens are cached as `None` for
+    `negative_ttl` seconds so repeated bad cookies do not hit Postgres.
+
+    Every invalidation bumps a generation counter and leaves a tombstone
+    for the token or user. A caller takes `generation()` before reading
+    the database and passes it to `put`, which drops the write if the
+    token or its user was invalidated while the read was in flight.
+    Tombstones are bounded by `max_size`; once the oldest is evicted,
+    writes from reads older than it are dropped too, which only costs a
+    cache fill.
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.metrics = SessionCacheMetrics()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._generation = 0
+        self._tombstones: OrderedDict[Hashable, int] = OrderedDict()
+        # Generation of the newest tombstone that was evicted
+        self._oldest_trusted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> SessionIdentity | None | object:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.metrics.misses += 1
+            return MISS
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(token)
+            self.metrics.expirations += 1
+            self.metrics.misses += 1
+            return MISS
+
+        self._entries.move_to_end(token)
+        if entry.value is None:
+            self.metrics.negative_hits += 1
+        else:
+            self.metrics.hits += 1
+        return entry.value
+
+    def generation(self) -> int:
+        return self._generation
+
+    def is_stale(
+        self, token: str, identity: SessionIdentity | None, generation: int
+    ) -> bool:
+        """Whether a value read at `generation` was invalidated since."""
+        if generation < self._oldest_trusted:
+            return True
+        if self._tombstones.get(("token", token), 0) > generation:
+            return True
+        return (
+            identity is not None
+            and self._tombstones.get(("user", identity.user_id), 0) > generation
+        )
+
+    def put(
+        self,
+        token: str,
+        identity: SessionIdentity | None,
+        generation: int | None = None,
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        if generation is not None and self.is_stale(token, identity, generation):
+            self.metrics.stale_puts += 1
+            return
+
+        ttl = self.ttl_for(identity)
+        if ttl <= 0:
+            return
+
+        self._remove(token)
+        self._entries[token] = _Entry(identity, time.monotonic() + ttl)
+        if identity is not None:
+            self._tokens_by_user.setdefault(identity.user_id, set()).add(token)
+
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.metrics.evictions += 1
+
+    def ttl_for(self, identity: SessionIdentity | None) -> float:
+        """Seconds an entry may live, never past the session's expiry."""
+        if identity is None:
+            return self.negative_ttl
+        ttl = self.ttl
+        if identity.expires_at is not None:
+            remaining = (
+                identity.expires_at - datetime.now(timezone.utc)
+            ).total_seconds()
+            ttl = min(ttl, remaining)
+        return ttl
+
+    def invalidate_token(self, token: str) -> None:
+        # Tombstoned even when not cached: a read may be in flight
+        self._tombstone(("token", token))
+        if self._remove(token):
+            self.metrics.invalidations += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._tombstone(("user", user_id))
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            if self._remove(token):
+                self.metrics.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        # Nothing read before now can be trusted
+        self._generation += 1
+        self._oldest_trusted = self._generation
+        self._tombstones.clear()
+
+    def snapshot(self) -> dict:
+        return self.metrics.snapshot(len(self._entries), self.max_size)
+
+    def _tombstone(self, key: Hashable) -> None:
+        self._generation += 1
+        self._tombstones.pop(key, None)
+        self._tombstones[key] = self._generation
+        while len(self._tombstones) > max(self.max_size, 1):
+            _, evicted = self._tombstones.popitem(last=False)
+            self._oldest_trusted = evicted
+
+    def _remove(self, token: str) -> bool:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return False
+        if entry.value is not None:
+            tokens = self._tokens_by_user.get(entry.value.user_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry.value.user_id]
+        return True
@@ -0,0 +1,95 @@
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any
+from src.database.models import AuthSession, User, UserRole
+import json
+
+
+@dataclass(frozen=True, slots=True)
+class UserIdentity:
+    """Read-only snapshot of the user behind an authenticated session."""
+    id: int
+    role: UserRole
+    telegram_id: int | None = None
+    telegram_username: str | None = None
+    phone_number: str | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    @classmethod
+    def from_model(cls, user: User) -> "UserIdentity":
+        return cls(
+            id=user.id,
+            role=user.role,
+            telegram_id=user.telegram_id,
+            telegram_username=user.telegram_username,
+            phone_number=user.phone_number,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "UserIdentity":
+        return cls(**{
+            **data,
+            "role": UserRole(data["role"]),
+            "created_at": _parse_datetime(data.get("created_at")),
+            "updated_at": _parse_datetime(data.get("updated_at")),
+        })
+
+
+@dataclass(frozen=True, slots=True)
+class SessionIdentity:
+    """Read-only snapshot of an `AuthSession` and its user.
+
+    Unlike the ORM object it is not bound to any `AsyncSession`, so it
+    can be shared between requests through the session cache.
+    """
+    id: int
+    user_id: int
+    is_active: bool
+    user: UserIdentity
+    user_agent: str | None = None
+    created_at: datetime | None = None
+    expires_at: datetime | None = None
+
+    @classmethod
+    def from_model(cls, session: AuthSession) -> "SessionIdentity":
+        return cls(
+            id=session.id,
+            user_id=session.user_id,
+            is_active=session.is_active,
+            user=UserIdentity.from_model(session.user),
+            user_agent=session.user_agent,
+            created_at=session.created_at,
+            expires_at=session.expires_at,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=_json_default)
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "SessionIdentity":
+        data = json.loads(raw)
+        return cls(**{
+            **data,
+            "user": UserIdentity.from_dict(data["user"]),
+            "created_at": _parse_datetime(data.get("created_at")),
+            "expires_at": _parse_datetime(data.get("expires_at")),
+        })
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UserRole):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
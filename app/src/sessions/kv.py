@@ -0,0 +1,146 @@
+from typing import AsyncIterator, Dict, Protocol, Set
+import asyncio
+import time
+
+
+class PubSub(Protocol):
+    async def subscribe(self, *channels: str) -> None: ...
+
+    def listen(self) -> AsyncIterator[dict]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class KeyValueClient(Protocol):
+    """The subset of the `redis.asyncio.Redis` API the session store uses."""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(
+        self, key: str, value: str | bytes, px: int | None = None, nx: bool = False
+    ): ...
+
+    async def delete(self, *keys: str) -> int: ...
+
+    async def sadd(self, key: str, *members: str) -> int: ...
+
+    async def smembers(self, key: str) -> Set[bytes]: ...
+
+    async def pexpire(self, key: str, milliseconds: int) -> bool: ...
+
+    async def publish(self, channel: str, message: str | bytes) -> int: ...
+
+    def pubsub(self) -> PubSub: ...
+
+
+def _to_bytes(value: str | bytes) -> bytes:
+    return value.encode('utf-8') if isinstance(value, str) else value
+
+
+class InMemoryPubSub:
+    def __init__(self, server: "InMemoryKeyValue"):
+        self._server = server
+        self._queue: asyncio.Queue[dict] = asyncio.Queue()
+        self._channels: Set[str] = set()
+
+    async def subscribe(self, *channels: str) -> None:
+        for channel in channels:
+            self._server._subscribers.setdefault(channel, set()).add(self._queue)
+            self._channels.add(channel)
+            await self._queue.put({
+                "type": "subscribe",
+                "channel": _to_bytes(channel),
+                "data": len(self._channels),
+            })
+
+    async def listen(self) -> AsyncIterator[dict]:
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self) -> None:
+        for channel in self._channels:
+            self._server._subscribers.get(channel, set()).discard(self._queue)
+        self._channels.clear()
+
+
+class InMemoryKeyValue:
+    """In-process stand-in for a Redis server.
+
+    Several stores sharing one instance behave like workers sharing one
+    Redis, including pub/sub fan-out, which lets the cross-worker
+    invalidation path run without a live service.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, bytes | Set[bytes]] = {}
+        self._expires: Dict[str, float] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    async def get(self, key: str) -> bytes | None:
+        if not self._alive(key):
+            return None
+        value = self._data[key]
+        return value if isinstance(value, bytes) else None
+
+    async def set(
+        self, key: str, value: str | bytes, px: int | None = None, nx: bool = False
+    ):
+        if nx and self._alive(key):
+            return None
+        self._data[key] = _to_bytes(value)
+        if px is not None:
+            self._expires[key] = time.monotonic() + px / 1000
+        else:
+            self._expires.pop(key, None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._alive(key):
+                deleted += 1
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return deleted
+
+    async def sadd(self, key: str, *members: str) -> int:
+        if not self._alive(key):
+            self._data[key] = set()
+        current = self._data[key]
+        if not isinstance(current, set):
+            raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        before = len(current)
+        current.update(_to_bytes(m) for m in members)
+        return len(current) - before
+
+    async def smembers(self, key: str) -> Set[bytes]:
+        if not self._alive(key):
+            return set()
+        value = self._data[key]
+        return set(value) if isinstance(value, set) else set()
+
+    async def pexpire(self, key: str, milliseconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self._expires[key] = time.monotonic() + milliseconds / 1000
+        return True
+
+    async def publish(self, channel: str, message: str | bytes) -> int:
+        queues = self._subscribers.get(channel, set())
+        for queue in queues:
+            queue.put_nowait({
+                "type": "message",
+                "channel": _to_bytes(channel),
+                "data": _to_bytes(message),
+            })
+        return len(queues)
+
+    def pubsub(self) -> InMemoryPubSub:
+        return InMemoryPubSub(self)
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.database.models import get_utc_now
+from src.database.repositories import AuthSessionRepository
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReaperMetrics:
+    runs: int = 0
+    deleted: int = 0
+    revocations_deleted: int = 0
+    partitions_created: int = 0
+    partitions_dropped: int = 0
+    partition_failures: int = 0
+    errors: int = 0
+    last_run_seconds: float = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "revocations_deleted": self.revocations_deleted,
+            "partitions_created": self.partitions_created,
+            "partitions_dropped": self.partitions_dropped,
+            "partition_failures": self.partition_failures,
+            "errors": self.errors,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+class SessionReaper:
+    """Removes expired and revoked rows from `auth_sessions`.
+
+    Each run first manages the monthly partitions: the next
+    `months_ahead` are created, and partitions whose sessions were all
+    created more than `retention` ago are dropped whole. What is left
+    is deleted `batch_size` rows per transaction, at most `max_batches`
+    per run, yielding between batches so logins never wait on a long
+    delete. Revocations of expired sessions go the same way. A failing
+    phase is counted and logged without stopping the others. Scheduled
+    every `interval` seconds on the bot's job queue.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+        batch_size: int,
+        max_batches: int,
+        retention: timedelta,
+        months_ahead: int,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.max_batches = max(1, max_batches)
+        self.retention = retention
+        self.months_ahead = months_ahead
+        self.metrics = ReaperMetrics()
+
+    async def job(self, context) -> None:
+        """`JobQueue` callback."""
+        await self.run_once()
+
+    async def run_once(self) -> int:
+        started = time.perf_counter()
+        # Partition DDL can fail (e.g. missing privileges) while row
+        # deletes still work, so neither phase depends on the other
+        try:
+            await self._manage_partitions()
+        except SQLAlchemyError:
+            self.metrics.errors += 1
+            logger.exception("Session partition maintenance failed")
+
+        deleted = await self._delete_batches(AuthSessionRepository.delete_dead)
+        # Signed tokens of these sessions have expired anyway
+        self.metrics.revocations_deleted += await self._delete_batches(
+            AuthSessionRepository.delete_expired_revocations
+        )
+
+        self.metrics.runs += 1
+        self.metrics.deleted += deleted
+        self.metrics.last_run_seconds = time.perf_counter() - started
+        return deleted
+
+    async def _manage_partitions(self) -> None:
+        async with self.session_factory() as session:
+            repository = AuthSessionRepository(session)
+            created, failed = await repository.ensure_partitions(
+                self.months_ahead
+            )
+            dropped = await repository.drop_partitions_before(
+                get_utc_now() - self.retention
+            )
+        self.metrics.partitions_created += len(created)
+        # Logged by the repository; retried on the next run
+        self.metrics.partition_failures += len(failed)
+        self.metrics.partitions_dropped += len(dropped)
+        if dropped:
+            logger.info(f"Dropped session partitions {dropped}")
+
+    async def _delete_batches(self, delete) -> int:
+        """Run `delete(repository, batch_size)` until a batch comes up
+        short; returns the rows deleted, even if a batch failed."""
+        deleted = 0
+        try:
+            for _ in range(self.max_batches):
+                async with self.session_factory() as session:
+                    count = await delete(
+                        AuthSessionRepository(session), self.batch_size
+                    )
+                deleted += count
+                if count < self.batch_size:
+                    break
+                await asyncio.sleep(0)
+        except SQLAlchemyError:
+            self.metrics.errors += 1
+            logger.exception("Session reaper delete failed")
+        return deleted
+
+    def snapshot(self) -> dict:
+        return {"interval": self.interval, **self.metrics.snapshot()}
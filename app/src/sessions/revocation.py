@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.database.repositories import AuthSessionRepository
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Revocations committed by transactions that started before the last
+# refresh carry an older `revoked_at`; each refresh looks back this far
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    """Bit set answering "maybe present" or "certainly absent" for
+    integer keys, sized for `capacity` keys at `error_rate` false
+    positives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        bits = -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        self.size = max(8, math.ceil(bits))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, key: int):
+        digest = hashlib.blake2b(
+            key.to_bytes(8, "big", signed=True), digest_size=16
+        ).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, key: int) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: int) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+@dataclass
+class RevocationMetrics:
+    checks: int = 0
+    filter_hits: int = 0
+    revoked: int = 0
+    exact_checks: int = 0
+    refreshes: int = 0
+    rebuilds: int = 0
+    refresh_errors: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "revoked": self.revoked,
+            "exact_checks": self.exact_checks,
+            "refreshes": self.refreshes,
+            "rebuilds": self.rebuilds,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+class RevocationSet:
+    """In-process view of `session_revocations` for signed tokens.
+
+    A bloom filter answers most checks without the database; a hit is
+    confirmed with an exact lookup, whose answer is remembered (at most
+    `max_checked` ids). The filter is refreshed every
+    `refresh_interval` seconds with the revocations recorded since the
+    last refresh, so a revocation on another worker takes effect within
+    one interval, and rebuilt once it holds more ids than it was sized
+    for (at least `capacity`). The set is only `fresh` while refreshes
+    succeed; callers fall back to looking sessions up otherwise.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        refresh_interval: float,
+        capacity: int,
+        error_rate: float,
+        max_checked: int = 10000,
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_checked = max_checked
+        self.metrics = RevocationMetrics()
+        self._filter = BloomFilter(capacity, error_rate)
+        self._checked: Dict[int, bool] = {}
+        self._since: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def fresh(self) -> bool:
+        return (
+            self._refreshed_at is not None
+            and time.monotonic() - self._refreshed_at < 3 * self.refresh_interval
+        )
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self.refresh()
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def refresh(self) -> None:
+        rebuild = self._since is None or self._filter.count > self._filter.capacity
+        since = None if rebuild else self._since - REFRESH_OVERLAP
+        try:
+            async with self.session_factory() as session:
+                rows = await AuthSessionRepository(session).revocations_since(since)
+        except (SQLAlchemyError, OSError):
+            self.metrics.refresh_errors += 1
+            logger.exception("Session revocation refresh failed")
+            return
+
+        if rebuild:
+            self.metrics.rebuilds += 1
+            self._filter = BloomFilter(
+                max(self.capacity, 2 * len(rows)), self.error_rate
+            )
+            self._checked.clear()
+        for session_id, revoked_at in rows:
+            self.add(session_id)
+            if self._since is None or revoked_at > self._since:
+                self._since = revoked_at
+        self.metrics.refreshes += 1
+        self._refreshed_at = time.monotonic()
+
+    def add(self, session_id: int) -> None:
+        """Mark a session revoked, e.g. right after logging it out."""
+        if session_id not in self._filter:
+            self._filter.add(session_id)
+        if self._checked.get(session_id) is False:
+            del self._checked[session_id]
+
+    async def is_revoked(self, session_id: int) -> bool:
+        self.metrics.checks += 1
+        if session_id not in self._filter:
+            return False
+        self.metrics.filter_hits += 1
+        revoked = self._checked.get(session_id)
+        if revoked is None:
+            self.metrics.exact_checks += 1
+            try:
+                async with self.session_factory() as session:
+                    revoked = await AuthSessionRepository(session).is_revoked(
+                        session_id
+                    )
+            except (SQLAlchemyError, OSError):
+                logger.exception("Session revocation check failed")
+                # Refuse rather than let a revoked session through
+                return True
+            if len(self._checked) >= self.max_checked:
+                self._checked.clear()
+            self._checked[session_id] = revoked
+        if revoked:
+            self.metrics.revoked += 1
+        return revoked
+
+    def snapshot(self) -> dict:
+        return {
+            "fresh": self.fresh,
+            "filter_ids": self._filter.count,
+            "filter_bits": self._filter.size,
+            **self.metrics.snapshot(),
+        }
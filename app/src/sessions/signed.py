@@ -0,0 +1,81 @@
+"""Stateless session tokens.
+
+A signed token carries its session id, user id, role and expiry, so it
+is verified in-process; the database is only asked whether the session
+was revoked, see `RevocationSet`. The row in `auth_sessions` still
+exists and is found by id when a full session is needed.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from src.database.models import UserRole
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+
+PREFIX = "s1."
+
+
+def _encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+@dataclass(frozen=True, slots=True)
+class SignedClaims:
+    session_id: int
+    user_id: int
+    role: UserRole
+    expires_at: datetime
+
+
+class SignedTokenCodec:
+    """`s1.<claims>.<HMAC-SHA256>`, both parts base64url encoded.
+
+    The signing key is derived from the token digest key, so the two
+    token formats never share a key.
+    """
+
+    def __init__(self, key: bytes):
+        self.key = hmac.new(key, b"signed-session-token", hashlib.sha256).digest()
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self.key, payload, hashlib.sha256).digest()
+
+    def encode(self, claims: SignedClaims) -> str:
+        payload = json.dumps(
+            [
+                claims.session_id,
+                claims.user_id,
+                claims.role.value,
+                int(claims.expires_at.timestamp()),
+            ],
+            separators=(",", ":"),
+        ).encode()
+        return f"{PREFIX}{_encode(payload)}.{_encode(self._sign(payload))}"
+
+    def decode(self, token: str) -> Optional[SignedClaims]:
+        """Claims of a correctly signed token, expired or not; None for
+        anything else, including opaque tokens."""
+        if not token.startswith(PREFIX):
+            return None
+        try:
+            payload_part, signature_part = token[len(PREFIX):].split(".")
+            payload = _decode(payload_part)
+            signature = _decode(signature_part)
+        except (ValueError, binascii.Error):
+            return None
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        session_id, user_id, role, expires = json.loads(payload)
+        return SignedClaims(
+            session_id=session_id,
+            user_id=user_id,
+            role=UserRole(role),
+            expires_at=datetime.fromtimestamp(expires, timezone.utc),
+        )
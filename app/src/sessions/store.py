@@ -0,0 +1,275 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import asyncio
+import json
+import logging
+import math
+import time
+from .cache import SessionCache, MISS
+from .identity import SessionIdentity
+from .kv import KeyValueClient
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """Token -> `SessionIdentity` lookups shared by `AuthService`.
+
+    `get` returns `MISS` when the store knows nothing about the token and
+    `None` when the token is known not to exist. Take `generation()`
+    before reading the database and pass it to `put`, so a value that
+    was invalidated meanwhile is not cached again.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, token: str) -> SessionIdentity | None | object: ...
+
+    @abstractmethod
+    def generation(self) -> int: ...
+
+    @abstractmethod
+    async def put(
+        self,
+        token: str,
+        identity: SessionIdentity | None,
+        generation: int | None = None,
+    ) -> None: ...
+
+    @abstractmethod
+    async def invalidate_token(self, token: str) -> None: ...
+
+    @abstractmethod
+    async def invalidate_user(self, user_id: int) -> None: ...
+
+    @abstractmethod
+    def snapshot(self) -> dict: ...
+
+
+class LocalSessionStore(SessionStore):
+    """Per-process store; correct only when a single worker serves the API."""
+
+    def __init__(self, cache: SessionCache):
+        self.cache = cache
+
+    async def get(self, token: str) -> SessionIdentity | None | object:
+        return self.cache.get(token)
+
+    def generation(self) -> int:
+        return self.cache.generation()
+
+    async def put(
+        self,
+        token: str,
+        identity: SessionIdentity | None,
+        generation: int | None = None,
+    ) -> None:
+        self.cache.put(token, identity, generation)
+
+    async def invalidate_token(self, token: str) -> None:
+        self.cache.invalidate_token(token)
+
+    async def invalidate_user(self, user_id: int) -> None:
+        self.cache.invalidate_user(user_id)
+
+    def snapshot(self) -> dict:
+        return {"backend": "memory", "local": self.cache.snapshot()}
+
+
+@dataclass
+class KeyValueStoreMetrics:
+    remote_hits: int = 0
+    remote_misses: int = 0
+    remote_errors: int = 0
+    invalidations_sent: int = 0
+    invalidations_received: int = 0
+    invalidation_lag_seconds_max: float = 0.0
+    resubscribes: int = 0
+
+
+class KeyValueSessionStore(SessionStore):
+    """Local LRU in front of a shared key-value server (Redis or a stand-in).
+
+    Every invalidation deletes the shared entry and is broadcast on a
+    pub/sub channel, so each worker drops its local copy as soon as the
+    message arrives instead of waiting for the local TTL.
+    """
+
+    KEY_PREFIX = "auth-session:"
+    USER_PREFIX = "auth-session-user:"
+    CHANNEL = "auth-session-invalidate"
+    NEGATIVE = b"null"
+    RESUBSCRIBE_DELAY = 1.0
+
+    def __init__(self, client: KeyValueClient, cache: SessionCache):
+        self.client = client
+        self.cache = cache
+        self.metrics = KeyValueStoreMetrics()
+        self._listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._listener is None:
+            ready = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen(ready))
+            await ready.wait()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def get(self, token: str) -> SessionIdentity | None | object:
+        local = self.cache.get(token)
+        if local is not MISS:
+            return local
+
+        generation = self.cache.generation()
+        try:
+            raw = await self.client.get(self.KEY_PREFIX + token)
+        except Exception:
+            self.metrics.remote_errors += 1
+            logger.exception("Session store lookup failed")
+            return MISS
+
+        if raw is None:
+            self.metrics.remote_misses += 1
+            return MISS
+
+        self.metrics.remote_hits += 1
+        identity = None if raw == self.NEGATIVE else SessionIdentity.from_json(raw)
+        self.cache.put(token, identity, generation)
+        return identity
+
+    def generation(self) -> int:
+        return self.cache.generation()
+
+    async def put(
+        self,
+        token: str,
+        identity: SessionIdentity | None,
+        generation: int | None = None,
+    ) -> None:
+        if generation is not None and self.cache.is_stale(
+            token, identity, generation
+        ):
+            # Neither copy may outlive the invalidation
+            self.cache.metrics.stale_puts += 1
+            return
+        self.cache.put(token, identity)
+        ttl_ms = math.floor(self.cache.ttl_for(identity) * 1000)
+        if ttl_ms <= 0:
+            return
+
+        try:
+            await self.client.set(
+                self.KEY_PREFIX + token,
+                self.NEGATIVE if identity is None else identity.to_json(),
+                px=ttl_ms
+            )
+            if identity is not None:
+                user_key = self.USER_PREFIX + str(identity.user_id)
+                await self.client.sadd(user_key, token)
+                await self.client.pexpire(
+                    user_key, math.ceil(self.cache.ttl * 1000)
+                )
+        except Exception:
+            self.metrics.remote_errors += 1
+            logger.exception("Session store write failed")
+
+    async def invalidate_token(self, token: str) -> None:
+        self.cache.invalidate_token(token)
+        try:
+            await self.client.delete(self.KEY_PREFIX + token)
+        except Exception:
+            self.metrics.remote_errors += 1
+            logger.exception("Session store invalidation failed")
+        # Broadcast even if the delete failed: the other workers' local
+        # caches are still worth clearing
+        await self._broadcast("token", token)
+
+    async def invalidate_user(self, user_id: int) -> None:
+        self.cache.invalidate_user(user_id)
+        user_key = self.USER_PREFIX + str(user_id)
+        try:
+            tokens = await self.client.smembers(user_key)
+            keys = [self.KEY_PREFIX + t.decode('utf-8') for t in tokens]
+            await self.client.delete(user_key, *keys)
+        except Exception:
+            self.metrics.remote_errors += 1
+            logger.exception("Session store invalidation failed")
+        await self._broadcast("user", str(user_id))
+
+    async def _broadcast(self, kind: str, key: str) -> None:
+        self.metrics.invalidations_sent += 1
+        try:
+            await self.client.publish(self.CHANNEL, json.dumps({
+                "kind": kind, "key": key, "sent_at": time.time()
+            }))
+        except Exception:
+            self.metrics.remote_errors += 1
+            logger.exception("Session invalidation broadcast failed")
+
+    def _apply(self, message: dict) -> None:
+        self.metrics.invalidations_received += 1
+        lag = time.time() - message.get("sent_at", time.time())
+        self.metrics.invalidation_lag_seconds_max = max(
+            self.metrics.invalidation_lag_seconds_max, lag
+        )
+        if message["kind"] == "token":
+            self.cache.invalidate_token(message["key"])
+        elif message["kind"] == "user":
+            self.cache.invalidate_user(int(message["key"]))
+
+    async def _listen(self, ready: asyncio.Event) -> None:
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                ready.set()
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self._apply(json.loads(message["data"]))
+                    except (ValueError, KeyError):
+                        logger.warning("Malformed session invalidation message")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Session invalidation listener failed")
+            finally:
+                await pubsub.aclose()
+
+            # Messages may have been missed while disconnected; the local
+            # copies can no longer be trusted.
+            self.cache.clear()
+            self.metrics.resubscribes += 1
+            ready.set()
+            await asyncio.sleep(self.RESUBSCRIBE_DELAY)
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": "key-value",
+            "local": self.cache.snapshot(),
+            "remote_hits": self.metrics.remote_hits,
+            "remote_misses": self.metrics.remote_misses,
+            "remote_errors": self.metrics.remote_errors,
+            "invalidations_sent": self.metrics.invalidations_sent,
+            "invalidations_received": self.metrics.invalidations_received,
+            "invalidation_lag_seconds_max": (
+                self.metrics.invalidation_lag_seconds_max
+            ),
+            "resubscribes": self.metrics.resubscribes,
+            "listening": (
+                self._listener is not None and not self._listener.done()
+            ),
+        }
@@ -0,0 +1,29 @@
+"""Session tokens.
+
+The cookie carries a random token and the database only its keyed
+digest, so a dump of `auth_sessions` holds nothing that can be
+replayed as a cookie. Session caches are keyed by the digest too.
+"""
+import hashlib
+import hmac
+import secrets
+
+TOKEN_BYTES = 32
+
+
+class SessionTokens:
+    def __init__(self, key: bytes, size: int = TOKEN_BYTES):
+        self.key = key
+        self.size = size
+
+    def new(self) -> str:
+        """A fresh cookie value, `size` random bytes base64url encoded."""
+        return secrets.token_urlsafe(self.size)
+
+    def digest(self, token: str) -> bytes:
+        """32 byte HMAC-SHA256 of `token`, as stored in the database.
+
+        Any cookie value can be digested, including the UUID tokens
+        issued before digests were introduced.
+        """
+        return hmac.new(self.key, token.encode(), hashlib.sha256).digest()
@@ -1,15 +1,215 @@
 from .custom_context import CustomContext
+from datetime import timedelta
 from os import getenv
 from telegram.ext import Application, ContextTypes
 from .handler_routes import HANDLERS
+from .dispatcher import UpdateDispatcher, DispatchQueueFullException
+from .ingest import UpdatePrefilter, parse_update_body, raw_shard_key
+from .ingest import peek_shard_key
+from .outbound import OutboundScheduler, OutboxFullException, SendPriority
+from .broadcast import BroadcastEngine
+from .registration import UserRegistrar
+from .persistence import DatabasePersistence
+from .ipc import UpdateForwarder, socket_path
+from .lifecycle import BotLifecycle
+from .webhook import WebhookGuard, WebhookRegistration, derive_secret
+from .dedup import UpdateDeduplicator, peek_update_id
+from .ipc import STATUS_ACCEPTED, STATUS_BUSY, STATUS_INVALID
+from src.database.config import SessionFactory
+from src.sessions import session_reaper
+from telegram import Update
 
 TELEGRAM_TOKEN = getenv("TELEGRAM_TOKEN", "no token")
+# all: API and bot in one process; api: forward updates to bot workers
+# (set by src.main in the split deployment)
+APP_ROLE = getenv("APP_ROLE", "all")
+BOT_WORKERS = int(getenv("BOT_WORKERS", 1))
+IPC_SOCKET_DIR = getenv("IPC_SOCKET_DIR", "/tmp/fast-api-telegram")
+IPC_TIMEOUT_SECONDS = float(getenv("IPC_TIMEOUT_SECONDS", 5))
+UPDATE_WORKERS = int(getenv("UPDATE_WORKERS", 8))
+UPDATE_QUEUE_SIZE = int(getenv("UPDATE_QUEUE_SIZE", 1024))
+# Seconds a stopping process waits for queued updates to be handled
+BOT_DRAIN_SECONDS = float(getenv("BOT_DRAIN_SECONDS", 20))
+# Keep user_data/chat_data/bot_data in the database; one bot worker only
+BOT_PERSISTENCE = getenv("BOT_PERSISTENCE", "true") == "true"
+# Seconds between writes of changed user_data/chat_data/bot_data
+BOT_PERSISTENCE_INTERVAL = float(getenv("BOT_PERSISTENCE_INTERVAL", 10))
+# Parse and pre-filter raw webhook bodies; build telegram objects in workers
+WEBHOOK_FAST_INGEST = getenv("WEBHOOK_FAST_INGEST", "true") == "true"
+# update_ids remembered per process to drop Telegram's redeliveries
+UPDATE_DEDUP_WINDOW = int(getenv("UPDATE_DEDUP_WINDOW", 65536))
+# "memory" (per process) or "redis" (shared between instances)
+UPDATE_DEDUP_STORE = getenv("UPDATE_DEDUP_STORE", "memory")
+UPDATE_DEDUP_STORE_URL = getenv("UPDATE_DEDUP_STORE_URL", "redis://localhost:6379/0")
+UPDATE_DEDUP_TTL = float(getenv("UPDATE_DEDUP_TTL", 3600))
+# Public URL of /webhook; registered with Telegram on startup when set
+WEBHOOK_URL = getenv("WEBHOOK_URL", "")
+# Enforced when set, or derived from the token when we register the
+# webhook ourselves; a webhook set by hand carries no secret otherwise
+WEBHOOK_SECRET = getenv("WEBHOOK_SECRET") or (
+    derive_secret(TELEGRAM_TOKEN) if WEBHOOK_URL else ""
+)
+WEBHOOK_MAX_CONNECTIONS = int(getenv("WEBHOOK_MAX_CONNECTIONS", 40))
+WEBHOOK_MAX_BODY_BYTES = int(getenv("WEBHOOK_MAX_BODY_BYTES", 262144))
+# Per source IP; 0 disables. Telegram delivers from a handful of IPs.
+WEBHOOK_IP_RATE = float(getenv("WEBHOOK_IP_RATE", 200))
+WEBHOOK_IP_BURST = float(getenv("WEBHOOK_IP_BURST", 400))
+WEBHOOK_MAX_SOURCES = int(getenv("WEBHOOK_MAX_SOURCES", 10000))
+# Telegram allows about 30 messages/s overall, 1/s per chat, 20/min per group
+OUTBOX_GLOBAL_RATE = float(getenv("OUTBOX_GLOBAL_RATE", 30))
+OUTBOX_CHAT_RATE = float(getenv("OUTBOX_CHAT_RATE", 1))
+OUTBOX_GROUP_PER_MINUTE = float(getenv("OUTBOX_GROUP_PER_MINUTE", 20))
+OUTBOX_MAX_IN_FLIGHT = int(getenv("OUTBOX_MAX_IN_FLIGHT", 8))
+OUTBOX_MAX_PENDING = int(getenv("OUTBOX_MAX_PENDING", 10000))
+OUTBOX_MAX_RETRIES = int(getenv("OUTBOX_MAX_RETRIES", 3))
+# Flood waits (429) a call may sit out before it fails
+OUTBOX_MAX_FLOOD_WAITS = int(getenv("OUTBOX_MAX_FLOOD_WAITS", 5))
+BROADCAST_BATCH_SIZE = int(getenv("BROADCAST_BATCH_SIZE", 500))
+# A running broadcast with no checkpoint for this long is taken over
+BROADCAST_LEASE_SECONDS = int(getenv("BROADCAST_LEASE_SECONDS", 300))
+# How often the bot worker looks for new or abandoned broadcasts
+BROADCAST_POLL_SECONDS = float(getenv("BROADCAST_POLL_SECONDS", 5))
+# Users seen in updates are upserted in bulk every interval or M rows
+USER_UPSERT_INTERVAL_MS = int(getenv("USER_UPSERT_INTERVAL_MS", 500))
+USER_UPSERT_MAX_ROWS = int(getenv("USER_UPSERT_MAX_ROWS", 500))
+USER_UPSERT_MAX_BUFFER = int(getenv("USER_UPSERT_MAX_BUFFER", 10000))
+USER_PROFILE_CACHE_SIZE = int(getenv("USER_PROFILE_CACHE_SIZE", 100000))
+
 context_types = ContextTypes(context=CustomContext)
-application = (
+bot_persistence = DatabasePersistence(
+    SessionFactory, update_interval=BOT_PERSISTENCE_INTERVAL
+)
+application_builder = (
     Application.builder()
     .token(TELEGRAM_TOKEN)
     .updater(None)
     .context_types(context_types)
-    .build()
 )
+if BOT_PERSISTENCE:
+    application_builder.persistence(bot_persistence)
+application = application_builder.build()
+
+dispatcher = UpdateDispatcher(
+    application,
+    workers=UPDATE_WORKERS,
+    max_queue=UPDATE_QUEUE_SIZE,
+)
+outbox = OutboundScheduler(
+    application.bot,
+    # Every bot worker sends for the same token
+    global_rate=OUTBOX_GLOBAL_RATE / (BOT_WORKERS if APP_ROLE == "bot" else 1),
+    chat_rate=OUTBOX_CHAT_RATE,
+    group_rate=OUTBOX_GROUP_PER_MINUTE / 60,
+    max_in_flight=OUTBOX_MAX_IN_FLIGHT,
+    max_pending=OUTBOX_MAX_PENDING,
+    max_retries=OUTBOX_MAX_RETRIES,
+    max_flood_waits=OUTBOX_MAX_FLOOD_WAITS,
+)
+broadcasts = BroadcastEngine(
+    outbox,
+    SessionFactory,
+    batch_size=BROADCAST_BATCH_SIZE,
+    lease=timedelta(seconds=BROADCAST_LEASE_SECONDS),
+    poll_interval=BROADCAST_POLL_SECONDS,
+)
+registrar = UserRegistrar(
+    SessionFactory,
+    interval=USER_UPSERT_INTERVAL_MS / 1000,
+    max_rows=USER_UPSERT_MAX_ROWS,
+    max_buffer=USER_UPSERT_MAX_BUFFER,
+    cache_size=USER_PROFILE_CACHE_SIZE,
+)
+bot_lifecycle = BotLifecycle(
+    application,
+    dispatcher,
+    outbox,
+    registrar,
+    broadcasts,
+    drain_timeout=BOT_DRAIN_SECONDS,
+    webhook=WebhookRegistration(
+        WEBHOOK_URL, WEBHOOK_SECRET, WEBHOOK_MAX_CONNECTIONS
+    ) if WEBHOOK_URL else None,
+    reaper=session_reaper,
+)
+webhook_guard = WebhookGuard(
+    WEBHOOK_SECRET or None,
+    max_body=WEBHOOK_MAX_BODY_BYTES,
+    ip_rate=WEBHOOK_IP_RATE,
+    ip_burst=WEBHOOK_IP_BURST,
+    max_sources=WEBHOOK_MAX_SOURCES,
+)
+
+
+def build_deduplicator(backend: str = UPDATE_DEDUP_STORE) -> UpdateDeduplicator:
+    if backend == "memory":
+        return UpdateDeduplicator(UPDATE_DEDUP_WINDOW)
+    if backend == "redis":
+        # Optional dependency, only needed for multi-instance deployments
+        from redis.asyncio import from_url
+        return UpdateDeduplicator(
+            UPDATE_DEDUP_WINDOW,
+            store=from_url(UPDATE_DEDUP_STORE_URL),
+            store_ttl=UPDATE_DEDUP_TTL,
+        )
+    raise ValueError(f"Unknown update dedup backend: {backend}")
+
+
+deduplicator = build_deduplicator()
+forwarder = UpdateForwarder(
+    [socket_path(IPC_SOCKET_DIR, shard) for shard in range(BOT_WORKERS)],
+    timeout=IPC_TIMEOUT_SECONDS,
+)
+dispatcher.instrument(HANDLERS)
 application.add_handlers(HANDLERS)
+# Built from the static route table: handlers added later at runtime
+# must also be listed in HANDLERS or fast ingestion may drop updates.
+update_prefilter = UpdatePrefilter(HANDLERS)
+
+
+def accept_update(update: dict) -> None:
+    """Take a parsed webhook body (see `parse_update_body`).
+
+    Raises DispatchQueueFullException when the update must be retried.
+    """
+    registrar.observe_payload(update)
+    if not update_prefilter.wants(update):
+        # No handler can match; ack so Telegram does not redeliver
+        dispatcher.metrics.filtered += 1
+        return
+    dispatcher.submit(update)
+
+
+async def ingest_body(body: bytes) -> int:
+    """Dedup, parse and queue a raw webhook body; returns a STATUS_*.
+
+    Redeliveries are acknowledged without being parsed when the
+    update_id can be read off the body directly.
+    """
+    payload = None
+    update_id = peek_update_id(body)
+    if update_id is None:
+        try:
+            payload = parse_update_body(body)
+        except ValueError:
+            return STATUS_INVALID
+        update_id = payload["update_id"]
+    if await deduplicator.seen(update_id):
+        return STATUS_ACCEPTED
+
+    try:
+        if payload is None:
+            payload = parse_update_body(body)
+        if WEBHOOK_FAST_INGEST:
+            accept_update(payload)
+        else:
+            update = Update.de_json(data=payload, bot=application.bot)
+            registrar.observe(update.effective_user)
+            dispatcher.submit(update)
+        return STATUS_ACCEPTED
+    except ValueError:
+        result = STATUS_INVALID
+    except DispatchQueueFullException:
+        result = STATUS_BUSY
+    # Not taken: Telegram's redelivery must not count as a duplicate
+    await deduplicator.release(update_id)
+    return result
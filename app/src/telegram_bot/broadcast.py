@@ -0,0 +1,230 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from telegram.error import Forbidden
+from src.database.models import BroadcastStatus
+from src.database.repositories import BroadcastRepository, UserRepository
+from .outbound import OutboundScheduler, OutboxFullException, SendPriority
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BroadcastProgress:
+    broadcast_id: int
+    total: int
+    last_user_id: int
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        done = self.sent + self.failed + self.blocked
+        rate = done / elapsed if elapsed > 0 else 0.0
+        return {
+            "last_user_id": self.last_user_id,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "per_second": rate,
+            "eta_seconds": (
+                max(0, self.total - done) / rate if rate else None
+            ),
+        }
+
+
+class BroadcastEngine:
+    """Sends one text to every user with a `telegram_id`.
+
+    Recipients are read in `users.id` order, `batch_size` rows at a
+    time, and handed to the outbound scheduler as bulk traffic so
+    replies to live users still go first. After each batch the
+    `broadcasts` row is checkpointed (position, counters, heartbeat)
+    in its own short transaction; nothing but the current batch is held
+    in memory. Every `poll_interval` seconds broadcasts whose heartbeat
+    is older than `lease` are claimed and resumed from their checkpoint,
+    so a crash re-sends at most the unfinished batch. API workers that
+    do not run the engine create broadcasts already past the lease,
+    which hands them to the next poll.
+    """
+
+    def __init__(
+        self,
+        outbox: OutboundScheduler,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int,
+        lease: timedelta,
+        poll_interval: float,
+    ):
+        self.outbox = outbox
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._poller: Optional[asyncio.Task] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._progress: Dict[int, BroadcastProgress] = {}
+        self._cancelled: Set[int] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._poller is not None and not self._poller.done()
+
+    async def start(self) -> None:
+        if self._poller is None:
+            self._poller = asyncio.create_task(
+                self._poll(), name="broadcast-poller"
+            )
+
+    async def _poll(self) -> None:
+        while True:
+            await self._resume()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _resume(self) -> None:
+        try:
+            async with self.session_factory() as session:
+                broadcasts = BroadcastRepository(session)
+                resumable = await broadcasts.get_resumable(self.lease)
+                claimed = [
+                    id for id in resumable
+                    if await broadcasts.claim(id, self.lease)
+                ]
+        except (SQLAlchemyError, OSError):
+            logger.exception("Could not look up broadcasts to resume")
+            return
+        for id in claimed:
+            logger.info(f"Resuming broadcast {id}")
+            self.launch(id)
+
+    async def stop(self) -> None:
+        # The running batch is abandoned, not checkpointed: it is sent
+        # again when the broadcast resumes.
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def launch(self, broadcast_id: int) -> None:
+        if broadcast_id in self._tasks:
+            return
+        task = asyncio.create_task(
+            self._run(broadcast_id), name=f"broadcast-{broadcast_id}"
+        )
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+
+    def cancel(self, broadcast_id: int) -> bool:
+        task = self._tasks.get(broadcast_id)
+        if task is None:
+            return False
+        self._cancelled.add(broadcast_id)
+        task.cancel()
+        return True
+
+    def progress(self, broadcast_id: int) -> Optional[dict]:
+        progress = self._progress.get(broadcast_id)
+        if progress is None or broadcast_id not in self._tasks:
+            return None
+        return progress.snapshot()
+
+    def snapshot(self) -> dict:
+        return {
+            str(id): progress.snapshot()
+            for id, progress in self._progress.items()
+        }
+
+    async def _run(self, broadcast_id: int) -> None:
+        async with self.session_factory() as session:
+            broadcast = await BroadcastRepository(session).get_by_id(broadcast_id)
+        if broadcast is None or broadcast.status != BroadcastStatus.RUNNING:
+            return
+
+        progress = BroadcastProgress(
+            broadcast_id, broadcast.total, broadcast.last_user_id
+        )
+        self._progress[broadcast_id] = progress
+        status = BroadcastStatus.COMPLETED
+        try:
+            while True:
+                async with self.session_factory() as session:
+                    batch = await UserRepository(session).get_recipients_after(
+                        progress.last_user_id, self.batch_size
+                    )
+                if not batch:
+                    break
+                sent, failed, blocked = await self._send_batch(
+                    broadcast.text, batch
+                )
+                progress.sent += sent
+                progress.failed += failed
+                progress.blocked += blocked
+                progress.last_user_id = batch[-1][0]
+                async with self.session_factory() as session:
+                    running = await BroadcastRepository(session).checkpoint(
+                        broadcast_id,
+                        progress.last_user_id,
+                        sent=sent,
+                        failed=failed,
+                        blocked=blocked,
+                    )
+                if not running:
+                    # Cancelled through another worker
+                    return
+        except asyncio.CancelledError:
+            if broadcast_id not in self._cancelled:
+                # Shutting down: stays running and resumes later
+                raise
+            self._cancelled.discard(broadcast_id)
+            status = BroadcastStatus.CANCELLED
+        except Exception:
+            logger.exception(f"Broadcast {broadcast_id} failed")
+            status = BroadcastStatus.FAILED
+        finally:
+            self._progress.pop(broadcast_id, None)
+
+        async with self.session_factory() as session:
+            await BroadcastRepository(session).finish(broadcast_id, status)
+        logger.info(f"Broadcast {broadcast_id} finished: {status.value}")
+
+    async def _send_batch(
+        self, text: str, batch: List[Tuple[int, int]]
+    ) -> Tuple[int, int, int]:
+        futures = []
+        try:
+            for _, telegram_id in batch:
+                while True:
+                    try:
+                        futures.append(self.outbox.send_message(
+                            telegram_id, text=text, priority=SendPriority.BULK
+                        ))
+                        break
+                    except OutboxFullException:
+                        await asyncio.sleep(0.5)
+            results = await asyncio.gather(*futures, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Drop whatever the scheduler has not sent yet
+            for future in futures:
+                future.cancel()
+            raise
+
+        sent = failed = blocked = 0
+        for result in results:
+            if isinstance(result, Forbidden):
+                blocked += 1
+            elif isinstance(result, BaseException):
+                failed += 1
+            else:
+                sent += 1
+        return sent, failed, blocked
@@ -1,5 +1,9 @@
 from telegram.ext import CallbackContext, ExtBot, Application
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .outbound import OutboundScheduler
 
 
 @dataclass
@@ -25,3 +29,9 @@ class CustomContext(CallbackContext[ExtBot, dict, dict, dict]):
         if isinstance(update, WebhookUpdate):
             return cls(application=application, user_id=update.user_id)
         return super().from_update(update, application)
+
+    @property
+    def outbox(self) -> "OutboundScheduler":
+        """Rate limited sending that does not wait for delivery."""
+        from . import outbox
+        return outbox
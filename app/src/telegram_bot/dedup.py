@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import Optional
+from src.sessions.kv import KeyValueClient
+import logging
+import math
+import re
+
+logger = logging.getLogger(__name__)
+
+# Telegram serializes update_id as the first key
+LEADING_UPDATE_ID = re.compile(rb'\s*\{\s*"update_id"\s*:\s*(\d+)\s*[,}]')
+
+
+def peek_update_id(body: bytes) -> Optional[int]:
+    """update_id of a raw webhook body without parsing the JSON."""
+    match = LEADING_UPDATE_ID.match(body, 0, 64)
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class DedupMetrics:
+    checked: int = 0
+    duplicates: int = 0
+    released: int = 0
+    resets: int = 0
+    store_errors: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "hit_rate": self.duplicates / self.checked if self.checked else 0.0,
+            "released": self.released,
+            "resets": self.resets,
+            "store_errors": self.store_errors,
+        }
+
+
+class UpdateIdWindow:
+    """Which of the last `size` update ids were seen, one bit per id.
+
+    Update ids grow by one per update, so the bitmap is a ring indexed
+    by `update_id % size` that slides with the highest id seen. An id
+    `size` or more below that one restarts the window: after a week
+    without updates Telegram picks the next id at random.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(8, size)
+        self.highest: Optional[int] = None
+        self.resets = 0
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _slot(self, update_id: int):
+        index = update_id % self.size
+        return index >> 3, 1 << (index & 7)
+
+    def _clear(self, update_id: int) -> None:
+        byte, bit = self._slot(update_id)
+        self._bits[byte] &= ~bit & 0xFF
+
+    def _restart(self, update_id: int) -> None:
+        if self.highest is not None:
+            self.resets += 1
+        self._bits = bytearray(len(self._bits))
+        self.highest = update_id
+
+    def add(self, update_id: int) -> bool:
+        """Mark `update_id` seen; False if it already was."""
+        if self.highest is None or update_id <= self.highest - self.size:
+            self._restart(update_id)
+        elif update_id > self.highest:
+            if update_id - self.highest >= self.size:
+                self._bits = bytearray(len(self._bits))
+            else:
+                # Slots now entering the window still hold old ids
+                for newer in range(self.highest + 1, update_id + 1):
+                    self._clear(newer)
+            self.highest = update_id
+        byte, bit = self._slot(update_id)
+        if self._bits[byte] & bit:
+            return False
+        self._bits[byte] |= bit
+        return True
+
+    def discard(self, update_id: int) -> None:
+        if self.highest is None:
+            return
+        if self.highest - self.size < update_id <= self.highest:
+            self._clear(update_id)
+
+
+class UpdateDeduplicator:
+    """Drops redelivered webhook updates by `update_id`.
+
+    Each process checks its own `UpdateIdWindow` first. With a shared
+    `store` (Redis) the first worker to `SET NX` an id wins, so
+    deployments where a retry can reach another worker still handle
+    it once; if the store fails the update is let through (handled at
+    least once rather than lost). An update that could not be queued
+    must be `release`d so its redelivery is not taken as a duplicate.
+    """
+
+    KEY_PREFIX = "update:"
+
+    def __init__(
+        self,
+        window: int,
+        store: Optional[KeyValueClient] = None,
+        store_ttl: float = 3600,
+    ):
+        self.window = UpdateIdWindow(window)
+        self.store = store
+        self.store_ttl_ms = math.ceil(store_ttl * 1000)
+        self.metrics = DedupMetrics()
+
+    async def seen(self, update_id: int) -> bool:
+        self.metrics.checked += 1
+        duplicate = not self.window.add(update_id)
+        if not duplicate and self.store is not None:
+            try:
+                duplicate = not await self.store.set(
+                    self.KEY_PREFIX + str(update_id),
+                    b"1",
+                    px=self.store_ttl_ms,
+                    nx=True,
+                )
+            except Exception:
+                self.metrics.store_errors += 1
+                logger.exception("Update dedup store failed")
+            if duplicate:
+                # Taken by another worker, which may still release it
+                self.window.discard(update_id)
+        if duplicate:
+            self.metrics.duplicates += 1
+        return duplicate
+
+    async def release(self, update_id: int) -> None:
+        self.metrics.released += 1
+        self.window.discard(update_id)
+        if self.store is not None:
+            try:
+                await self.store.delete(self.KEY_PREFIX + str(update_id))
+            except Exception:
+                self.metrics.store_errors += 1
+                logger.exception("Update dedup store failed")
+
+    def snapshot(self) -> dict:
+        self.metrics.resets = self.window.resets
+        return {
+            "window": self.window.size,
+            "highest": self.window.highest,
+            **self.metrics.snapshot(),
+        }
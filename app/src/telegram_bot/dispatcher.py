@@ -0,0 +1,197 @@
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, List
+from telegram import Update
+from telegram.ext import Application, BaseHandler
+from .ingest import raw_shard_key
+import asyncio
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchQueueFullException(Exception):
+    """Raised when an update cannot be queued without exceeding the bound"""
+    pass
+
+
+@dataclass
+class LatencyStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_seconds": self.total_seconds / self.count if self.count else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+
+@dataclass
+class DispatcherMetrics:
+    accepted: int = 0
+    rejected: int = 0
+    filtered: int = 0
+    processed: int = 0
+    failed: int = 0
+    lag: LatencyStats = field(default_factory=LatencyStats)
+    handlers: Dict[str, LatencyStats] = field(default_factory=dict)
+
+    def observe_handler(self, name: str, seconds: float) -> None:
+        self.handlers.setdefault(name, LatencyStats()).observe(seconds)
+
+
+def shard_key(update: object) -> int:
+    """Updates with the same key are processed strictly in order."""
+    if isinstance(update, dict):
+        return raw_shard_key(update)
+    if isinstance(update, Update):
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return update.update_id
+    user_id = getattr(update, "user_id", None)
+    return user_id if isinstance(user_id, int) else id(update)
+
+
+class UpdateDispatcher:
+    """Bounded, chat-ordered update processing in front of `Application`.
+
+    Updates are sharded by chat onto `workers` queues. Each worker awaits
+    `Application.process_update` one update at a time, so a chat's
+    updates keep their order while other chats run concurrently. The
+    queues are bounded; `submit` raises `DispatchQueueFullException`
+    instead of blocking so the webhook can ask Telegram to retry.
+
+    Raw update payloads (dicts) are accepted too and only turned into
+    `Update` objects by the worker, off the request path.
+    """
+
+    def __init__(self, application: Application, workers: int, max_queue: int):
+        self.application = application
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.metrics = DispatcherMetrics()
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._draining = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and not any(t.done() for t in self._tasks)
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        per_worker = math.ceil(self.max_queue / self.workers)
+        self._queues = [
+            asyncio.Queue(maxsize=per_worker) for _ in range(self.workers)
+        ]
+        self._tasks = [
+            asyncio.create_task(self._work(queue), name=f"update-worker-{i}")
+            for i, queue in enumerate(self._queues)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+        self._draining = False
+
+    async def join(self) -> None:
+        """Wait until every queued update has been processed."""
+        for queue in self._queues:
+            await queue.join()
+
+    async def drain(self, timeout: float) -> bool:
+        """Refuse new updates and give queued ones up to `timeout` seconds.
+
+        Returns False if updates were still queued at the deadline.
+        """
+        self._draining = True
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def submit(self, update: object) -> None:
+        if not self._queues or self._draining:
+            raise DispatchQueueFullException("Update dispatcher is not running")
+        queue = self._queues[shard_key(update) % self.workers]
+        try:
+            queue.put_nowait((time.monotonic(), update))
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            raise DispatchQueueFullException("Update queue is full")
+        self.metrics.accepted += 1
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            enqueued, update = await queue.get()
+            self.metrics.lag.observe(time.monotonic() - enqueued)
+            try:
+                if isinstance(update, dict):
+                    update = Update.de_json(update, self.application.bot)
+                await self.application.process_update(update)
+                self.metrics.processed += 1
+            except Exception:
+                # Handler errors go through the application's error
+                # handlers; this only catches failures of the machinery.
+                self.metrics.failed += 1
+                logger.exception("Failed to process update")
+            finally:
+                queue.task_done()
+
+    def instrument(self, handlers: List[BaseHandler]) -> None:
+        """Wrap handler callbacks to record per-handler latency."""
+        for handler in handlers:
+            handler.callback = self._timed(handler.callback)
+
+    def _timed(self, callback: Callable[..., Any]) -> Callable[..., Any]:
+        name = getattr(callback, "__qualname__", repr(callback))
+
+        @wraps(callback)
+        async def timed_callback(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            finally:
+                self.metrics.observe_handler(name, time.perf_counter() - started)
+
+        return timed_callback
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self.running,
+            "draining": self._draining,
+            "workers": self.workers,
+            "capacity": self.max_queue,
+            "depth": self.depth(),
+            "depth_per_worker": [q.qsize() for q in self._queues],
+            "accepted": self.metrics.accepted,
+            "rejected": self.metrics.rejected,
+            "filtered": self.metrics.filtered,
+            "processed": self.metrics.processed,
+            "failed": self.metrics.failed,
+            "lag": self.metrics.lag.snapshot(),
+            "handlers": {
+                name: stats.snapshot()
+                for name, stats in self.metrics.handlers.items()
+            },
+        }
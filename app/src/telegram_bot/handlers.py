@@ -1,6 +1,7 @@
 import logging
 from telegram import Update
 from .custom_context import CustomContext
+from .outbound import SendPriority
 
 logger = logging.getLogger(__name__)
 
@@ -8,4 +9,8 @@ logger = logging.getLogger(__name__)
 async def start(update: Update, context: CustomContext) -> None:
     logger.info(f"bot is started with : {update.effective_user.id}")
 
-    await context.bot.send_message(update.effective_chat.id, text="bot is on.")
+    context.outbox.send_message(
+        update.effective_chat.id,
+        text="bot is on.",
+        priority=SendPriority.INTERACTIVE,
+    )
@@ -0,0 +1,116 @@
+from typing import Any, Dict, Iterable, Optional, Set
+from telegram.ext import BaseHandler, CommandHandler, filters
+from .dedup import peek_update_id
+import re
+
+try:
+    # Optional: several times faster than the stdlib on update payloads
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Telegram sends exactly one of these next to `update_id`
+UPDATE_KINDS = (
+    "message", "edited_message", "channel_post", "edited_channel_post",
+    "business_message", "edited_business_message", "callback_query",
+    "inline_query", "chosen_inline_result", "shipping_query",
+    "pre_checkout_query", "poll", "poll_answer", "my_chat_member",
+    "chat_member", "chat_join_request", "message_reaction",
+    "message_reaction_count", "chat_boost", "removed_chat_boost",
+    "business_connection", "deleted_business_messages", "purchased_paid_media",
+)
+
+
+def parse_update_body(body: bytes) -> Dict[str, Any]:
+    """Parse a webhook body; raises ValueError on anything but an update."""
+    payload = json_loads(body)
+    if not isinstance(payload, dict) or not isinstance(payload.get("update_id"), int):
+        raise ValueError("Not a Telegram update")
+    return payload
+
+
+def update_kind(payload: Dict[str, Any]) -> str | None:
+    for kind in UPDATE_KINDS:
+        if kind in payload:
+            return kind
+    return None
+
+
+def raw_shard_key(payload: Dict[str, Any]) -> int:
+    """Chat (or user) id of a raw update, matching `dispatcher.shard_key`."""
+    kind = update_kind(payload)
+    body = payload.get(kind) if kind else None
+    if isinstance(body, dict):
+        chat = body.get("chat") or (body.get("message") or {}).get("chat")
+        if isinstance(chat, dict) and isinstance(chat.get("id"), int):
+            return chat["id"]
+        sender = body.get("from") or body.get("user")
+        if isinstance(sender, dict) and isinstance(sender.get("id"), int):
+            return sender["id"]
+    return payload["update_id"]
+
+
+# Telegram writes `id` first in Chat and User objects, and a message's
+# own `chat` before any nested message. A quote inside a JSON string is
+# escaped, so these cannot match message text.
+RAW_CHAT_ID = re.compile(rb'"chat"\s*:\s*\{\s*"id"\s*:\s*(-?\d+)')
+RAW_SENDER_ID = re.compile(rb'"(?:from|user)"\s*:\s*\{\s*"id"\s*:\s*(\d+)')
+
+
+def peek_shard_key(body: bytes) -> Optional[int]:
+    """`raw_shard_key` of a webhook body read without parsing the JSON.
+
+    Returns None when the body does not start like an update; the
+    caller should parse it to find out what it is.
+    """
+    update_id = peek_update_id(body)
+    if update_id is None:
+        return None
+    for pattern in (RAW_CHAT_ID, RAW_SENDER_ID):
+        match = pattern.search(body)
+        if match:
+            return int(match.group(1))
+    return update_id
+
+
+class UpdatePrefilter:
+    """Cheap check on the raw payload for whether any handler could match.
+
+    Only `CommandHandler`s with their default message filter can be
+    reasoned about without building telegram objects; any other handler
+    switches the prefilter off so no update is ever dropped wrongly.
+    """
+
+    DEFAULT_COMMAND_KINDS = ("message", "edited_message")
+
+    def __init__(self, handlers: Iterable[BaseHandler]):
+        self.accept_all = False
+        self.commands_by_kind: Dict[str, Set[str]] = {}
+        for handler in handlers:
+            if (
+                isinstance(handler, CommandHandler)
+                and handler.filters is filters.UpdateType.MESSAGES
+            ):
+                for kind in self.DEFAULT_COMMAND_KINDS:
+                    self.commands_by_kind.setdefault(kind, set()).update(
+                        handler.commands
+                    )
+            else:
+                self.accept_all = True
+
+    def wants(self, payload: Dict[str, Any]) -> bool:
+        if self.accept_all:
+            return True
+
+        for kind, commands in self.commands_by_kind.items():
+            message = payload.get(kind)
+            if not isinstance(message, dict):
+                continue
+            text = message.get("text")
+            if not isinstance(text, str) or not text.startswith("/"):
+                return False
+            parts = text[1:].split(maxsplit=1)
+            if not parts:
+                return False
+            return parts[0].split("@", 1)[0].lower() in commands
+        return False
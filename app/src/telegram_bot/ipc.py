@@ -0,0 +1,214 @@
+"""Forwarding of raw webhook updates from API workers to bot workers.
+
+Each bot worker listens on its own Unix socket. A frame is a header of
+payload length and sequence number followed by the raw update JSON;
+the worker answers every frame with its sequence number and a status
+byte. Frames are pipelined, so one connection per API worker and shard
+carries any number of concurrent webhook requests; the worker handles
+them concurrently and replies in completion order.
+"""
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import itertools
+import logging
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+FRAME = struct.Struct("!IQ")
+REPLY = struct.Struct("!QB")
+MAX_FRAME = 1 << 20
+
+STATUS_ACCEPTED = 0
+STATUS_BUSY = 1
+STATUS_INVALID = 2
+
+
+class ForwardingUnavailableException(Exception):
+    """Raised when the bot worker for a shard cannot be reached"""
+    pass
+
+
+def socket_path(directory: str, shard: int) -> str:
+    return os.path.join(directory, f"bot-{shard}.sock")
+
+
+class UpdateIpcServer:
+    """Receives forwarded updates; `handle` returns a status byte."""
+
+    def __init__(self, path: str, handle: Callable[[bytes], Awaitable[int]]):
+        self.path = path
+        self.handle = handle
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set = set()
+        self._handlers: set = set()
+
+    async def start(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(
+            self._serve, path=self.path
+        )
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._connections):
+            writer.close()
+        # Not cancelled: an update taken by the deduplicator but never
+        # queued would be dropped as a duplicate when redelivered
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                length, sequence = FRAME.unpack(
+                    await reader.readexactly(FRAME.size)
+                )
+                if length > MAX_FRAME:
+                    logger.error(f"Oversized IPC frame of {length} bytes")
+                    return
+                payload = await reader.readexactly(length)
+                # A slow frame must not hold up the ones behind it
+                task = asyncio.create_task(self.handle(payload))
+                self._handlers.add(task)
+                task.add_done_callback(partial(self._reply, writer, sequence))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _reply(
+        self, writer: asyncio.StreamWriter, sequence: int, task: asyncio.Task
+    ) -> None:
+        self._handlers.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(
+                "Forwarded update could not be handled",
+                exc_info=task.exception(),
+            )
+            status = STATUS_BUSY
+        else:
+            status = task.result()
+        if not writer.is_closing():
+            # Whole replies only, so writes from callbacks never interleave
+            writer.write(REPLY.pack(sequence, status))
+
+
+class ShardConnection:
+    """Pipelined client connection to one bot worker."""
+
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self._sequence = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connecting = asyncio.Lock()
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        async with self._connecting:
+            if self._writer is None or self._writer.is_closing():
+                try:
+                    reader, self._writer = await asyncio.wait_for(
+                        asyncio.open_unix_connection(self.path), self.timeout
+                    )
+                except (OSError, asyncio.TimeoutError) as e:
+                    raise ForwardingUnavailableException(
+                        f"Bot worker at {self.path} is unreachable"
+                    ) from e
+                self._reader_task = asyncio.create_task(self._read(reader))
+            return self._writer
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                sequence, status = REPLY.unpack(
+                    await reader.readexactly(REPLY.size)
+                )
+                future = self._pending.pop(sequence, None)
+                if future is not None and not future.done():
+                    future.set_result(status)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ForwardingUnavailableException(
+                    f"Lost connection to bot worker at {self.path}"
+                ))
+
+    async def send(self, payload: bytes) -> int:
+        writer = await self._connect()
+        sequence = next(self._sequence)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[sequence] = future
+        try:
+            writer.write(FRAME.pack(len(payload), sequence) + payload)
+            await writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            self._pending.pop(sequence, None)
+            writer.close()
+            raise ForwardingUnavailableException(
+                f"Bot worker at {self.path} did not answer"
+            ) from e
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        self._writer = None
+        self._reader_task = None
+
+
+class UpdateForwarder:
+    """Routes each update to the bot worker owning its chat."""
+
+    def __init__(self, paths: List[str], timeout: float):
+        self.connections = [ShardConnection(path, timeout) for path in paths]
+
+    async def forward(self, payload: bytes, key: int) -> int:
+        connection = self.connections[key % len(self.connections)]
+        return await connection.send(payload)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(c.close() for c in self.connections))
+
+
+async def wait_for_sockets(paths: List[str], timeout: float) -> bool:
+    """Poll until every bot worker accepts connections."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    waiting = list(paths)
+    while waiting and loop.time() < deadline:
+        path = waiting[0]
+        try:
+            _, writer = await asyncio.open_unix_connection(path)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        waiting.pop(0)
+    return not waiting
@@ -0,0 +1,125 @@
+from enum import Enum
+from typing import Optional
+from telegram.ext import Application
+from src.sessions import SessionReaper
+from .broadcast import BroadcastEngine
+from .dispatcher import UpdateDispatcher
+from .outbound import OutboundScheduler
+from .registration import UserRegistrar
+from .webhook import WebhookRegistration
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LifecycleState(str, Enum):
+    STARTING = "starting"
+    READY = "ready"
+    DRAINING = "draining"
+    STOPPED = "stopped"
+
+
+class BotLifecycle:
+    """Starts and stops the update-handling side in dependency order.
+
+    Start: the `Application` (bot HTTP session, persisted bot data),
+    then the outbound scheduler, user registration, the update
+    dispatcher and finally broadcasts, the webhook registration and the
+    session reaper job, the last three only in the `primary` process of
+    a deployment. Stop runs the other way round
+    after the dispatcher has refused new updates and had up to
+    `drain_timeout` seconds for the queued ones, so replies sent by the
+    last handlers still go out and persisted data is flushed last.
+
+    `ready` is what load balancers should route on; `alive` only fails
+    when update workers died while the process claims to be ready.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        dispatcher: UpdateDispatcher,
+        outbox: OutboundScheduler,
+        registrar: UserRegistrar,
+        broadcasts: BroadcastEngine,
+        drain_timeout: float,
+        webhook: Optional[WebhookRegistration] = None,
+        reaper: Optional[SessionReaper] = None,
+    ):
+        self.application = application
+        self.dispatcher = dispatcher
+        self.outbox = outbox
+        self.registrar = registrar
+        self.broadcasts = broadcasts
+        self.drain_timeout = drain_timeout
+        self.webhook = webhook
+        self.reaper = reaper
+        self.state = LifecycleState.STOPPED
+
+    @property
+    def ready(self) -> bool:
+        return self.state == LifecycleState.READY and self.dispatcher.running
+
+    @property
+    def alive(self) -> bool:
+        return self.state != LifecycleState.READY or self.dispatcher.running
+
+    async def start(self, primary: bool = True) -> None:
+        self.state = LifecycleState.STARTING
+        await self.application.initialize()
+        await self.application.start()
+        await self.outbox.start()
+        await self.registrar.start()
+        await self.dispatcher.start()
+        if primary:
+            await self.broadcasts.start()
+            if self.webhook is not None:
+                await self.webhook.apply(self.application.bot)
+            if self.reaper is not None:
+                self._schedule_reaper()
+        self.state = LifecycleState.READY
+
+    def _schedule_reaper(self) -> None:
+        job_queue = self.application.job_queue
+        if job_queue is None:
+            logger.warning(
+                "No job queue (python-telegram-bot[job-queue] missing), "
+                "expired sessions are not reaped"
+            )
+            return
+        job_queue.run_repeating(
+            self.reaper.job,
+            interval=self.reaper.interval,
+            first=min(60.0, self.reaper.interval),
+            name="session-reaper",
+        )
+
+    def begin_drain(self) -> None:
+        """Fail readiness while updates are still being accepted."""
+        if self.state == LifecycleState.READY:
+            self.state = LifecycleState.DRAINING
+
+    async def stop(self) -> None:
+        if self.state == LifecycleState.STOPPED:
+            return
+        self.state = LifecycleState.DRAINING
+        await self.broadcasts.stop()
+        if not await self.dispatcher.drain(self.drain_timeout):
+            logger.warning(
+                f"{self.dispatcher.depth()} updates still queued after "
+                f"{self.drain_timeout}s are dropped"
+            )
+        await self.dispatcher.stop()
+        await self.registrar.stop()
+        await self.outbox.stop()
+        if self.application.running:
+            await self.application.stop()
+        await self.application.shutdown()
+        self.state = LifecycleState.STOPPED
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state.value,
+            "ready": self.ready,
+            "alive": self.alive,
+        }
@@ -0,0 +1,424 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+from enum import IntEnum
+from heapq import heappop, heappush
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+import asyncio
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxFullException(Exception):
+    """Raised when a message cannot be queued without exceeding the bound"""
+    pass
+
+
+class SendPriority(IntEnum):
+    """Lower values are sent first when several chats are ready."""
+    INTERACTIVE = 0
+    NORMAL = 1
+    BULK = 2
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float = -1.0
+    updated: float = field(default_factory=time.monotonic)
+    paused_until: float = 0.0
+
+    def __post_init__(self):
+        if self.tokens < 0:
+            self.tokens = self.capacity
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token can be taken; 0 if one is available."""
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.paused_until - now)
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, now: float, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = max(self.updated, now)
+
+    def idle(self, now: float) -> bool:
+        return self.delay(now) == 0 and self.tokens >= self.capacity
+
+
+@dataclass
+class OutboundMessage:
+    method: str
+    kwargs: Dict[str, Any]
+    priority: SendPriority
+    future: asyncio.Future
+    coalesce_key: Hashable
+    attempts: int = 0
+    flood_waits: int = 0
+
+
+@dataclass
+class ChatOutbox:
+    chat_id: int
+    bucket: TokenBucket
+    # (priority, sequence, message); the sequence keeps FIFO per priority
+    queue: List[Tuple[int, int, OutboundMessage]] = field(default_factory=list)
+    pending: Dict[Hashable, OutboundMessage] = field(default_factory=dict)
+    scheduled: bool = False
+    in_flight: bool = False
+
+
+@dataclass
+class OutboxMetrics:
+    submitted: int = 0
+    coalesced: int = 0
+    rejected: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    flood_waits: int = 0
+
+
+def retry_after_seconds(exc: RetryAfter) -> float:
+    retry_after = exc.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class OutboundScheduler:
+    """Rate limited, non-blocking delivery of Bot API calls.
+
+    `submit` queues a call and returns a future right away; handlers
+    never wait on Telegram. Calls are released through a global token
+    bucket and one bucket per chat (groups get the slower group rate),
+    highest `SendPriority` first among chats that are ready, and in
+    FIFO order within a chat. Queuing a call identical to one still
+    pending for the chat, or one with the same `coalesce_key`, merges
+    them: the pending call is kept (updated to the newest arguments for
+    an explicit key) and both callers get the same future.
+
+    A flood wait (HTTP 429) pauses the chat for the advertised time and
+    halves the global rate, which then recovers a little on every
+    successful send; a call is resent after at most `max_flood_waits`
+    of them. Network errors are retried `max_retries` times with
+    backoff, other errors fail the future.
+    """
+
+    SWEEP_INTERVAL = 10.0
+
+    def __init__(
+        self,
+        bot: Bot,
+        global_rate: float,
+        chat_rate: float,
+        group_rate: float,
+        max_in_flight: int,
+        max_pending: int,
+        max_retries: int,
+        max_flood_waits: int,
+    ):
+        self.bot = bot
+        self.max_global_rate = global_rate
+        self.min_global_rate = max(1.0, global_rate / 8)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_pending = max(1, max_pending)
+        self.max_retries = max_retries
+        self.max_flood_waits = max_flood_waits
+        self.metrics = OutboxMetrics()
+        # A small burst keeps any one-second window close to `global_rate`
+        self._global = TokenBucket(rate=global_rate, capacity=1)
+        self._chats: Dict[int, ChatOutbox] = {}
+        self._ready: List[Tuple[int, int, int]] = []
+        self._waiting: List[Tuple[float, int, int]] = []
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._deliveries: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.create_task(self._run(), name="outbound-scheduler")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Give queued calls up to `timeout` seconds, then cancel the rest."""
+        if self._task is None:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._deliveries) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(self._task, *self._deliveries, return_exceptions=True)
+        for chat in self._chats.values():
+            for _, _, message in chat.queue:
+                message.future.cancel()
+        self._chats.clear()
+        self._ready.clear()
+        self._waiting.clear()
+        self._pending = 0
+        self._task = None
+
+    def send_message(
+        self,
+        chat_id: int,
+        text: str,
+        priority: SendPriority = SendPriority.NORMAL,
+        coalesce_key: Optional[Hashable] = None,
+        **kwargs,
+    ) -> asyncio.Future:
+        return self.submit(
+            "send_message", chat_id, priority, coalesce_key, text=text, **kwargs
+        )
+
+    def submit(
+        self,
+        method: str,
+        chat_id: int,
+        priority: SendPriority = SendPriority.NORMAL,
+        coalesce_key: Optional[Hashable] = None,
+        **kwargs,
+    ) -> asyncio.Future:
+        """Queue `bot.<method>(chat_id=chat_id, **kwargs)` for delivery."""
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            chat = ChatOutbox(chat_id, TokenBucket(rate=rate, capacity=1))
+            self._chats[chat_id] = chat
+
+        explicit = coalesce_key is not None
+        key = (method, coalesce_key if explicit else repr(sorted(kwargs.items())))
+        queued = chat.pending.get(key)
+        if queued is not None and not queued.future.done():
+            if explicit:
+                queued.kwargs = kwargs
+            self.metrics.coalesced += 1
+            return queued.future
+
+        if self._pending >= self.max_pending:
+            self.metrics.rejected += 1
+            raise OutboxFullException("Outbound queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._log_failure)
+        message = OutboundMessage(method, kwargs, priority, future, key)
+        heappush(chat.queue, (priority, next(self._sequence), message))
+        chat.pending[key] = message
+        self._pending += 1
+        self.metrics.submitted += 1
+        self._schedule(chat, time.monotonic())
+        return future
+
+    def _schedule(self, chat: ChatOutbox, now: float) -> None:
+        if chat.scheduled or chat.in_flight or not chat.queue:
+            return
+        chat.scheduled = True
+        delay = chat.bucket.delay(now)
+        if delay > 0:
+            heappush(
+                self._waiting, (now + delay, next(self._sequence), chat.chat_id)
+            )
+        else:
+            heappush(
+                self._ready, (chat.queue[0][0], next(self._sequence), chat.chat_id)
+            )
+        self._wakeup.set()
+
+    def _promote(self, now: float) -> None:
+        while self._waiting and self._waiting[0][0] <= now:
+            _, _, chat_id = heappop(self._waiting)
+            chat = self._chats.get(chat_id)
+            if chat is not None and chat.queue:
+                heappush(
+                    self._ready, (chat.queue[0][0], next(self._sequence), chat_id)
+                )
+
+    def _sweep(self, now: float) -> None:
+        idle = [
+            chat_id for chat_id, chat in self._chats.items()
+            if not chat.queue and not chat.in_flight and chat.bucket.idle(now)
+        ]
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    async def _run(self) -> None:
+        next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            if now >= next_sweep:
+                self._sweep(now)
+                next_sweep = now + self.SWEEP_INTERVAL
+            self._promote(now)
+
+            if not self._ready:
+                timeout = self._waiting[0][0] - now if self._waiting else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = self._global.delay(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            await self._slots.acquire()
+
+            now = time.monotonic()
+            _, _, chat_id = heappop(self._ready)
+            chat = self._chats.get(chat_id)
+            if chat is None or not chat.queue:
+                self._slots.release()
+                continue
+            chat.scheduled = False
+            if chat.bucket.delay(now) > 0:
+                # Paused by a flood wait after it was marked ready
+                self._slots.release()
+                self._schedule(chat, now)
+                continue
+
+            chat.bucket.consume(now)
+            self._global.consume(now)
+            _, _, message = heappop(chat.queue)
+            chat.pending.pop(message.coalesce_key, None)
+            if message.future.cancelled():
+                # The caller gave up on it before it was sent
+                self._pending -= 1
+                self._slots.release()
+                self._schedule(chat, now)
+                continue
+            chat.in_flight = True
+            task = asyncio.create_task(self._deliver(chat, message))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, chat: ChatOutbox, message: OutboundMessage) -> None:
+        settled = True
+        try:
+            result = await getattr(self.bot, message.method)(
+                chat_id=chat.chat_id, **message.kwargs
+            )
+        except RetryAfter as exc:
+            self.metrics.flood_waits += 1
+            seconds = retry_after_seconds(exc)
+            chat.bucket.pause(time.monotonic(), seconds)
+            self._global.rate = max(self.min_global_rate, self._global.rate / 2)
+            logger.warning(
+                f"Flood wait of {seconds}s for chat {chat.chat_id}, "
+                f"global rate now {self._global.rate:.1f}/s"
+            )
+            message.flood_waits += 1
+            settled = self._retry(
+                chat, message, exc, message.flood_waits > self.max_flood_waits
+            )
+        except BadRequest as exc:
+            # A subclass of NetworkError, but resending will not help
+            self._fail(message, exc)
+        except NetworkError as exc:
+            chat.bucket.pause(time.monotonic(), min(2 ** message.attempts, 30))
+            message.attempts += 1
+            settled = self._retry(
+                chat, message, exc, message.attempts > self.max_retries
+            )
+        except asyncio.CancelledError:
+            message.future.cancel()
+            raise
+        except Exception as exc:
+            self._fail(message, exc)
+        else:
+            self._global.rate = min(
+                self.max_global_rate,
+                self._global.rate + self.max_global_rate / 100,
+            )
+            if not message.future.done():
+                message.future.set_result(result)
+        finally:
+            if settled:
+                self._pending -= 1
+            chat.in_flight = False
+            self._slots.release()
+            self._schedule(chat, time.monotonic())
+
+    def _retry(
+        self,
+        chat: ChatOutbox,
+        message: OutboundMessage,
+        exc: Exception,
+        give_up: bool,
+    ) -> bool:
+        """Requeue at the head of the chat; returns True if it gave up."""
+        if give_up:
+            self._fail(message, exc)
+            return True
+        self.metrics.retried += 1
+        heappush(
+            chat.queue,
+            (SendPriority.INTERACTIVE, -next(self._sequence), message),
+        )
+        return False
+
+    @staticmethod
+    def _fail(message: OutboundMessage, exc: BaseException) -> None:
+        # The caller may have cancelled the future while it was in flight
+        if not message.future.done():
+            message.future.set_exception(exc)
+
+    def _log_failure(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if isinstance(exc, Forbidden):
+            # Blocked by the user or kicked from the chat; routine
+            self.metrics.failed += 1
+            logger.info(f"Outbound call refused: {exc!r}")
+        elif exc is not None:
+            self.metrics.failed += 1
+            logger.warning(f"Outbound call failed: {exc!r}")
+        else:
+            self.metrics.sent += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": self._pending,
+            "capacity": self.max_pending,
+            "in_flight": len(self._deliveries),
+            "chats": len(self._chats),
+            "global_rate": self._global.rate,
+            "submitted": self.metrics.submitted,
+            "coalesced": self.metrics.coalesced,
+            "rejected": self.metrics.rejected,
+            "sent": self.metrics.sent,
+            "failed": self.metrics.failed,
+            "retried": self.metrics.retried,
+            "flood_waits": self.metrics.flood_waits,
+        }
@@ -0,0 +1,259 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple, Union
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from telegram.ext import BasePersistence, PersistenceInput
+from src.database.models import BotStateKind
+from src.database.repositories import BotStateRepository
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+StateKey = Tuple[BotStateKind, str]
+ConversationKey = Tuple[Union[int, str], ...]
+ConversationDict = Dict[ConversationKey, object]
+
+
+@dataclass
+class PersistenceMetrics:
+    loads: int = 0
+    load_misses: int = 0
+    unchanged: int = 0
+    changed_keys: int = 0
+    rows_written: int = 0
+    rows_deleted: int = 0
+    flushes: int = 0
+    errors: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "loads": self.loads,
+            "load_misses": self.load_misses,
+            "unchanged": self.unchanged,
+            "changed_keys": self.changed_keys,
+            "rows_written": self.rows_written,
+            "rows_deleted": self.rows_deleted,
+            "flushes": self.flushes,
+            "errors": self.errors,
+        }
+
+
+def digest(data: Dict[str, Any]) -> Dict[str, int]:
+    """Per-key fingerprint used to tell which keys changed."""
+    return {
+        key: hash(json.dumps(value, sort_keys=True))
+        for key, value in data.items()
+    }
+
+
+class DatabasePersistence(BasePersistence[dict, dict, dict]):
+    """`BasePersistence` on the `bot_state` table.
+
+    Data is stored as JSON, so `user_data`/`chat_data`/`bot_data` must
+    hold JSON-serializable values under string keys. Entries are cached
+    and written without re-reading, so only one process may use the
+    table at a time (see `BOT_PERSISTENCE`).
+
+    Nothing per user or chat is read at startup: `get_user_data` and
+    `get_chat_data` return empty mappings and an entry is loaded by
+    `refresh_user_data`/`refresh_chat_data` the first time an update
+    for it is handled. The application hands over every entry it
+    touched once per `update_interval`; each key is compared with a
+    fingerprint of what was last written, and unchanged entries are
+    dropped. The changed ones from that round are written together in
+    one upsert (plus one delete for dropped entries).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        update_interval: float,
+    ):
+        super().__init__(
+            store_data=PersistenceInput(callback_data=False),
+            update_interval=update_interval,
+        )
+        self.session_factory = session_factory
+        self.metrics = PersistenceMetrics()
+        self._loaded: Set[StateKey] = set()
+        self._digests: Dict[StateKey, Dict[str, int]] = {}
+        # None marks an entry to delete
+        self._staged: Dict[StateKey, Optional[Any]] = {}
+        self._staged_digests: Dict[StateKey, Dict[str, int]] = {}
+        self._conversations: Dict[str, ConversationDict] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    # region loading
+
+    async def _load(self, state_key: StateKey) -> Optional[Any]:
+        async with self.session_factory() as session:
+            data = await BotStateRepository(session).get(*state_key)
+        self._loaded.add(state_key)
+        self.metrics.loads += 1
+        if data is None:
+            self.metrics.load_misses += 1
+        return data
+
+    async def _refresh(self, state_key: StateKey, target: dict) -> None:
+        if state_key in self._loaded:
+            return
+        data = await self._load(state_key)
+        if data:
+            for key, value in data.items():
+                target.setdefault(key, value)
+            self._digests[state_key] = digest(data)
+
+    async def get_user_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_chat_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        state_key = (BotStateKind.BOT, "")
+        data = await self._load(state_key) or {}
+        self._digests[state_key] = digest(data)
+        return data
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> ConversationDict:
+        data = await self._load((BotStateKind.CONVERSATION, name)) or {}
+        conversations = {
+            tuple(json.loads(key)): state for key, state in data.items()
+        }
+        self._conversations[name] = conversations
+        return dict(conversations)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        await self._refresh((BotStateKind.USER, str(user_id)), user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        await self._refresh((BotStateKind.CHAT, str(chat_id)), chat_data)
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        # Loaded once by get_bot_data; this process is the only writer
+        return None
+
+    # endregion
+
+    # region writing
+
+    def _stage(self, state_key: StateKey, data: dict) -> None:
+        if state_key not in self._loaded and not data:
+            # Never loaded and nothing to add: nothing to write
+            return
+        try:
+            new_digest = digest(data)
+        except (TypeError, ValueError):
+            self.metrics.errors += 1
+            logger.error(f"Bot state {state_key} is not JSON serializable")
+            return
+        old_digest = self._digests.get(state_key, {})
+        changed = sum(
+            1 for key in new_digest.keys() | old_digest.keys()
+            if new_digest.get(key) != old_digest.get(key)
+        )
+        if not changed:
+            self.metrics.unchanged += 1
+            return
+        self.metrics.changed_keys += changed
+        self._staged[state_key] = data
+        self._staged_digests[state_key] = new_digest
+        self._schedule_flush()
+
+    def _drop(self, state_key: StateKey) -> None:
+        self._staged[state_key] = None
+        self._staged_digests[state_key] = {}
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        # The application gathers all update_* calls of a round at once
+        # and they return without awaiting, so by the time this task
+        # runs the whole round is staged and goes out as one batch.
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(
+                self._write_staged(), name="bot-persistence-flush"
+            )
+
+    async def _write_staged(self) -> None:
+        await asyncio.sleep(0)
+        # Entries staged while a batch is in flight go out right after it
+        while self._staged:
+            if not await self._write_batch():
+                return
+
+    async def _write_batch(self) -> bool:
+        staged, self._staged = self._staged, {}
+        digests, self._staged_digests = self._staged_digests, {}
+        upserts = [
+            (kind, key, data)
+            for (kind, key), data in staged.items() if data is not None
+        ]
+        deletes = [
+            state_key for state_key, data in staged.items() if data is None
+        ]
+        try:
+            async with self.session_factory() as session:
+                await BotStateRepository(session).write(upserts, deletes)
+        except SQLAlchemyError:
+            self.metrics.errors += 1
+            # Put it back unless a newer version was staged meanwhile
+            for state_key, data in staged.items():
+                if state_key not in self._staged:
+                    self._staged[state_key] = data
+                    self._staged_digests[state_key] = digests[state_key]
+            return False
+        self.metrics.flushes += 1
+        self.metrics.rows_written += len(upserts)
+        self.metrics.rows_deleted += len(deletes)
+        self._digests.update(digests)
+        return True
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._stage((BotStateKind.USER, str(user_id)), data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._stage((BotStateKind.CHAT, str(chat_id)), data)
+
+    async def update_bot_data(self, data: dict) -> None:
+        self._stage((BotStateKind.BOT, ""), data)
+
+    async def update_callback_data(self, data: Any) -> None:
+        return None
+
+    async def update_conversation(
+        self, name: str, key: ConversationKey, new_state: Optional[object]
+    ) -> None:
+        conversations = self._conversations.setdefault(name, {})
+        if new_state is None:
+            conversations.pop(key, None)
+        else:
+            conversations[key] = new_state
+        self._stage((BotStateKind.CONVERSATION, name), {
+            json.dumps(list(key)): state
+            for key, state in conversations.items()
+        })
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._drop((BotStateKind.USER, str(user_id)))
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._drop((BotStateKind.CHAT, str(chat_id)))
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self._write_staged()
+
+    # endregion
+
+    def snapshot(self) -> dict:
+        return {
+            "loaded": len(self._loaded),
+            "staged": len(self._staged),
+            **self.metrics.snapshot(),
+        }
@@ -0,0 +1,211 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from telegram import User as TelegramUser
+from src.database.repositories import UserRepository
+from .ingest import update_kind
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (telegram_username, first_name, last_name)
+Profile = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+@dataclass
+class RegistrationMetrics:
+    observed: int = 0
+    unchanged: int = 0
+    buffered: int = 0
+    dropped: int = 0
+    flushes: int = 0
+    rows_written: int = 0
+    flush_errors: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "observed": self.observed,
+            "unchanged": self.unchanged,
+            "buffered": self.buffered,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "flush_errors": self.flush_errors,
+        }
+
+
+def _clip(value: Any, length: int) -> Optional[str]:
+    return value[:length] if isinstance(value, str) and value else None
+
+
+class UserRegistrar:
+    """Write-behind upsert of the Telegram users the bot hears from.
+
+    `observe` is synchronous and never touches the database: profiles
+    already written (kept in an LRU of `cache_size` telegram ids) are
+    skipped, everything else is buffered by telegram id, so a chatty
+    user costs one buffered row. The buffer is flushed as one
+    `INSERT ... ON CONFLICT (telegram_id) DO UPDATE` every `interval`
+    seconds, or as soon as it holds `max_rows` profiles. Past
+    `max_buffer` rows (the database being down) new profiles are
+    dropped; they are observed again on the user's next update.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+        max_rows: int,
+        max_buffer: int,
+        cache_size: int,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_rows = max(1, max_rows)
+        self.max_buffer = max(self.max_rows, max_buffer)
+        self.cache_size = cache_size
+        self.metrics = RegistrationMetrics()
+        self._known: OrderedDict[int, Profile] = OrderedDict()
+        self._buffer: Dict[int, Profile] = {}
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._run(), name="user-registrar"
+            )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Last chance for what is still buffered
+        await self.flush()
+
+    def observe(self, user: Optional[TelegramUser]) -> None:
+        if user is None or user.is_bot:
+            return
+        self._observe(user.id, (
+            _clip(user.username, 32),
+            _clip(user.first_name, 64),
+            _clip(user.last_name, 64),
+        ))
+
+    def observe_payload(self, payload: Dict[str, Any]) -> None:
+        """`observe` for a raw update dict, see `ingest.parse_update_body`."""
+        kind = update_kind(payload)
+        body = payload.get(kind) if kind else None
+        if not isinstance(body, dict):
+            return
+        sender = body.get("from") or body.get("user")
+        if not isinstance(sender, dict) or sender.get("is_bot"):
+            return
+        telegram_id = sender.get("id")
+        if not isinstance(telegram_id, int):
+            return
+        self._observe(telegram_id, (
+            _clip(sender.get("username"), 32),
+            _clip(sender.get("first_name"), 64),
+            _clip(sender.get("last_name"), 64),
+        ))
+
+    def _observe(self, telegram_id: int, profile: Profile) -> None:
+        self.metrics.observed += 1
+        if self._known.get(telegram_id) == profile:
+            self._known.move_to_end(telegram_id)
+            self.metrics.unchanged += 1
+            return
+        if telegram_id not in self._buffer and len(self._buffer) >= self.max_buffer:
+            self.metrics.dropped += 1
+            return
+        self._buffer[telegram_id] = profile
+        self.metrics.buffered += 1
+        if len(self._buffer) >= self.max_rows:
+            self._full.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            batch = dict(list(self._buffer.items())[:self.max_rows])
+            for telegram_id in batch:
+                del self._buffer[telegram_id]
+            try:
+                await self._write(batch)
+            except SQLAlchemyError:
+                self.metrics.flush_errors += 1
+                # Keep newer observations; retried on the next interval
+                for telegram_id, profile in batch.items():
+                    self._buffer.setdefault(telegram_id, profile)
+                return
+
+    async def _write(self, batch: Dict[int, Profile]) -> None:
+        rows = [
+            {
+                "telegram_id": telegram_id,
+                "telegram_username": username,
+                "first_name": first_name,
+                "last_name": last_name,
+            }
+            for telegram_id, (username, first_name, last_name) in batch.items()
+        ]
+        try:
+            async with self.session_factory() as session:
+                await UserRepository(session).upsert_telegram_profiles(rows)
+        except IntegrityError:
+            # Usually a username now owned by another row; isolate it
+            rows = await self._write_one_by_one(rows)
+        self.metrics.flushes += 1
+        self.metrics.rows_written += len(rows)
+        for row in rows:
+            self._remember(row["telegram_id"], batch[row["telegram_id"]])
+
+    async def _write_one_by_one(self, rows: List[dict]) -> List[dict]:
+        written = []
+        for row in rows:
+            for attempt in (row, {**row, "telegram_username": None}):
+                try:
+                    async with self.session_factory() as session:
+                        await UserRepository(session).upsert_telegram_profiles(
+                            [attempt]
+                        )
+                except IntegrityError:
+                    continue
+                written.append(row)
+                break
+            else:
+                logger.warning(
+                    f"Could not register telegram user {row['telegram_id']}"
+                )
+        return written
+
+    def _remember(self, telegram_id: int, profile: Profile) -> None:
+        self._known[telegram_id] = profile
+        self._known.move_to_end(telegram_id)
+        while len(self._known) > self.cache_size:
+            self._known.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": len(self._buffer),
+            "known": len(self._known),
+            **self.metrics.snapshot(),
+        }
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Optional
+from telegram import Bot
+from telegram.error import TelegramError
+from .outbound import TokenBucket
+import hashlib
+import hmac
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+def derive_secret(token: str) -> str:
+    """Webhook secret shared by every worker without extra config.
+
+    Telegram allows 1-256 characters of A-Z, a-z, 0-9, `_` and `-`.
+    """
+    return hmac.new(
+        token.encode(), b"webhook-secret-token", hashlib.sha256
+    ).hexdigest()
+
+
+@dataclass
+class WebhookRegistration:
+    url: str
+    secret: str
+    max_connections: int
+
+    async def apply(self, bot: Bot) -> None:
+        """Point Telegram at `url`; pending updates are kept."""
+        try:
+            await bot.set_webhook(
+                url=self.url,
+                secret_token=self.secret,
+                max_connections=self.max_connections,
+            )
+        except TelegramError:
+            # The webhook set last time keeps working unless the secret
+            # changed, in which case every delivery is now refused
+            logger.exception(f"Could not set the webhook to {self.url}")
+
+
+@dataclass
+class WebhookGuardMetrics:
+    admitted: int = 0
+    unauthorized: int = 0
+    too_large: int = 0
+    rate_limited: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "unauthorized": self.unauthorized,
+            "too_large": self.too_large,
+            "rate_limited": self.rate_limited,
+        }
+
+
+class WebhookGuard:
+    """Rejects webhook traffic before the body is read.
+
+    Checks, cheapest first: a token bucket per source IP (`ip_rate`
+    requests per second, bursts of `ip_burst`, at most `max_sources`
+    IPs tracked), the `X-Telegram-Bot-Api-Secret-Token` header in
+    constant time (skipped when `secret` is None), and the declared
+    `Content-Length` against `max_body`. Bodies without a length are
+    capped while being read, see `too_large`.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str],
+        max_body: int,
+        ip_rate: float,
+        ip_burst: float,
+        max_sources: int,
+    ):
+        if secret is None:
+            logger.warning(
+                "Neither WEBHOOK_SECRET nor WEBHOOK_URL is set: /webhook "
+                "accepts updates from anyone who knows its URL. Set "
+                "WEBHOOK_SECRET to the secret_token the webhook was "
+                "registered with."
+            )
+        self.secret = None if secret is None else secret.encode()
+        self.max_body = max_body
+        self.ip_rate = ip_rate
+        self.ip_burst = max(1.0, ip_burst)
+        self.max_sources = max_sources
+        self.metrics = WebhookGuardMetrics()
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def _allow(self, ip: str) -> bool:
+        if self.ip_rate <= 0:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.get(ip)
+        if bucket is None:
+            bucket = TokenBucket(self.ip_rate, self.ip_burst, updated=now)
+            self._buckets[ip] = bucket
+            if len(self._buckets) > self.max_sources:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(ip)
+        if bucket.delay(now) > 0:
+            return False
+        bucket.consume(now)
+        return True
+
+    def admit(
+        self,
+        ip: Optional[str],
+        secret: Optional[str],
+        content_length: Optional[str],
+    ) -> Optional[HTTPStatus]:
+        """None if the request may be read, else the status to answer."""
+        if not self._allow(ip or ""):
+            self.metrics.rate_limited += 1
+            return HTTPStatus.TOO_MANY_REQUESTS
+        if self.secret is not None and (
+            secret is None
+            or not hmac.compare_digest(secret.encode(), self.secret)
+        ):
+            self.metrics.unauthorized += 1
+            return HTTPStatus.FORBIDDEN
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                declared = self.max_body + 1
+            if declared > self.max_body:
+                self.metrics.too_large += 1
+                return HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        self.metrics.admitted += 1
+        return None
+
+    def too_large(self, size: int) -> bool:
+        """Checked while streaming a body that declared no length."""
+        if size <= self.max_body:
+            return False
+        self.metrics.admitted -= 1
+        self.metrics.too_large += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "tracked_sources": len(self._buckets),
+            **self.metrics.snapshot(),
+        }
@@ -0,0 +1,41 @@
+"""Bot worker process of the split deployment (see `src.main`).
+
+Owns the telegram `Application`, the update dispatcher and everything
+that sends to Telegram, and takes updates forwarded by the API workers
+over its Unix socket. Updates are sharded by chat across bot workers,
+so each chat is still handled by exactly one process.
+"""
+import asyncio
+import logging
+import signal
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(shard: int) -> None:
+    from src.database.config import engine
+    from src.telegram_bot import IPC_SOCKET_DIR, bot_lifecycle, ingest_body
+    from .ipc import UpdateIpcServer, socket_path
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    server = UpdateIpcServer(socket_path(IPC_SOCKET_DIR, shard), ingest_body)
+    # Broadcast claims keep them exclusive anyway; one sender is enough
+    await bot_lifecycle.start(primary=shard == 0)
+    try:
+        # Listening last: the API workers wait for this socket
+        await server.start()
+        logger.info(f"Bot worker {shard} ready")
+        await stopping.wait()
+        # Stop taking updates, then let the queued ones finish
+        await server.stop()
+    finally:
+        await bot_lifecycle.stop()
+        await engine.dispose()
+
+
+def run(shard: int) -> None:
+    asyncio.run(serve(shard))
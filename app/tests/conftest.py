@@ -0,0 +1,6 @@
+import os
+
+# Read when src.sessions and src.telegram_bot are imported; no test
+# talks to Telegram
+os.environ.setdefault("SESSION_TOKEN_KEY", "test-session-token-key")
+os.environ.setdefault("TELEGRAM_TOKEN", "123:test")
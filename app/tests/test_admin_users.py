@@ -0,0 +1,120 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.core.dependencies import db_session_dep
+from src.core.routers.admin import admin_router, authorize
+from src.database.models import User, UserRole
+import asyncio
+import bcrypt
+import pytest
+
+STORED_HASH = bcrypt.hashpw(b"Password1", bcrypt.gensalt(rounds=4))
+
+
+@pytest.fixture
+def client():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def create_users():
+        async with engine.begin() as conn:
+            await conn.run_sync(User.__table__.create)
+        async with factory() as session:
+            # The shape `upsert_telegram_profiles` writes: no phone, no password
+            session.add(User(
+                id=1, telegram_id=42, telegram_username="bot_user",
+                first_name="Bot", role=UserRole.USER,
+            ))
+            session.add(User(
+                id=2, phone_number="+15550001", role=UserRole.ADMIN,
+                password=STORED_HASH,
+            ))
+            await session.commit()
+
+    asyncio.run(create_users())
+
+    async def session_override():
+        async with factory() as session:
+            yield session
+
+    async def stored_password(id):
+        async with factory() as session:
+            return (await session.get(User, id)).password
+
+    app = FastAPI()
+    app.include_router(admin_router)
+    app.dependency_overrides[authorize] = lambda: None
+    app.dependency_overrides[db_session_dep] = session_override
+    with TestClient(app) as test_client:
+        test_client.stored_password = lambda id: asyncio.run(stored_password(id))
+        yield test_client
+    asyncio.run(engine.dispose())
+
+
+def test_lists_users_created_by_the_bot(client):
+    response = client.get("/api/v1/admin/user")
+
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert item["telegram_id"] == 42
+    assert item["phone_number"] is None
+    assert "password" not in item
+
+
+def test_get_never_returns_the_password(client):
+    item = client.get("/api/v1/admin/user").json()["items"][0]
+
+    response = client.get(f"/api/v1/admin/user/{item['id']}")
+
+    assert response.status_code == 200
+    assert "password" not in response.json()
+
+
+def test_patch_is_partial(client):
+    response = client.patch("/api/v1/admin/user/2", json={"first_name": "Ann"})
+
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Ann"
+    assert client.stored_password(2) == STORED_HASH
+
+
+def test_patch_with_the_stored_hash_keeps_the_password(client):
+    response = client.patch(
+        "/api/v1/admin/user/2",
+        json={"first_name": "Ann", "password": STORED_HASH.decode()}
+    )
+
+    assert response.status_code == 200
+    assert client.stored_password(2) == STORED_HASH
+
+
+def test_patch_with_plaintext_changes_the_password(client):
+    response = client.patch(
+        "/api/v1/admin/user/2", json={"password": "NewPassword1"}
+    )
+
+    assert response.status_code == 200
+    stored = client.stored_password(2)
+    assert bcrypt.checkpw(b"NewPassword1", stored)
+
+
+def test_cursor_pages_sorted_by_role(client):
+    params = {"pagination": "cursor", "page_size": 1, "sort_by": "role"}
+    first = client.get("/api/v1/admin/user", params=params).json()
+    second = client.get(
+        "/api/v1/admin/user", params={**params, "cursor": first["next_cursor"]}
+    ).json()
+
+    assert [item["role"] for item in first["items"] + second["items"]] == [
+        "admin", "user"
+    ]
+
+
+@pytest.mark.parametrize("sort_by", ["password", "first_name", "missing"])
+def test_sorting_on_undeclared_fields_is_rejected(client, sort_by):
+    response = client.get(
+        "/api/v1/admin/user",
+        params={"pagination": "cursor", "sort_by": sort_by}
+    )
+
+    assert response.status_code == 400
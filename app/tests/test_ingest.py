@@ -0,0 +1,107 @@
+from telegram.ext import CommandHandler, MessageHandler, filters
+from src.telegram_bot.ingest import UpdatePrefilter, parse_update_body, raw_shard_key
+from src.telegram_bot.ingest import peek_shard_key
+import json
+import pytest
+
+
+async def noop(update, context):
+    return None
+
+
+def message(text, chat_id=10, **extra):
+    return {
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 99, "is_bot": False, "first_name": "A"},
+            "text": text,
+            **extra,
+        },
+    }
+
+
+@pytest.fixture
+def prefilter():
+    return UpdatePrefilter([CommandHandler(["start", "help"], noop)])
+
+
+@pytest.mark.parametrize("text", ["/start", "/START", "/start@my_bot", "/help me"])
+def test_known_commands_are_wanted(prefilter, text):
+    assert prefilter.wants(message(text))
+
+
+@pytest.mark.parametrize("text", ["hello", "/stop", "/", "start", None])
+def test_everything_else_is_dropped(prefilter, text):
+    assert not prefilter.wants(message(text))
+
+
+def test_other_update_kinds_are_dropped(prefilter):
+    assert not prefilter.wants({"update_id": 1, "callback_query": {"id": "1"}})
+
+
+def test_edited_commands_are_wanted(prefilter):
+    payload = message("/start")
+    payload["edited_message"] = payload.pop("message")
+    assert prefilter.wants(payload)
+
+
+def test_any_other_handler_accepts_everything():
+    prefilter = UpdatePrefilter([
+        CommandHandler("start", noop),
+        MessageHandler(filters.TEXT, noop),
+    ])
+    assert prefilter.accept_all
+    assert prefilter.wants(message("hello"))
+
+
+def test_filtered_command_handler_accepts_everything():
+    prefilter = UpdatePrefilter([
+        CommandHandler("start", noop, filters=filters.ChatType.PRIVATE),
+    ])
+    assert prefilter.wants({"update_id": 1, "callback_query": {"id": "1"}})
+
+
+@pytest.mark.parametrize("body", [b"[]", b'{"message":{}}', b'{"update_id":"1"}', b"{"])
+def test_parse_rejects_non_updates(body):
+    with pytest.raises(ValueError):
+        parse_update_body(body)
+
+
+def test_shard_key():
+    assert raw_shard_key(message("/start", chat_id=-100)) == -100
+    assert raw_shard_key({
+        "update_id": 5,
+        "callback_query": {"id": "1", "from": {"id": 7}, "message": {"chat": {"id": 3}}},
+    }) == 3
+    assert raw_shard_key({"update_id": 5, "poll_answer": {"user": {"id": 8}}}) == 8
+    assert raw_shard_key({"update_id": 5, "poll": {"id": "x"}}) == 5
+
+
+@pytest.mark.parametrize("payload", [
+    message("/start", chat_id=-100),
+    # Telegram's own order: sender first, then chat, then the text
+    {"update_id": 2, "message": {
+        "message_id": 1, "from": {"id": 99}, "chat": {"id": -5},
+        "text": 'say "chat":{"id":1}',
+    }},
+    {"update_id": 3, "message": {
+        "message_id": 2, "from": {"id": 99}, "chat": {"id": -5},
+        "reply_to_message": {"message_id": 1, "chat": {"id": -5}},
+    }},
+    {"update_id": 4, "callback_query": {
+        "id": "1", "from": {"id": 7}, "message": {"chat": {"id": 3}},
+    }},
+    {"update_id": 5, "callback_query": {"id": "1", "from": {"id": 7}}},
+    {"update_id": 6, "poll_answer": {"poll_id": "x", "user": {"id": 8}}},
+    {"update_id": 7, "poll": {"id": "x"}},
+])
+def test_peeked_shard_key_matches_parsed(payload):
+    for body in (json.dumps(payload), json.dumps(payload, separators=(",", ":"))):
+        assert peek_shard_key(body.encode()) == raw_shard_key(payload)
+
+
+@pytest.mark.parametrize("body", [b"[]", b'{"message":{"chat":{"id":1}}}', b"{"])
+def test_peek_leaves_non_updates_to_the_parser(body):
+    assert peek_shard_key(body) is None
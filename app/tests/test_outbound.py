@@ -0,0 +1,158 @@
+from telegram import Bot
+from telegram.error import NetworkError, RetryAfter
+from telegram.request import HTTPXRequest
+from src.benchmarks.fake_bot_api import FakeBotApi
+from src.telegram_bot.outbound import OutboundScheduler, TokenBucket
+import asyncio
+import httpx
+import pytest
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=2, capacity=1, updated=100.0)
+    assert bucket.delay(100.0) == 0
+    bucket.consume(100.0)
+    assert bucket.delay(100.0) == pytest.approx(0.5)
+    assert bucket.delay(100.5) == 0
+
+
+def test_token_bucket_burst_is_capped():
+    bucket = TokenBucket(rate=1, capacity=3, updated=0.0)
+    assert bucket.idle(1000.0)
+    for _ in range(3):
+        assert bucket.delay(1000.0) == 0
+        bucket.consume(1000.0)
+    assert bucket.delay(1000.0) == pytest.approx(1)
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=10, capacity=1, updated=0.0)
+    bucket.pause(0.0, 5)
+    assert bucket.delay(1.0) == pytest.approx(4)
+    assert bucket.delay(5.0) == 0
+    # A shorter pause never cuts a longer one short
+    bucket.pause(5.0, 10)
+    bucket.pause(6.0, 1)
+    assert bucket.delay(7.0) == pytest.approx(8)
+
+
+def fake_bot(api: FakeBotApi) -> Bot:
+    return Bot(
+        "123:fake",
+        base_url="http://fake-bot-api/bot",
+        request=HTTPXRequest(
+            httpx_kwargs={"transport": httpx.ASGITransport(app=api.app)}
+        ),
+    )
+
+
+def scheduler(bot, **kwargs) -> OutboundScheduler:
+    options = dict(
+        global_rate=1000,
+        chat_rate=1000,
+        group_rate=1000,
+        max_in_flight=4,
+        max_pending=100,
+        max_retries=2,
+        max_flood_waits=2,
+    )
+    options.update(kwargs)
+    return OutboundScheduler(bot, **options)
+
+
+def test_messages_are_delivered_through_the_fake_api():
+    async def run():
+        api = FakeBotApi(global_per_second=1000, chat_per_second=1000)
+        async with fake_bot(api) as bot:
+            outbox = scheduler(bot)
+            await outbox.start()
+            sent = await asyncio.gather(*(
+                outbox.send_message(chat_id, text=f"hi {chat_id}")
+                for chat_id in range(1, 6)
+            ))
+            await outbox.stop()
+        return api, sent, outbox
+
+    api, sent, outbox = asyncio.run(run())
+    assert [message.chat.id for message in sent] == [1, 2, 3, 4, 5]
+    assert len(api.sent) == 5
+    assert outbox.metrics.sent == 5
+
+
+def test_identical_pending_messages_are_coalesced():
+    async def run():
+        api = FakeBotApi(global_per_second=1000, chat_per_second=1000)
+        async with fake_bot(api) as bot:
+            outbox = scheduler(bot)
+            first = outbox.send_message(1, text="same")
+            second = outbox.send_message(1, text="same")
+            await outbox.start()
+            await asyncio.gather(first, second)
+            await outbox.stop()
+        return api, first is second
+
+    api, same_future = asyncio.run(run())
+    assert same_future
+    assert len(api.sent) == 1
+
+
+def test_flood_waits_are_capped(monkeypatch):
+    # Sit out no actual waits in tests
+    monkeypatch.setattr(TokenBucket, "pause", lambda self, now, seconds: None)
+
+    async def run():
+        # Every send is refused with a flood wait
+        api = FakeBotApi(chat_per_second=0)
+        async with fake_bot(api) as bot:
+            outbox = scheduler(bot, max_flood_waits=2)
+            await outbox.start()
+            with pytest.raises(RetryAfter):
+                await asyncio.wait_for(outbox.send_message(1, text="hi"), 10)
+            snapshot = outbox.snapshot()
+            await outbox.stop()
+        return api, snapshot
+
+    api, snapshot = asyncio.run(run())
+    assert api.flood_rejections == 3
+    assert snapshot["flood_waits"] == 3
+    assert snapshot["pending"] == 0
+
+
+class FlakyBot:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def send_message(self, chat_id, text):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise NetworkError("connection reset")
+        return text
+
+
+def test_network_errors_are_retried_with_a_limit(monkeypatch):
+    monkeypatch.setattr(TokenBucket, "pause", lambda self, now, seconds: None)
+
+    async def run(failures):
+        bot = FlakyBot(failures)
+        outbox = scheduler(bot, max_retries=2)
+        await outbox.start()
+        try:
+            return await asyncio.wait_for(outbox.send_message(1, text="hi"), 10)
+        finally:
+            await outbox.stop()
+
+    assert asyncio.run(run(failures=2)) == "hi"
+    with pytest.raises(NetworkError):
+        asyncio.run(run(failures=3))
+
+
+def test_full_outbox_rejects():
+    async def run():
+        outbox = scheduler(FlakyBot(0), max_pending=1)
+        outbox.send_message(1, text="a")
+        outbox.send_message(1, text="b")
+
+    from src.telegram_bot.outbound import OutboxFullException
+    with pytest.raises(OutboxFullException):
+        asyncio.run(run())
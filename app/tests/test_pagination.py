@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql
+from src.database.models import User, UserRole
+from src.database.repositories import UserRepository
+from src.database.pagination import (
+    KeysetCursor, keyset_condition, restore_sort_value,
+)
+import asyncio
+import pytest
+
+
+@pytest.mark.parametrize("value", [42, "bench_user", None, True])
+def test_cursor_round_trip(value):
+    cursor = KeysetCursor("first_name", True, value, 17, backwards=True)
+    decoded = KeysetCursor.decode(cursor.encode())
+    assert decoded == cursor
+
+
+def test_cursor_is_url_safe_without_padding():
+    encoded = KeysetCursor("id", False, "?&/+", 1).encode()
+    assert "=" not in encoded
+    assert not set(encoded) & set("+/?&")
+
+
+def test_datetime_value_is_restored():
+    created_at = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    decoded = KeysetCursor.decode(
+        KeysetCursor("created_at", False, created_at, 3).encode()
+    )
+    assert restore_sort_value(User.__table__.c.created_at, decoded.value) == created_at
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "e30",  # {}
+    KeysetCursor("id", False, 1, 1).encode()[:-3],
+])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        KeysetCursor.decode(cursor)
+
+
+def test_malformed_datetime_value():
+    with pytest.raises(ValueError):
+        restore_sort_value(User.__table__.c.created_at, "yesterday")
+
+
+def test_enum_value_is_encoded_by_name():
+    role = User.__table__.c.role
+    decoded = KeysetCursor.decode(
+        KeysetCursor("role", False, UserRole.ADMIN, 3).encode()
+    )
+    assert decoded.value == "ADMIN"
+    assert restore_sort_value(role, decoded.value) is UserRole.ADMIN
+
+    with pytest.raises(ValueError):
+        restore_sort_value(role, "admin")
+
+
+def test_keyset_condition_binds_enum_by_name():
+    condition = keyset_condition(
+        User.role, User.id, UserRole.ADMIN, 3, descending=False, nullable=False
+    )
+    compiled = condition.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    assert "'ADMIN'" in str(compiled)
+
+
+def test_binary_columns_cannot_be_keyset_sorted():
+    repository = UserRepository(session=None)
+    with pytest.raises(ValueError):
+        asyncio.run(repository.get_keyset_page(10, sortby="password"))
@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from sqlalchemy.exc import OperationalError
+from src.database import repositories
+from src.database.repositories import AuthSessionRepository
+import asyncio
+import pytest
+
+NOW = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+class FakeResult:
+    def __init__(self, rows=(), rowcount=0):
+        self.rows = list(rows)
+        self.rowcount = rowcount
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeSession:
+    """Records statements per transaction; fails on chosen SQL."""
+
+    def __init__(self, partitions, stranded=(), failing=()):
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+        self.partitions = partitions
+        self.stranded = stranded
+        self.failing = failing
+        self.pending = []
+        self.committed = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.pending.append(sql)
+        if any(part in sql for part in self.failing):
+            raise OperationalError(sql, params, Exception("refused"))
+        if "pg_inherits" in sql:
+            return FakeResult(self.partitions)
+        if sql.startswith("SELECT 1 FROM auth_sessions_default"):
+            stranded = params["start"] in self.stranded
+            return FakeResult([1] if stranded else [])
+        if sql.startswith("WITH moved"):
+            return FakeResult(rowcount=3)
+        return FakeResult()
+
+    async def commit(self):
+        self.committed.append(self.pending)
+        self.pending = []
+
+    async def rollback(self):
+        self.pending = []
+
+
+@pytest.fixture(autouse=True)
+def frozen_now(monkeypatch):
+    monkeypatch.setattr(repositories, "get_utc_now", lambda: NOW)
+
+
+def ensure(session, months_ahead=2):
+    return asyncio.run(
+        AuthSessionRepository(session).ensure_partitions(months_ahead)
+    )
+
+
+def test_each_month_is_its_own_transaction():
+    session = FakeSession(
+        ["auth_sessions_p202610", "auth_sessions_default"],
+        failing=["auth_sessions_p202611 PARTITION OF"],
+    )
+
+    created, failed = ensure(session)
+
+    assert created == ["auth_sessions_p202612"]
+    assert failed == ["auth_sessions_p202611"]
+    assert len(session.committed) == 1
+    assert "auth_sessions_p202612" in session.committed[0][-1]
+
+
+def test_rows_in_default_are_moved_into_the_new_partition():
+    november = datetime(2026, 11, 1, tzinfo=timezone.utc)
+    session = FakeSession(
+        ["auth_sessions_p202610", "auth_sessions_p202612", "auth_sessions_default"],
+        stranded=[november],
+    )
+
+    created, failed = ensure(session)
+
+    assert (created, failed) == (["auth_sessions_p202611"], [])
+    [statements] = session.committed
+    steps = [
+        "SELECT 1 FROM auth_sessions_default",
+        "ALTER TABLE auth_sessions DETACH PARTITION auth_sessions_default",
+        "CREATE TABLE auth_sessions_p202611 PARTITION OF auth_sessions",
+        "WITH moved AS (DELETE FROM auth_sessions_default",
+        "ALTER TABLE auth_sessions ATTACH PARTITION auth_sessions_default DEFAULT",
+    ]
+    # After the partition listing, all in one transaction
+    assert len(statements) == len(steps) + 1
+    for sql, step in zip(statements[1:], steps):
+        assert sql.startswith(step)
@@ -0,0 +1,81 @@
+from src.passwords.hasher import HasherSaturatedException, PasswordHasher
+import asyncio
+import threading
+import pytest
+
+
+class BlockingAlgorithm:
+    """Hashes only once `release` is set, like a slow bcrypt round."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password: bytes) -> bytes:
+        self.release.wait(5)
+        return b"hashed:" + password
+
+    def verify(self, password: bytes, hashed: bytes) -> bool:
+        return hashed == b"hashed:" + password
+
+    def needs_rehash(self, hashed: bytes) -> bool:
+        return False
+
+
+def test_hash_and_verify():
+    async def run():
+        algorithm = BlockingAlgorithm()
+        algorithm.release.set()
+        hasher = PasswordHasher(algorithm, workers=1, max_queue=0)
+        try:
+            hashed = await hasher.hash("secret")
+            return hashed, await hasher.verify("secret", hashed)
+        finally:
+            hasher.shutdown()
+
+    hashed, valid = asyncio.run(run())
+    assert hashed == b"hashed:secret"
+    assert valid
+
+
+def test_saturated_pool_sheds_load():
+    async def run():
+        algorithm = BlockingAlgorithm()
+        hasher = PasswordHasher(algorithm, workers=1, max_queue=1)
+        jobs = [asyncio.create_task(hasher.hash("a")) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HasherSaturatedException):
+                await hasher.hash("b")
+        finally:
+            algorithm.release.set()
+            await asyncio.gather(*jobs)
+            hasher.shutdown()
+        return hasher.metrics
+
+    metrics = asyncio.run(run())
+    assert metrics.rejected == 1
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_job_ends():
+    async def run():
+        algorithm = BlockingAlgorithm()
+        hasher = PasswordHasher(algorithm, workers=1, max_queue=0)
+        caller = asyncio.create_task(hasher.hash("a"))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        # The bcrypt job is still running in the pool
+        with pytest.raises(HasherSaturatedException):
+            await hasher.hash("b")
+
+        algorithm.release.set()
+        for _ in range(100):
+            if hasher.metrics.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert hasher.metrics.in_flight == 0
+        assert await hasher.hash("c") == b"hashed:c"
+        hasher.shutdown()
+
+    asyncio.run(run())
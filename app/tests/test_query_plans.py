@@ -0,0 +1,41 @@
+from src.benchmarks.query_plans import check_plans, seed, uses_index
+import asyncio
+import os
+import pytest
+
+# Needs a migrated Postgres; seeded rows are rolled back
+pytestmark = pytest.mark.skipif(
+    not os.getenv("POSTGRES_HOST"), reason="POSTGRES_HOST is not set"
+)
+
+USERS = 50_000
+SESSIONS_PER_USER = 4
+
+
+@pytest.fixture(scope="module")
+def plans():
+    from src.database.config import engine
+
+    async def collect():
+        try:
+            async with engine.connect() as connection:
+                await seed(connection, USERS, SESSIONS_PER_USER)
+                results = await check_plans(connection)
+                await connection.rollback()
+        finally:
+            await engine.dispose()
+        return {check.name: (check, scans, family) for check, scans, family in results}
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("name", [
+    "session by token",
+    "session by id",
+    "sessions of user",
+    "users by role",
+    "count by role",
+])
+def test_statement_uses_its_index(plans, name):
+    check, scans, family = plans[name]
+    assert uses_index(scans, family), f"{check.index} not used: {scans}"
@@ -0,0 +1,147 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import OperationalError
+from src.sessions import revocation
+from src.sessions.revocation import BloomFilter, RevocationSet
+import asyncio
+import pytest
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for key in range(0, 2000, 2):
+        bloom.add(key)
+    assert all(key in bloom for key in range(0, 2000, 2))
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for key in range(10_000):
+        bloom.add(key)
+    false_positives = sum(key in bloom for key in range(10_000, 60_000))
+    assert false_positives / 50_000 < 0.02
+
+
+class FakeRepository:
+    """Stands in for `AuthSessionRepository` over an in-memory table."""
+
+    revoked = {}
+    fail = False
+
+    def __init__(self, session):
+        pass
+
+    async def revocations_since(self, since):
+        if self.fail:
+            raise OperationalError("SELECT", {}, Exception("down"))
+        return [
+            (session_id, revoked_at)
+            for session_id, revoked_at in self.revoked.items()
+            if since is None or revoked_at >= since
+        ]
+
+    async def is_revoked(self, session_id):
+        if self.fail:
+            raise OperationalError("SELECT", {}, Exception("down"))
+        return session_id in self.revoked
+
+
+@asynccontextmanager
+async def session_factory():
+    yield None
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    FakeRepository.revoked = {}
+    FakeRepository.fail = False
+    monkeypatch.setattr(revocation, "AuthSessionRepository", FakeRepository)
+    return FakeRepository
+
+
+def make_set() -> RevocationSet:
+    return RevocationSet(
+        session_factory, refresh_interval=60, capacity=100, error_rate=0.01
+    )
+
+
+def test_refresh_picks_up_revocations(repository):
+    async def run():
+        revocations = make_set()
+        assert not revocations.fresh
+        await revocations.refresh()
+        assert revocations.fresh
+        assert not await revocations.is_revoked(1)
+
+        repository.revoked[1] = datetime.now(timezone.utc)
+        await revocations.refresh()
+        assert await revocations.is_revoked(1)
+        assert not await revocations.is_revoked(2)
+        return revocations
+
+    revocations = asyncio.run(run())
+    assert revocations.metrics.refreshes == 2
+
+
+def test_local_add_is_seen_before_a_refresh(repository):
+    async def run():
+        revocations = make_set()
+        await revocations.refresh()
+        repository.revoked[5] = datetime.now(timezone.utc)
+        revocations.add(5)
+        return await revocations.is_revoked(5)
+
+    assert asyncio.run(run())
+
+
+def test_filter_hits_are_confirmed_exactly(repository):
+    async def run():
+        revocations = make_set()
+        await revocations.refresh()
+        # In the filter, but the row says otherwise (a false positive)
+        revocations.add(9)
+        return await revocations.is_revoked(9), revocations.metrics
+
+    revoked, metrics = asyncio.run(run())
+    assert not revoked
+    assert metrics.exact_checks == 1
+
+
+def test_rebuild_once_over_capacity(repository):
+    async def run():
+        revocations = make_set()
+        await revocations.refresh()
+        now = datetime.now(timezone.utc)
+        for session_id in range(150):
+            repository.revoked[session_id] = now + timedelta(microseconds=session_id)
+            revocations.add(session_id)
+        await revocations.refresh()
+        return revocations
+
+    revocations = asyncio.run(run())
+    assert revocations.metrics.rebuilds == 2
+    assert revocations.snapshot()["filter_ids"] == 150
+
+
+def test_fails_closed_when_the_exact_check_fails(repository):
+    async def run():
+        revocations = make_set()
+        await revocations.refresh()
+        revocations.add(3)
+        repository.fail = True
+        return await revocations.is_revoked(3)
+
+    assert asyncio.run(run())
+
+
+def test_failed_refresh_is_counted(repository):
+    async def run():
+        revocations = make_set()
+        repository.fail = True
+        await revocations.refresh()
+        return revocations
+
+    revocations = asyncio.run(run())
+    assert not revocations.fresh
+    assert revocations.metrics.refresh_errors == 1
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+from src.database.models import UserRole
+from src.sessions import MISS, SessionCache, SessionIdentity, UserIdentity
+import time
+
+
+def identity(session_id: int, user_id: int, **kwargs) -> SessionIdentity:
+    return SessionIdentity(
+        id=session_id,
+        user_id=user_id,
+        is_active=True,
+        user=UserIdentity(id=user_id, role=UserRole.USER),
+        **kwargs,
+    )
+
+
+def test_miss_hit_and_negative_hit():
+    cache = SessionCache(max_size=10, ttl=60, negative_ttl=5)
+    assert cache.get("a") is MISS
+    cache.put("a", identity(1, 1))
+    cache.put("b", None)
+    assert cache.get("a").id == 1
+    assert cache.get("b") is None
+    snapshot = cache.snapshot()
+    assert (snapshot["hits"], snapshot["negative_hits"], snapshot["misses"]) == (1, 1, 1)
+
+
+def test_entries_expire(monkeypatch):
+    cache = SessionCache(max_size=10, ttl=60, negative_ttl=5)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache.put("a", identity(1, 1))
+    cache.put("b", None)
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+    assert cache.get("a").id == 1
+    assert cache.get("b") is MISS
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get("a") is MISS
+    assert cache.metrics.expirations == 2
+    assert len(cache) == 0
+
+
+def test_ttl_never_outlives_the_session():
+    cache = SessionCache(max_size=10, ttl=60, negative_ttl=5)
+    soon = datetime.now(timezone.utc) + timedelta(seconds=2)
+    assert cache.ttl_for(identity(1, 1, expires_at=soon)) <= 2
+
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+    cache.put("a", identity(1, 1, expires_at=expired))
+    assert cache.get("a") is MISS
+
+
+def test_least_recently_used_is_evicted():
+    cache = SessionCache(max_size=2, ttl=60, negative_ttl=5)
+    cache.put("a", identity(1, 1))
+    cache.put("b", identity(2, 2))
+    cache.get("a")
+    cache.put("c", identity(3, 3))
+    assert cache.get("b") is MISS
+    assert cache.get("a").id == 1
+    assert cache.get("c").id == 3
+    assert cache.metrics.evictions == 1
+
+
+def test_invalidation_by_token_and_user():
+    cache = SessionCache(max_size=10, ttl=60, negative_ttl=5)
+    cache.put("a", identity(1, 7))
+    cache.put("b", identity(2, 7))
+    cache.put("c", identity(3, 8))
+
+    cache.invalidate_token("c")
+    assert cache.get("c") is MISS
+
+    cache.invalidate_user(7)
+    assert cache.get("a") is MISS
+    assert cache.get("b") is MISS
+    assert cache.metrics.invalidations == 3
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SessionCache(max_size=0, ttl=60, negative_ttl=5)
+    cache.put("a", identity(1, 1))
+    assert cache.get("a") is MISS
+
+
+def test_put_after_token_invalidation_is_dropped():
+    cache = SessionCache(max_size=10, ttl=60, negative_ttl=5)
+    generation = cache.generation()
+    # Revoked while the database read was in flight
+    cache.invalidate_token("a")
+    cache.put("a", identity(1, 1), generation)
+    assert cache.get("a") is MISS
+    assert cache.snapshot()["stale_puts"] == 1
+
+    cache.put("a", identity(1, 1), cache.generation())
+    assert cache.get("a").id == 1
+
+
+def test_put_after_user_invalidation_is_dropped():
+    cache = SessionCache(max_size=10, ttl=60, negative_ttl=5)
+    generation = cache.generation()
+    cache.invalidate_user(1)
+    cache.put("a", identity(1, 1), generation)
+    cache.put("b", identity(2, 2), generation)
+    assert cache.get("a") is MISS
+    assert cache.get("b").id == 2
+
+
+def test_evicted_tombstones_drop_older_reads():
+    cache = SessionCache(max_size=2, ttl=60, negative_ttl=5)
+    generation = cache.generation()
+    for token in ("a", "b", "c"):
+        cache.invalidate_token(token)
+    # The tombstone for "a" is gone, so nothing read before it is trusted
+    cache.put("a", identity(1, 1), generation)
+    assert cache.get("a") is MISS
+
+
+def test_clear_drops_reads_started_before_it():
+    cache = SessionCache(max_size=10, ttl=60, negative_ttl=5)
+    generation = cache.generation()
+    cache.clear()
+    cache.put("a", identity(1, 1), generation)
+    assert cache.get("a") is MISS
@@ -0,0 +1,74 @@
+from src.telegram_bot.dedup import UpdateDeduplicator, UpdateIdWindow, peek_update_id
+import asyncio
+
+
+def test_window_detects_duplicates():
+    window = UpdateIdWindow(64)
+    assert window.add(100)
+    assert window.add(101)
+    assert not window.add(100)
+    assert not window.add(101)
+
+
+def test_window_slides_and_forgets_old_slots():
+    window = UpdateIdWindow(64)
+    assert window.add(1)
+    # Same slot as 1 once the window moved past it
+    assert window.add(65)
+    assert window.highest == 65
+    assert not window.add(65)
+
+
+def test_window_wraps_around_the_ring():
+    window = UpdateIdWindow(64)
+    for update_id in range(1000, 1200):
+        assert window.add(update_id)
+    for update_id in range(1200 - 63, 1200):
+        assert not window.add(update_id)
+
+
+def test_window_jump_clears_everything():
+    window = UpdateIdWindow(64)
+    window.add(10)
+    window.add(10 + 1000)
+    assert window.add(11)
+
+
+def test_window_restarts_on_an_id_far_below():
+    window = UpdateIdWindow(64)
+    window.add(10_000)
+    # Telegram picks a random id after a week without updates
+    assert window.add(5)
+    assert window.resets == 1
+    assert window.highest == 5
+    assert window.add(10_000)
+
+
+def test_window_discard_lets_an_id_through_again():
+    window = UpdateIdWindow(64)
+    window.add(100)
+    window.discard(100)
+    assert window.add(100)
+    # Outside the window: nothing to clear
+    window.discard(1)
+    assert not window.add(100)
+
+
+def test_deduplicator_release():
+    async def run():
+        deduplicator = UpdateDeduplicator(64)
+        assert not await deduplicator.seen(1)
+        assert await deduplicator.seen(1)
+        await deduplicator.release(1)
+        assert not await deduplicator.seen(1)
+        return deduplicator.metrics
+
+    metrics = asyncio.run(run())
+    assert (metrics.checked, metrics.duplicates, metrics.released) == (3, 1, 1)
+
+
+def test_peek_update_id():
+    assert peek_update_id(b'{"update_id":42,"message":{}}') == 42
+    assert peek_update_id(b' { "update_id" : 7 }') == 7
+    assert peek_update_id(b'{"message":{},"update_id":42}') is None
+    assert peek_update_id(b'junk') is None